@@ -4,7 +4,25 @@
 
 import machine
 import time
-from math import sqrt
+from math import sin, cos, radians, sqrt
+
+try:
+  import framebuf
+except ImportError:
+  framebuf = None
+
+try:
+  import asyncio
+except ImportError:
+  try:
+    import uasyncio as asyncio
+  except ImportError:
+    asyncio = None
+
+try:
+  from collections import OrderedDict
+except ImportError:
+  from ucollections import OrderedDict
 
 #TFTRotations and TFTRGB are bits to set
 # on MADCTL to control display rotation/color layout
@@ -35,6 +53,487 @@ def TFTColor( aR, aG, aB ) :
 
 ScreenSize = (128, 160)
 
+class TFTBuffer(object) :
+  """RAM copy of the screen for TFT buffered mode.  Pixels are kept as big
+     endian RGB565 (the byte order the panel wants) so dirty areas can be
+     sent straight from the buffer.  Writes arrive through the same
+     window/fill/push steps the driver uses for the panel and the touched
+     areas are kept as a short list of dirty rectangles."""
+
+  #More rectangles than this get merged with their closest neighbor.
+  MAXDIRTY = 8
+
+  def __init__( self, aSize ) :
+    self.width, self.height = aSize
+    self.buf = bytearray(self.width * self.height * 2)
+    #framebuf stores RGB565 in native (little endian) order so colors are
+    # byte swapped before handing them to it.
+    if framebuf :
+      self.fb = framebuf.FrameBuffer(self.buf, self.width, self.height, framebuf.RGB565)
+    else:
+      self.fb = None
+    self.dirty = []
+    self._win = (0, 0, 0, 0)
+    self._pos = 0
+
+  def window( self, x0, y0, x1, y1 ) :
+    '''Set the window following fill/push calls write to.'''
+    self._win = (x0, y0, x1, y1)
+    self._pos = 0
+
+  def fill( self, aColor, aPixels ) :
+    '''Write aPixels of aColor at the window cursor.'''
+    x0, y0, x1, y1 = self._win
+    ww = x1 - x0 + 1
+    p = self._pos
+    n = min(int(aPixels), ww * (y1 - y0 + 1) - p)
+    if n <= 0 :
+      return
+    self._pos = p + n
+    r, c = divmod(p, ww)
+    if c :
+      run = min(ww - c, n)
+      self._fillrect(x0 + c, y0 + r, run, 1, aColor)
+      n -= run
+      r += 1
+    rows = n // ww
+    if rows :
+      self._fillrect(x0, y0 + r, ww, rows, aColor)
+      r += rows
+    n -= rows * ww
+    if n :
+      self._fillrect(x0, y0 + r, n, 1, aColor)
+
+  def push( self, aData ) :
+    '''Copy RGB565 pixel data to the window cursor, row by row.'''
+    x0, y0, x1, y1 = self._win
+    ww = x1 - x0 + 1
+    src = memoryview(aData)
+    p = self._pos
+    n = min(len(src) // 2, ww * (y1 - y0 + 1) - p)
+    if n <= 0 :
+      return
+    self._pos = p + n
+    buf = self.buf
+    bw = self.width
+    i = 0
+    r, c = divmod(p, ww)
+    ystart = y0 + r
+    while i < n :
+      run = min(ww - c, n - i)
+      y = y0 + r
+      if 0 <= y < self.height :
+        x = x0 + c
+        xs = max(x, 0)
+        xe = min(x + run, bw)
+        if xs < xe :
+          o = 2 * (y * bw + xs)
+          so = 2 * (i + xs - x)
+          buf[o:o + 2 * (xe - xs)] = src[so:so + 2 * (xe - xs)]
+      i += run
+      r += 1
+      c = 0
+    self.mark(x0, ystart, x1, y0 + r - 1)
+
+  def _fillrect( self, x, y, w, h, aColor ) :
+    #Clip to the buffer, then fill and mark dirty.
+    xs = max(x, 0)
+    ys = max(y, 0)
+    xe = min(x + w, self.width)
+    ye = min(y + h, self.height)
+    if xs >= xe or ys >= ye :
+      return
+    if self.fb :
+      self.fb.fill_rect(xs, ys, xe - xs, ye - ys, ((aColor & 0xFF) << 8) | ((aColor >> 8) & 0xFF))
+    else:
+      row = bytes(((aColor >> 8) & 0xFF, aColor & 0xFF)) * (xe - xs)
+      bw2 = self.width * 2
+      o = ys * bw2 + xs * 2
+      for _ in range(ye - ys) :
+        self.buf[o:o + len(row)] = row
+        o += bw2
+    self.mark(xs, ys, xe - 1, ye - 1)
+
+  def mark( self, x0, y0, x1, y1 ) :
+    '''Add an inclusive rectangle to the dirty list.  It is merged with any
+       rectangle it overlaps or touches as long as the union is no bigger
+       than the two areas added together.'''
+    x0 = max(x0, 0)
+    y0 = max(y0, 0)
+    x1 = min(x1, self.width - 1)
+    y1 = min(y1, self.height - 1)
+    if x0 > x1 or y0 > y1 :
+      return
+    d = self.dirty
+    r = (x0, y0, x1, y1)
+    i = 0
+    while i < len(d) :
+      a = d[i]
+      if a[0] <= r[2] + 1 and r[0] <= a[2] + 1 and a[1] <= r[3] + 1 and r[1] <= a[3] + 1 :
+        u = _union(a, r)
+        if _area(u) <= _area(a) + _area(r) :
+          #The bigger rectangle may now touch one already checked.
+          d.pop(i)
+          r = u
+          i = 0
+          continue
+      i += 1
+    d.append(r)
+    if len(d) > TFTBuffer.MAXDIRTY :
+      self._squeeze()
+
+  def _squeeze( self ) :
+    #Merge the pair of rectangles whose union adds the fewest pixels.
+    d = self.dirty
+    best = None
+    for i in range(len(d)) :
+      for j in range(i + 1, len(d)) :
+        u = _union(d[i], d[j])
+        grow = _area(u) - _area(d[i]) - _area(d[j])
+        if best is None or grow < best[0] :
+          best = (grow, i, j, u)
+    _, i, j, u = best
+    d.pop(j)
+    d[i] = u
+
+class GlyphCache(object) :
+  """Bounded cache of expanded RGB565 glyph blocks.  Once the stored
+     blocks go over the byte budget the least recently used are dropped."""
+
+  def __init__( self, aBudget ) :
+    self.budget = aBudget
+    self.used = 0
+    self.hits = 0
+    self.misses = 0
+    self._blocks = OrderedDict()
+    self._fonts = {}                   #Fonts with blocks keyed on their id().
+
+  def fontkey( self, aFont ) :
+    '''Stand-in for aFont in a key (fonts can be dicts, which are not
+       hashable).  The cache holds on to every font it gave a key for, so
+       no other font can turn up with the same id() until clear().'''
+    k = id(aFont)
+    self._fonts[k] = aFont
+    return k
+
+  def get( self, aKey ) :
+    '''Return the block stored for aKey or None, marking it recently used.'''
+    buf = self._blocks.pop(aKey, None)
+    if buf is None :
+      self.misses += 1
+    else:
+      self._blocks[aKey] = buf
+      self.hits += 1
+    return buf
+
+  def put( self, aKey, aBlock ) :
+    '''Store aBlock, evicting old blocks to stay within budget.'''
+    n = len(aBlock)
+    if n > self.budget :
+      return
+    blocks = self._blocks
+    while self.used + n > self.budget :
+      self.used -= len(blocks.pop(next(iter(blocks))))
+    blocks[aKey] = aBlock
+    self.used += n
+
+  def clear( self ) :
+    self._blocks = OrderedDict()
+    self._fonts = {}
+    self.used = 0
+
+class DisplayList(object) :
+  """Frame recorded by TFT.record().  Writes arrive through the same
+     window/fill/push steps the driver uses for the panel and are kept as
+     one op per window: [rect, parts, bytes] where parts is a list of
+     (color, pixels) fills and bytes of pixel data and bytes counts what
+     the op sends.  optimize() then works
+     on whole ops before anything is sent.  Optimizing takes time that
+     grows with the square of the ops, so every MAXOPS ops what is recorded
+     so far is sent and recording goes on."""
+
+  #Ops kept before sending them.  Clearing and redrawing one size 2 digit
+  # without a background takes about 20.
+  MAXOPS = 64
+
+  #Bus time one window setup costs, in pixel data bytes.  CASET, RASET,
+  # RAMWR and their 8 bytes of coordinates are 5 spi.write() calls and as
+  # many DC changes, on MicroPython about as long as sending 128 bytes of
+  # pixels at 20MHz.  Splitting a fill only pays when it saves more than
+  # this.
+  WINDOWCOST = 128
+
+  def __init__( self, aTFT ) :
+    self._tft = aTFT
+    self.target = aTFT._target         #Where the frame is sent.
+    self.ops = []
+    self.dirty = ()                    #show() has nothing to send.
+    self._win = None
+    self._op = None
+
+  def window( self, x0, y0, x1, y1 ) :
+    '''Start a new op, kept once something is written to it.'''
+    if len(self.ops) >= DisplayList.MAXOPS :
+      self._tft._play(self)
+    self._win = (x0, y0, x1, y1)
+    self._op = None
+
+  def _current( self ) :
+    op = self._op
+    if op is None and self._win is not None :
+      op = self._op = [self._win, [], 0]
+      self.ops.append(op)
+    return op
+
+  def fill( self, aColor, aPixels ) :
+    '''Record aPixels of aColor at the window cursor.'''
+    op = self._current()
+    if op is None :
+      return
+    n = min(int(aPixels), _area(op[0]) - op[2] // 2)
+    if n <= 0 :
+      return
+    parts = op[1]
+    if parts and type(parts[-1]) is tuple and parts[-1][0] == aColor :
+      parts[-1] = (aColor, parts[-1][1] + n)
+    else:
+      parts.append((aColor, n))
+    op[2] += n * 2
+
+  def push( self, aData ) :
+    '''Record a copy of RGB565 pixel data at the window cursor.  Pieces
+       need not hold whole pixels, like on the bus.'''
+    op = self._current()
+    if op is None :
+      return
+    n = min(len(aData), _area(op[0]) * 2 - op[2])
+    if n <= 0 :
+      return
+    op[1].append(bytes(memoryview(aData)[:n]))
+    op[2] += n
+
+  def optimize( self ) :
+    '''Return the ops to send, in order.  Ops wholly covered by later
+       complete ones are dropped and solid fills partly covered are cut
+       down to what stays visible, same colored fills that together make a
+       rectangle are merged, and the rest is sorted top to bottom as far
+       as overlaps allow, keeping ops that share rows or columns together
+       so they skip the RASET or CASET.'''
+    ops = self._hide(self.ops)
+    self._merge(ops)
+    return self._sort(ops)
+
+  @staticmethod
+  def _solid( aOp ) :
+    #Color of an op that is a single fill of its whole window, else None.
+    parts = aOp[1]
+    if len(parts) == 1 and type(parts[0]) is tuple and aOp[2] == _area(aOp[0]) * 2 :
+      return parts[0][0]
+    return None
+
+  def _hide( self, aOps ) :
+    #Walk back from the last op, keeping the windows completely written so
+    # far, which hide anything earlier under them.
+    covers = []
+    out = []
+    for op in reversed(aOps) :
+      rect = op[0]
+      hits = [c for c in covers if _overlap(c, rect)]
+      if hits :
+        pieces = _subtract(rect, hits)
+        if not pieces :
+          continue
+        color = DisplayList._solid(op)
+        if color is not None :
+          saved = (_area(rect) - sum(_area(p) for p in pieces)) * 2
+          if saved > (len(pieces) - 1) * DisplayList.WINDOWCOST :
+            for p in pieces :
+              out.append([p, [(color, _area(p))], _area(p) * 2])
+            covers.append(rect)
+            continue
+      if op[2] == _area(rect) * 2 :
+        covers.append(rect)
+      out.append(op)
+    out.reverse()
+    return out
+
+  def _merge( self, aOps ) :
+    #Join pairs of same colored solid ops whose windows add up to one
+    # rectangle.  The joined op takes the place of one of the two, so none
+    # of the ops in between may overlap the other.
+    i = 0
+    while i < len(aOps) :
+      color = DisplayList._solid(aOps[i])
+      j = i + 1
+      while color is not None and j < len(aOps) :
+        a = aOps[i][0]
+        b = aOps[j][0]
+        if DisplayList._solid(aOps[j]) == color and _joins(a, b) :
+          u = _union(a, b)
+          op = [u, [(color, _area(u))], _area(u) * 2]
+          between = aOps[i + 1:j]
+          if not any(_overlap(o[0], b) for o in between) :
+            aOps[i] = op
+            aOps.pop(j)
+            j = i + 1
+            continue
+          if not any(_overlap(o[0], a) for o in between) :
+            aOps[j] = op
+            aOps.pop(i)
+            color = None
+            i -= 1
+            break
+        j += 1
+      i += 1
+
+  def _sort( self, aOps ) :
+    #Topological sort on overlap (an op must follow every earlier op it
+    # overlaps).  Of the ops ready each time the one sharing the column or
+    # row range of the last window goes first, since the display still
+    # holds that half of the window, then the topmost, leftmost.
+    n = len(aOps)
+    before = [0] * n
+    after = [[] for _ in range(n)]
+    for j in range(n) :
+      for i in range(j) :
+        if _overlap(aOps[i][0], aOps[j][0]) :
+          before[j] += 1
+          after[i].append(j)
+    ready = [i for i in range(n) if not before[i]]
+    out = []
+    last = (-1, -1, -1, -1)
+    while ready :
+      best = None
+      for k in range(len(ready)) :
+        r = aOps[ready[k]][0]
+        key = ((r[0] != last[0] or r[2] != last[2]) + (r[1] != last[1] or r[3] != last[3]), r[1], r[0])
+        if best is None or key < best[0] :
+          best = (key, k)
+      i = ready.pop(best[1])
+      last = aOps[i][0]
+      out.append(aOps[i])
+      for j in after[i] :
+        before[j] -= 1
+        if not before[j] :
+          ready.append(j)
+    return out
+
+#(x sign, y sign, swap x/y) taking the first octant run to all eight.
+_OCTANTS = ((1, 1, False), (-1, 1, False), (1, -1, False), (-1, -1, False),
+            (1, 1, True), (1, -1, True), (-1, 1, True), (-1, -1, True))
+
+def _circleruns( aRadius ) :
+  '''Midpoint circle for one octant (0 <= x <= y) as a list of
+     (y, xstart, xend) runs of pixels sharing a y.'''
+  runs = []
+  x = 0
+  y = aRadius
+  d = 1 - aRadius
+  xa = 0
+  while x <= y :
+    if d < 0 :
+      d += 2 * x + 3
+    else:
+      runs.append((y, xa, x))
+      d += 2 * (x - y) + 5
+      y -= 1
+      xa = x + 1
+    x += 1
+  if xa < x :
+    runs.append((y, xa, x - 1))
+  return runs
+
+def _halfwidths( aRadius ) :
+  '''Half width of each row of a filled midpoint circle, indexed by the
+     row's distance from the center.'''
+  hw = [0] * (aRadius + 1)
+  for y, xa, xb in _circleruns(aRadius) :
+    if xb > hw[y] :
+      hw[y] = xb
+    for x in range(xa, xb + 1) :
+      if y > hw[x] :
+        hw[x] = y
+  return hw
+
+def _normrect( aStart, aSize ) :
+  '''x, y, w, h of a rectangle with a negative width or height turned
+     into one extending left or up from aStart.'''
+  x, y = aStart
+  w, h = aSize
+  if w < 0 :
+    x += w + 1
+    w = -w
+  if h < 0 :
+    y += h + 1
+    h = -h
+  return x, y, w, h
+
+def _union( a, b ) :
+  return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _area( r ) :
+  return (r[2] - r[0] + 1) * (r[3] - r[1] + 1)
+
+def _overlap( a, b ) :
+  return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def _joins( a, b ) :
+  '''True when the union of inclusive rectangles a and b is exactly the
+     two of them: same columns and touching or overlapping rows, or the
+     other way around.'''
+  if a[0] == b[0] and a[2] == b[2] :
+    return a[1] <= b[3] + 1 and b[1] <= a[3] + 1
+  if a[1] == b[1] and a[3] == b[3] :
+    return a[0] <= b[2] + 1 and b[0] <= a[2] + 1
+  return False
+
+def _subtract( aRect, aCuts ) :
+  '''Parts of inclusive rectangle aRect not under any of aCuts, as a list
+     of rectangles: full width bands above and below each cut and the
+     pieces left and right of it.'''
+  pieces = [aRect]
+  for c in aCuts :
+    out = []
+    for p in pieces :
+      if not _overlap(p, c) :
+        out.append(p)
+        continue
+      x0, y0, x1, y1 = p
+      if y0 < c[1] :
+        out.append((x0, y0, x1, c[1] - 1))
+        y0 = c[1]
+      if y1 > c[3] :
+        out.append((x0, c[3] + 1, x1, y1))
+        y1 = c[3]
+      if x0 < c[0] :
+        out.append((x0, y0, c[0] - 1, y1))
+      if x1 > c[2] :
+        out.append((c[2] + 1, y0, x1, y1))
+    pieces = out
+    if not pieces :
+      break
+  return pieces
+
+#4x4 ordered dither thresholds, 0-15.
+_BAYER = (0, 8, 2, 10,
+          12, 4, 14, 6,
+          3, 11, 1, 9,
+          15, 7, 13, 5)
+
+#@micropython.native
+def _blend( aColor0, aColor1, aNum, aDen, aBias = 8 ) :
+  '''RGB565 color aNum/aDen of the way from aColor0 to aColor1.  Each
+     channel is worked out in 16ths and rounded up when the fraction is at
+     least (16 - aBias)/16, 8 rounds to nearest and a dither threshold
+     dithers.'''
+  out = 0
+  for shift, mask in ((11, 0x1F), (5, 0x3F), (0, 0x1F)) :
+    a = (aColor0 >> shift) & mask
+    b = (aColor1 >> shift) & mask
+    v = a * 16 + ((b - a) * 16 * aNum) // aDen
+    out |= ((v + aBias) >> 4) << shift
+  return out
+
 class TFT(object) :
   """Sainsmart TFT 7735 display driver."""
 
@@ -99,6 +598,12 @@ class TFT(object) :
   WHITE = TFTColor(0xFF, 0xFF, 0xFF)
   GRAY = TFTColor(0x80, 0x80, 0x80)
 
+  #Default glyph cache budget in bytes.  One 5x8 glyph at size 2 is 320.
+  GLYPHCACHE = 4096
+
+  #Size in bytes of each of the two line buffers used by flush().
+  FLUSHCHUNK = 1024
+
   @staticmethod
   def color( aR, aG, aB ) :
     '''Create a 565 rgb TFTColor value'''
@@ -120,10 +625,71 @@ class TFT(object) :
     self.spi = spi
     self.colorData = bytearray(2)
     self.windowLocData = bytearray(4)
+    self._target = None                #TFTBuffer or DisplayList when set.
+    self._cmdData = bytearray(1)
+    self._txn = 0                      #_begin() nesting depth.
+    self._dc = -1                      #Last DC pin level written.
+    self._wincol = -1                  #Column/row range the display holds.
+    self._winrow = -1
+    self._glyphs = GlyphCache(TFT.GLYPHCACHE)
+    self._lines = None                 #flush() ping-pong buffers.
+    self._prof = None                  #tftprof.Profiler while profiling.
+    self._clip = None                  #Clip rectangle, None for the screen.
+    self._clips = []                   #Saved by pushclip().
 
   def size( self ) :
     return self._size
 
+  def pushclip( self, aStart, aSize ) :
+    '''Limit drawing to the rectangle at aStart of aSize (width, height)
+       inside the current clip rectangle, until the matching popclip().
+       Everything drawn is trimmed to it before the display window is set
+       and anything wholly outside costs nothing.'''
+    self._clips.append(self._clip)
+    x0, y0, x1, y1 = self.cliprect()
+    self._clip = (max(x0, aStart[0]), max(y0, aStart[1]),
+                  min(x1, aStart[0] + aSize[0] - 1), min(y1, aStart[1] + aSize[1] - 1))
+
+  def popclip( self ) :
+    '''Go back to the clip rectangle before the last pushclip().'''
+    self._clip = self._clips.pop()
+
+  def cliprect( self ) :
+    '''Current clip rectangle as inclusive x0, y0, x1, y1.  May be empty
+       (x0 > x1 or y0 > y1) when pushed rectangles do not overlap.'''
+    if self._clip is None :
+      return (0, 0, self._size[0] - 1, self._size[1] - 1)
+    return self._clip
+
+  def _outside( self, x0, y0, x1, y1 ) :
+    '''True when the inclusive rectangle x0,y0 - x1,y1 misses the clip
+       rectangle.'''
+    c = self._clip
+    if c is None :
+      return x1 < 0 or y1 < 0 or x0 >= self._size[0] or y0 >= self._size[1]
+    return x1 < c[0] or y1 < c[1] or x0 > c[2] or y0 > c[3] or c[0] > c[2] or c[1] > c[3]
+
+  def profile( self, aOn = True ) :
+    '''Turn bus traffic and timing counters on or off and return the
+       tftprof.Profiler (None when off).  Nothing is counted, and nothing
+       costs extra, unless this has been turned on.'''
+    if aOn and self._prof is None :
+      import tftprof
+      self._prof = tftprof.Profiler(self)
+    elif not aOn and self._prof is not None :
+      self._prof.remove()
+      self._prof = None
+    return self._prof
+
+  def stats( self ) :
+    '''Counters per primitive while profiling, see tftprof.'''
+    return self._prof.stats() if self._prof else {}
+
+  def resetstats( self ) :
+    '''Zero the profiling counters.'''
+    if self._prof :
+      self._prof.reset()
+
 #   @micropython.native
   def on( self, aTF = True ) :
     '''Turn display on or off.'''
@@ -145,27 +711,190 @@ class TFT(object) :
     '''0 - 3. Starts vertical with top toward pins and rotates 90 deg
        clockwise each step.'''
     if (0 <= aRot < 4):
+      self.commit()
       rotchange = self.rotate ^ aRot
       self.rotate = aRot
       #If switching from vertical to horizontal swap x,y
       # (indicated by bit 0 changing).
       if (rotchange & 1):
         self._size =(self._size[1], self._size[0])
+        #Clip rectangles belong to the old screen shape.
+        self._clip = None
+        self._clips = []
+        #Buffer has to match the new screen shape.
+        if self._target is not None :
+          self.buffered(True)
       self._setMADCTL()
 
+  def buffered( self, aOn = True ) :
+    '''Turn buffered mode on or off.  When on, drawing only updates a RAM
+       copy of the screen and show() sends the changed areas to the display.
+       The buffer is sized to the current screen so call this after init and
+       rotation.  Costs 2 bytes per pixel (40K for 128x160) of heap.'''
+    self.commit()
+    self._target = TFTBuffer(self._size) if aOn else None
+
+  def record( self ) :
+    '''Start recording a frame.  Until commit() drawing only goes into a
+       display list (show() has nothing to send meanwhile), then commit()
+       sends it with the overdraw taken out: whatever later drawing paints
+       over is dropped or trimmed, same colored fills are merged and the
+       windows go out top to bottom, those sharing rows or columns
+       together.  Pixel data (images, text with a
+       background) is copied while recording so a frame costs its pixel
+       data in heap.  Commands that do not draw (scrolling, on(),
+       invertcolor()) are still sent at once.  In buffered mode this does
+       nothing, the buffer already keeps overdraw off the bus.'''
+    if self._target is None :
+      self._target = DisplayList(self)
+
+  def commit( self ) :
+    '''Send the frame recorded since record() and go back to drawing
+       straight to the display (or to the buffer in buffered mode).'''
+    d = self._target
+    if isinstance(d, DisplayList) :
+      self._play(d)
+      self._target = d.target
+
+  def _play( self, aList ) :
+    '''Send the optimized ops of display list aList and empty it.  Called
+       in the middle of a primitive when the list fills up, so the color
+       being drawn is put back afterwards.'''
+    ops = aList.optimize()
+    aList.ops = []
+    color = (self.colorData[0] << 8) | self.colorData[1]
+    self._target = aList.target
+    self._begin()
+    for (x0, y0, x1, y1), parts, _ in ops :
+      self._setwindowloc((x0, y0), (x1, y1))
+      for p in parts :
+        if type(p) is tuple :
+          self._setColor(p[0])
+          self._draw(p[1])
+        else:
+          self._pushpixels(p)
+    self._end()
+    self._target = aList
+    self._setColor(color)
+
+  def show( self ) :
+    '''Send the areas changed since the last show() to the display, one
+       window write per dirty rectangle.  Does nothing unless buffered.'''
+    b = self._target
+    if b is None or not b.dirty :
+      return
+    rects = b.dirty
+    b.dirty = []
+    mv = memoryview(b.buf)
+    bw2 = b.width * 2
+    self._select()
+    for x0, y0, x1, y1 in rects :
+      self._sendwindow(x0, y0, x1, y1)
+      self._setdc(1)
+      if x0 == 0 and x1 == b.width - 1 :
+        #Full width rows are contiguous in the buffer.
+        self.spi.write(mv[y0 * bw2:(y1 + 1) * bw2])
+      else:
+        o = y0 * bw2 + x0 * 2
+        ln = (x1 - x0 + 1) * 2
+        for _ in range(y1 - y0 + 1) :
+          self.spi.write(mv[o:o + ln])
+          o += bw2
+    self._deselect()
+
+  async def flush( self ) :
+    '''Coroutine version of show() that lets other tasks run while the dirty
+       areas are sent.  Rows are copied into two ping-pong line buffers of
+       FLUSHCHUNK bytes: while one buffer is on the bus the next is filled.
+       The transfer only overlaps the copy when the SPI object has a
+       write_async() coroutine (a DMA driver, or tftemu.AsyncSPI on the
+       host).  Stock machine.SPI has none, its write() blocks for one chunk
+       and then yields, so there is no overlap without a DMA driver.  Full width areas
+       are sent straight from the buffer in FLUSHCHUNK pieces.  Other tasks
+       should only draw (which just touches RAM) while a flush is running,
+       any command sent in between would end the RAMWR stream.'''
+    b = self._target
+    if b is None or not b.dirty :
+      return
+    rects = b.dirty
+    b.dirty = []
+    bw2 = b.width * 2
+    if self._lines is None or len(self._lines[0]) < bw2 :
+      n = max(TFT.FLUSHCHUNK, bw2)
+      self._lines = (bytearray(n), bytearray(n))
+    src = memoryview(b.buf)
+    pending = None
+    which = 0
+    for x0, y0, x1, y1 in rects :
+      ln = (x1 - x0 + 1) * 2
+      rows = len(self._lines[0]) // ln
+      #The window can only change once the last chunk is on the display.
+      if pending is not None :
+        await pending
+        pending = None
+      self._sendwindow(x0, y0, x1, y1)
+      o = y0 * bw2 + x0 * 2
+      y = y0
+      while y <= y1 :
+        n = min(rows, y1 - y + 1)
+        if ln == bw2 :
+          chunk = src[o:o + n * bw2]
+          o += n * bw2
+        else:
+          chunk = memoryview(self._lines[which])
+          p = 0
+          for _ in range(n) :
+            chunk[p:p + ln] = src[o:o + ln]
+            p += ln
+            o += bw2
+          chunk = chunk[:p]
+          which ^= 1
+        if pending is not None :
+          await pending
+        pending = self._xfer(chunk)
+        #Let the transfer get going before the next chunk is copied.
+        await asyncio.sleep(0)
+        y += n
+    if pending is not None :
+      await pending
+
+  def _xfer( self, aData ) :
+    '''Start sending a chunk of pixel data and return the task to await
+       for its completion, None when it was sent before returning.'''
+    write = getattr(self.spi, 'write_async', None)
+    if write is None :
+      self._select()
+      self._setdc(1)
+      self.spi.write(aData)
+      self._deselect()
+      return None
+    return asyncio.create_task(self._xferasync(write, aData))
+
+  async def _xferasync( self, aWrite, aData ) :
+    self._select()
+    self._setdc(1)
+    await aWrite(aData)
+    self._deselect()
+
 #  @micropython.native
   def pixel( self, aPos, aColor ) :
     '''Draw a pixel at the given position'''
-    if 0 <= aPos[0] < self._size[0] and 0 <= aPos[1] < self._size[1]:
+    if not self._outside(aPos[0], aPos[1], aPos[0], aPos[1]) :
+      self._begin()
       self._setwindowpoint(aPos)
       self._pushcolor(aColor)
+      self._end()
 
 #   @micropython.native
-  def text( self, aPos, aString, aColor, aFont, aSize = 1, nowrap = False ) :
+  def text( self, aPos, aString, aColor, aFont, aSize = 1, nowrap = False, aBGColor = None ) :
     '''Draw a text at the given position.  If the string reaches the end of the
        display it is wrapped to aPos[0] on the next line.  aSize may be an integer
        which will size the font uniformly on w,h or a or any type that may be
-       indexed with [0] or [1].'''
+       indexed with [0] or [1].  See char() for aBGColor: scaled text only
+       uses the glyph cache when it is given, without it every set pixel is
+       a fillrect of its own.  aFont may be a
+       dict font or a compiled tftfont.Font, proportional fonts advance by
+       the width of each character.'''
 
     if aFont == None:
       return
@@ -178,9 +907,14 @@ class TFT(object) :
 
     px, py = aPos
     width = wh[0] * aFont["Width"] + 1
+    charwidth = aFont.charwidth if getattr(aFont, 'proportional', False) else None
+    self._begin()
     for c in aString:
-      self.char((px, py), c, aColor, aFont, wh)
-      px += width
+      self.char((px, py), c, aColor, aFont, wh, aBGColor)
+      if charwidth :
+        px += wh[0] * charwidth(ord(c)) + 1
+      else:
+        px += width
       #We check > rather than >= to let the right (blank) edge of the
       # character print off the right of the screen.
       if px + width > self._size[0]:
@@ -189,12 +923,16 @@ class TFT(object) :
         else:
           py += aFont["Height"] * wh[1] + 1
           px = aPos[0]
+    self._end()
 
 #   @micropython.native
-  def char( self, aPos, aChar, aColor, aFont, aSizes ) :
+  def char( self, aPos, aChar, aColor, aFont, aSizes, aBGColor = None ) :
     '''Draw a character at the given position using the given font and color.
        aSizes is a tuple with x, y as integer scales indicating the
-       # of pixels to draw for each pixel in the character.'''
+       # of pixels to draw for each pixel in the character.
+       Unset pixels are drawn in aBGColor (black at size 1 when None) with the
+       whole character sent as a single cached image.  Scaled characters
+       without aBGColor are transparent and drawn a fillrect per pixel.'''
 
     if aFont == None:
       return
@@ -204,24 +942,24 @@ class TFT(object) :
 
     ci = ord(aChar)
     if (startchar <= ci <= endchar):
-      fontw = aFont['Width']
       fonth = aFont['Height']
-      ci = (ci - startchar) * fontw
-
-      charA = aFont["Data"][ci:ci + fontw]
-      px = aPos[0]
-      if aSizes[0] <= 1 and aSizes[1] <= 1 :
-        buf = bytearray(2 * fonth * fontw)
-        for q in range(fontw) :
-          c = charA[q]
-          for r in range(fonth) :
-            if c & 0x01 :
-              pos = 2 * (r * fontw + q)
-              buf[pos] = aColor >> 8
-              buf[pos + 1] = aColor & 0xff
-            c >>= 1
-        self.image(aPos[0], aPos[1], aPos[0] + fontw - 1, aPos[1] + fonth - 1, buf)
+      sx = int(aSizes[0])
+      sy = int(aSizes[1])
+      if self._outside(aPos[0], aPos[1], aPos[0] + aFont['Width'] * max(sx, 1) - 1,
+                       aPos[1] + fonth * max(sy, 1) - 1) :
+        return
+      if sx <= 1 and sy <= 1 :
+        sx = sy = 1
+        if aBGColor is None :
+          aBGColor = TFT.BLACK
+      if aBGColor is not None :
+        buf = self._glyph(aFont, ci, aColor, aBGColor, sx, sy)
+        fontw = len(buf) // (2 * sx * fonth * sy)
+        self.image(aPos[0], aPos[1], aPos[0] + fontw * sx - 1, aPos[1] + fonth * sy - 1, buf)
       else:
+        charA, fontw = TFT._glyphcols(aFont, ci)
+        px = aPos[0]
+        self._begin()
         for c in charA :
           py = aPos[1]
           for r in range(fonth) :
@@ -230,11 +968,63 @@ class TFT(object) :
             py += aSizes[1]
             c >>= 1
           px += aSizes[0]
+        self._end()
+
+  def glyphcache( self, aBytes ) :
+    '''Set the byte budget of the glyph cache.  0 turns the cache off.'''
+    self._glyphs = GlyphCache(aBytes) if aBytes > 0 else None
+
+#   @micropython.native
+  @staticmethod
+  def _glyphcols( aFont, aChar ) :
+    #(columns, width) of character code aChar with each column an int, top
+    # pixel in bit 0.  Compiled fonts (tftfont.Font) hand back a view of
+    # their data rather than a copy when columns are a single byte.
+    if type(aFont) is dict :
+      fontw = aFont['Width']
+      ci = (aChar - aFont['Start']) * fontw
+      return aFont["Data"][ci:ci + fontw], fontw
+    cols, fontw = aFont.glyph(aChar)
+    bpc = aFont.bpc
+    if bpc > 1 :
+      cols = [int.from_bytes(cols[i:i + bpc], 'little') for i in range(0, fontw * bpc, bpc)]
+    return cols, fontw
+
+  def _glyph( self, aFont, aChar, aColor, aBGColor, sx, sy ) :
+    '''Return character code aChar of aFont expanded to an RGB565 block
+       (row major, scaled by sx, sy), from the glyph cache when possible.'''
+    cache = self._glyphs
+    if cache :
+      key = (cache.fontkey(aFont), aChar, aColor, aBGColor, sx, sy)
+      buf = cache.get(key)
+      if buf is not None :
+        return buf
+
+    charA, fontw = TFT._glyphcols(aFont, aChar)
+    fonth = aFont['Height']
+    fg = bytes(((aColor >> 8) & 0xFF, aColor & 0xFF)) * sx
+    bg = bytes(((aBGColor >> 8) & 0xFF, aBGColor & 0xFF)) * sx
+    buf = bytearray(2 * fontw * sx * fonth * sy)
+    ln = 2 * fontw * sx
+    pos = 0
+    for r in range(fonth) :
+      row = b''.join([fg if (c >> r) & 0x01 else bg for c in charA])
+      for _ in range(sy) :
+        buf[pos:pos + ln] = row
+        pos += ln
+    if cache :
+      cache.put(key, buf)
+    return buf
 
 #   @micropython.native
   def line( self, aStart, aEnd, aColor ) :
     '''Draws a line from aStart to aEnd in the given color.  Vertical or horizontal
-       lines are forwarded to vline and hline.'''
+       lines are forwarded to vline and hline.  Other lines are walked with
+       Bresenham and each run of pixels sharing a row (or column for steep
+       lines) is sent as a single hline (vline) span.'''
+    if self._outside(min(aStart[0], aEnd[0]), min(aStart[1], aEnd[1]),
+                     max(aStart[0], aEnd[0]), max(aStart[1], aEnd[1])) :
+      return
     if aStart[0] == aEnd[0]:
       #Make sure we use the smallest y.
       pnt = aEnd if (aEnd[1] < aStart[1]) else aStart
@@ -253,52 +1043,109 @@ class TFT(object) :
 
       dx = abs(dx)
       dy = abs(dy)
+      self._begin()
       if (dx >= dy):
         dy <<= 1
         e = dy - dx
         dx <<= 1
+        rx = px                                  #Start of the current run.
         while (px != ex):
-          self.pixel((px, py), aColor)
           if (e >= 0):
+            self._hspan(rx, px, py, aColor)
             py += iny
             e -= dx
+            rx = px + inx
           e += dy
           px += inx
+        self._hspan(rx, px, py, aColor)
       else:
         dx <<= 1
         e = dx - dy
         dy <<= 1
+        ry = py
         while (py != ey):
-          self.pixel((px, py), aColor)
           if (e >= 0):
+            self._vspan(px, ry, py, aColor)
             px += inx
             e -= dy
+            ry = py + iny
           e += dx
           py += iny
+        self._vspan(px, ry, py, aColor)
+      self._end()
+
+#   @micropython.native
+  def polyline( self, aPoints, aColor, aClosed = False ) :
+    '''Draw lines joining each point in aPoints to the next.  aClosed also
+       joins the last point back to the first.'''
+    self._begin()
+    for i in range(1, len(aPoints)) :
+      self.line(aPoints[i - 1], aPoints[i], aColor)
+    if aClosed and len(aPoints) > 2 :
+      self.line(aPoints[-1], aPoints[0], aColor)
+    self._end()
+
+#   @micropython.native
+  def lines( self, aSegments, aColor ) :
+    '''Draw many lines at once.  aSegments holds (start, end) point pairs.'''
+    self._begin()
+    for s, e in aSegments :
+      self.line(s, e, aColor)
+    self._end()
+
+#   @micropython.native
+  def _hspan( self, x0, x1, y, aColor ) :
+    '''Draw the pixels from x0 to x1 (either order) on row y, clipped to the
+       clip rectangle.'''
+    cx0, cy0, cx1, cy1 = self.cliprect()
+    if not cy0 <= y <= cy1 :
+      return
+    if x1 < x0 :
+      x0, x1 = x1, x0
+    x0 = max(x0, cx0)
+    x1 = min(x1, cx1)
+    if x0 <= x1 :
+      self._begin()
+      self._setwindowloc((x0, y), (x1, y))
+      self._setColor(aColor)
+      self._draw(x1 - x0 + 1)
+      self._end()
+
+#   @micropython.native
+  def _vspan( self, x, y0, y1, aColor ) :
+    '''Draw the pixels from y0 to y1 (either order) on column x, clipped to
+       the clip rectangle.'''
+    cx0, cy0, cx1, cy1 = self.cliprect()
+    if not cx0 <= x <= cx1 :
+      return
+    if y1 < y0 :
+      y0, y1 = y1, y0
+    y0 = max(y0, cy0)
+    y1 = min(y1, cy1)
+    if y0 <= y1 :
+      self._begin()
+      self._setwindowloc((x, y0), (x, y1))
+      self._setColor(aColor)
+      self._draw(y1 - y0 + 1)
+      self._end()
 
 #   @micropython.native
   def vline( self, aStart, aLen, aColor ) :
     '''Draw a vertical line from aStart for aLen. aLen may be negative.'''
-    start = (clamp(aStart[0], 0, self._size[0]), clamp(aStart[1], 0, self._size[1]))
-    stop = (start[0], clamp(start[1] + aLen, 0, self._size[1]))
-    #Make sure smallest y 1st.
-    if (stop[1] < start[1]):
-      start, stop = stop, start
-    self._setwindowloc(start, stop)
-    self._setColor(aColor)
-    self._draw(aLen)
+    x, y = aStart
+    if aLen > 0 :
+      self._vspan(x, y, y + aLen - 1, aColor)
+    elif aLen < 0 :
+      self._vspan(x, y + aLen + 1, y, aColor)
 
 #   @micropython.native
   def hline( self, aStart, aLen, aColor ) :
     '''Draw a horizontal line from aStart for aLen. aLen may be negative.'''
-    start = (clamp(aStart[0], 0, self._size[0]), clamp(aStart[1], 0, self._size[1]))
-    stop = (clamp(start[0] + aLen, 0, self._size[0]), start[1])
-    #Make sure smallest x 1st.
-    if (stop[0] < start[0]):
-      start, stop = stop, start
-    self._setwindowloc(start, stop)
-    self._setColor(aColor)
-    self._draw(aLen)
+    x, y = aStart
+    if aLen > 0 :
+      self._hspan(x, x + aLen - 1, y, aColor)
+    elif aLen < 0 :
+      self._hspan(x + aLen + 1, x, y, aColor)
 
 #   @micropython.native
   def rect( self, aStart, aSize, aColor ) :
@@ -313,82 +1160,381 @@ class TFT(object) :
   def fillrect( self, aStart, aSize, aColor ) :
     '''Draw a filled rectangle.  aStart is the smallest coordinate corner
        and aSize is a tuple indicating width, height.'''
-    start = (clamp(aStart[0], 0, self._size[0]), clamp(aStart[1], 0, self._size[1]))
-    end = (clamp(start[0] + aSize[0] - 1, 0, self._size[0]), clamp(start[1] + aSize[1] - 1, 0, self._size[1]))
-
-    if (end[0] < start[0]):
-      tmp = end[0]
-      end = (start[0], end[1])
-      start = (tmp, start[1])
-    if (end[1] < start[1]):
-      tmp = end[1]
-      end = (end[0], start[1])
-      start = (start[0], tmp)
-
-    self._setwindowloc(start, end)
-    numPixels = (end[0] - start[0] + 1) * (end[1] - start[1] + 1)
+    area = self._cliprect(aStart, aSize)
+    if area is None :
+      return
+    x0, y0, x1, y1 = area
+    self._begin()
+    self._setwindowloc((x0, y0), (x1, y1))
     self._setColor(aColor)
-    self._draw(numPixels)
+    self._draw((x1 - x0 + 1) * (y1 - y0 + 1))
+    self._end()
 
 #   @micropython.native
   def circle( self, aPos, aRadius, aColor ) :
-    '''Draw a hollow circle with the given radius and color with aPos as center.'''
-    self.colorData[0] = aColor >> 8
-    self.colorData[1] = aColor
-    xend = int(0.7071 * aRadius) + 1
-    rsq = aRadius * aRadius
-    for x in range(xend) :
-      y = int(sqrt(rsq - x * x))
-      xp = aPos[0] + x
-      yp = aPos[1] + y
-      xn = aPos[0] - x
-      yn = aPos[1] - y
-      xyp = aPos[0] + y
-      yxp = aPos[1] + x
-      xyn = aPos[0] - y
-      yxn = aPos[1] - x
-
-      self._setwindowpoint((xp, yp))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xp, yn))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xn, yp))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xn, yn))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xyp, yxp))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xyp, yxn))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xyn, yxp))
-      self._writedata(self.colorData)
-      self._setwindowpoint((xyn, yxn))
-      self._writedata(self.colorData)
+    '''Draw a hollow circle with the given radius and color with aPos as center.
+       Integer midpoint circle, each run of the first octant is mirrored into
+       8 hline/vline spans.'''
+    cx, cy = aPos
+    if self._outside(cx - aRadius, cy - aRadius, cx + aRadius, cy + aRadius) :
+      return
+    self._begin()
+    for y, xa, xb in _circleruns(aRadius) :
+      self._hspan(cx + xa, cx + xb, cy + y, aColor)
+      self._hspan(cx - xb, cx - xa, cy + y, aColor)
+      self._hspan(cx + xa, cx + xb, cy - y, aColor)
+      self._hspan(cx - xb, cx - xa, cy - y, aColor)
+      self._vspan(cx + y, cy + xa, cy + xb, aColor)
+      self._vspan(cx + y, cy - xb, cy - xa, aColor)
+      self._vspan(cx - y, cy + xa, cy + xb, aColor)
+      self._vspan(cx - y, cy - xb, cy - xa, aColor)
+    self._end()
 
 #   @micropython.native
   def fillcircle( self, aPos, aRadius, aColor ) :
-    '''Draw a filled circle with given radius and color with aPos as center'''
-    rsq = aRadius * aRadius
-    for x in range(aRadius) :
-      y = int(sqrt(rsq - x * x))
-      y0 = aPos[1] - y
-      ey = y0 + y * 2
-      y0 = clamp(y0, 0, self._size[1])
-      ln = abs(ey - y0) + 1;
-
-      self.vline((aPos[0] + x, y0), ln, aColor)
-      self.vline((aPos[0] - x, y0), ln, aColor)
+    '''Draw a filled circle with given radius and color with aPos as center.
+       Every pixel is written once; rows of equal width are sent as one
+       rectangle.'''
+    cx, cy = aPos
+    if self._outside(cx - aRadius, cy - aRadius, cx + aRadius, cy + aRadius) :
+      return
+    hw = _halfwidths(aRadius)
+    self._begin()
+    k = len(hw) - 1
+    while k > 0 :
+      #Find the rows k0..k sharing a width.
+      w = hw[k]
+      k0 = k
+      while k0 > 1 and hw[k0 - 1] == w :
+        k0 -= 1
+      self._fillclip(cx - w, cy + k0, cx + w, cy + k, aColor)
+      self._fillclip(cx - w, cy - k, cx + w, cy - k0, aColor)
+      k = k0 - 1
+    self._hspan(cx - hw[0], cx + hw[0], cy, aColor)
+    self._end()
+
+#   @micropython.native
+  def arc( self, aPos, aRadius, aStart, aEnd, aColor ) :
+    '''Draw the part of a circle from angle aStart to aEnd in degrees.
+       0 is to the right of aPos and angles go clockwise.  Equal angles
+       draw only the circle pixel nearest aStart.  Only the two end
+       directions use floating point, the circle itself is integer.'''
+    cx, cy = aPos
+    if self._outside(cx - aRadius, cy - aRadius, cx + aRadius, cy + aRadius) :
+      return
+    sweep = aEnd - aStart
+    if sweep >= 360 or sweep <= -360 :
+      self.circle(aPos, aRadius, aColor)
+      return
+    a = radians(aStart)
+    sx = int(cos(a) * 1024)
+    sy = int(sin(a) * 1024)
+    if sweep == 0 :
+      #Just the start point.  The half planes below would also let in the
+      # point opposite it.
+      best = None
+      for y, xa, xb in _circleruns(aRadius) :
+        for mx, my, swap in _OCTANTS :
+          for x in range(xa, xb + 1) :
+            px, py = (mx * y, my * x) if swap else (mx * x, my * y)
+            #Cosine of the angle to the start direction, times 1024.
+            d = (sx * px + sy * py) / (sqrt(px * px + py * py) or 1)
+            if best is None or d > best[0] :
+              best = (d, px, py)
+      self.pixel((cx + best[1], cy + best[2]), aColor)
+      return
+    a = radians(aEnd)
+    ex = int(cos(a) * 1024)
+    ey = int(sin(a) * 1024)
+    wide = (sweep % 360) > 180
+    self._begin()
+    for y, xa, xb in _circleruns(aRadius) :
+      for mx, my, swap in _OCTANTS :
+        #Walk the run in this octant and draw the stretches inside the arc.
+        run = None
+        for x in range(xa, xb + 1) :
+          if swap :
+            px, py = mx * y, my * x
+          else:
+            px, py = mx * x, my * y
+          a = sx * py - sy * px >= 0
+          b = px * ey - py * ex >= 0
+          if (a or b) if wide else (a and b) :
+            if run is None :
+              run = (px, py)
+            last = (px, py)
+          elif run is not None :
+            self._arcspan(cx, cy, run, last, swap, aColor)
+            run = None
+        if run is not None :
+          self._arcspan(cx, cy, run, last, swap, aColor)
+    self._end()
+
+  def _arcspan( self, cx, cy, aFirst, aLast, aVertical, aColor ) :
+    if aVertical :
+      self._vspan(cx + aFirst[0], cy + aFirst[1], cy + aLast[1], aColor)
+    else:
+      self._hspan(cx + aFirst[0], cx + aLast[0], cy + aFirst[1], aColor)
+
+#   @micropython.native
+  def roundrect( self, aStart, aSize, aRadius, aColor ) :
+    '''Draw a hollow rectangle with quarter circle corners of aRadius.'''
+    r = min(aRadius, (aSize[0] - 1) // 2, (aSize[1] - 1) // 2)
+    x0, y0 = aStart
+    x1 = x0 + aSize[0] - 1
+    y1 = y0 + aSize[1] - 1
+    if self._outside(x0, y0, x1, y1) :
+      return
+    self._begin()
+    self._hspan(x0 + r, x1 - r, y0, aColor)
+    self._hspan(x0 + r, x1 - r, y1, aColor)
+    self._vspan(x0, y0 + r, y1 - r, aColor)
+    self._vspan(x1, y0 + r, y1 - r, aColor)
+    #Corner centers.
+    lx = x0 + r
+    rx = x1 - r
+    ty = y0 + r
+    by = y1 - r
+    for y, xa, xb in _circleruns(r) :
+      self._hspan(rx + xa, rx + xb, by + y, aColor)
+      self._hspan(lx - xb, lx - xa, by + y, aColor)
+      self._hspan(rx + xa, rx + xb, ty - y, aColor)
+      self._hspan(lx - xb, lx - xa, ty - y, aColor)
+      self._vspan(rx + y, by + xa, by + xb, aColor)
+      self._vspan(rx + y, ty - xb, ty - xa, aColor)
+      self._vspan(lx - y, by + xa, by + xb, aColor)
+      self._vspan(lx - y, ty - xb, ty - xa, aColor)
+    self._end()
+
+#   @micropython.native
+  def fillroundrect( self, aStart, aSize, aRadius, aColor ) :
+    '''Draw a filled rectangle with quarter circle corners of aRadius.'''
+    r = min(aRadius, (aSize[0] - 1) // 2, (aSize[1] - 1) // 2)
+    x0, y0 = aStart
+    x1 = x0 + aSize[0] - 1
+    y1 = y0 + aSize[1] - 1
+    if self._outside(x0, y0, x1, y1) :
+      return
+    hw = _halfwidths(r)
+    self._begin()
+    self._fillclip(x0, y0 + r, x1, y1 - r, aColor)
+    k = r
+    while k > 0 :
+      w = hw[k]
+      k0 = k
+      while k0 > 1 and hw[k0 - 1] == w :
+        k0 -= 1
+      self._fillclip(x0 + r - w, y1 - r + k0, x1 - r + w, y1 - r + k, aColor)
+      self._fillclip(x0 + r - w, y0 + r - k, x1 - r + w, y0 + r - k0, aColor)
+      k = k0 - 1
+    self._end()
+
+#   @micropython.native
+  def _fillclip( self, x0, y0, x1, y1, aColor ) :
+    '''Fill the inclusive rectangle x0,y0 - x1,y1, clipped by fillrect().'''
+    if x0 <= x1 and y0 <= y1 :
+      self.fillrect((x0, y0), (x1 - x0 + 1, y1 - y0 + 1), aColor)
+
+  def fillgradient( self, aStart, aSize, aColor0, aColor1, aVertical = True, aDither = False ) :
+    '''Fill a rectangle with a gradient from aColor0 to aColor1, top to
+       bottom when aVertical else left to right.  aDither breaks up the
+       RGB565 color steps with a 4x4 ordered dither.  Scanlines are worked
+       out once and streamed through one window, a run of rows with the
+       same scanline costs no more than a fillrect.'''
+    area = self._cliprect(aStart, aSize)
+    if area is None :
+      return
+    x0, y0, x1, y1 = area
+    w = x1 - x0 + 1
+    #Positions are taken from the unclipped rectangle so a clipped
+    # gradient matches the same part of the whole one.
+    sx, sy, sw, sh = _normrect(aStart, aSize)
+    den = max((sh if aVertical else sw) - 1, 1)
+    self._begin()
+    self._setwindowloc((x0, y0), (x1, y1))
+    if not aVertical :
+      #Every row is the same scanline, or one of 4 when dithered.
+      lines = []
+      for r in range(4 if aDither else 1) :
+        line = bytearray(2 * w)
+        for i in range(w) :
+          x = x0 + i
+          bias = _BAYER[((y0 + r) & 3) * 4 + (x & 3)] if aDither else 8
+          c = _blend(aColor0, aColor1, x - sx, den, bias)
+          line[i * 2] = c >> 8
+          line[i * 2 + 1] = c & 0xFF
+        lines.append(line)
+      if aDither :
+        #4 row bands repeat down the rectangle.
+        self._pushbands(lines, y1 - y0 + 1)
+      else:
+        self._pushrepeat(lines[0], y1 - y0 + 1)
+    else:
+      y = y0
+      while y <= y1 :
+        if aDither :
+          unit = bytearray(8)
+          for i in range(4) :
+            c = _blend(aColor0, aColor1, y - sy, den, _BAYER[(y & 3) * 4 + ((x0 + i) & 3)])
+            unit[i * 2] = c >> 8
+            unit[i * 2 + 1] = c & 0xFF
+          self._pushpixels((unit * (w // 4 + 1))[:2 * w])
+          y += 1
+        else:
+          #Rows sharing a color go out together.
+          c = _blend(aColor0, aColor1, y - sy, den)
+          n = 1
+          while y + n <= y1 and _blend(aColor0, aColor1, y + n - sy, den) == c :
+            n += 1
+          self._pushrepeat(bytes((c >> 8, c & 0xFF)) * w, n)
+          y += n
+    self._end()
+
+  def fillpattern( self, aStart, aSize, aTile, aTileWidth ) :
+    '''Fill a rectangle by repeating aTile, big endian RGB565 pixels
+       aTileWidth wide.  Tiles are lined up on the screen rather than the
+       rectangle so neighboring fills join up.  The scanlines of one tile
+       high band are built once and streamed through one window.'''
+    area = self._cliprect(aStart, aSize)
+    if area is None :
+      return
+    x0, y0, x1, y1 = area
+    w = x1 - x0 + 1
+    tw2 = aTileWidth * 2
+    th = len(aTile) // tw2
+    phase = (x0 % aTileWidth) * 2
+    reps = (phase + 2 * w) // tw2 + 1
+    lines = []
+    for r in range(th) :
+      row = (y0 + r) % th
+      lines.append((bytes(aTile[row * tw2:(row + 1) * tw2]) * reps)[phase:phase + 2 * w])
+    self._begin()
+    self._setwindowloc((x0, y0), (x1, y1))
+    self._pushbands(lines, y1 - y0 + 1)
+    self._end()
+
+  def filldither( self, aStart, aSize, aColor0, aColor1, aLevel ) :
+    '''Fill a rectangle with a 4x4 ordered dither of aColor1 over aColor0.
+       aLevel 0 - 16 is how many of every 16 pixels are aColor1, for
+       shades in between two colors.'''
+    tile = bytearray(32)
+    for i in range(16) :
+      c = aColor1 if _BAYER[i] < aLevel else aColor0
+      tile[i * 2] = c >> 8
+      tile[i * 2 + 1] = c & 0xFF
+    self.fillpattern(aStart, aSize, tile, 4)
+
+  def _cliprect( self, aStart, aSize ) :
+    '''Inclusive x0, y0, x1, y1 of a rectangle trimmed to the clip
+       rectangle, None when nothing is left.  A negative width or height
+       extends left or up from aStart.'''
+    x, y, w, h = _normrect(aStart, aSize)
+    cx0, cy0, cx1, cy1 = self.cliprect()
+    x0 = max(x, cx0)
+    y0 = max(y, cy0)
+    x1 = min(x + w - 1, cx1)
+    y1 = min(y + h - 1, cy1)
+    if x0 > x1 or y0 > y1 :
+      return None
+    return x0, y0, x1, y1
+
+  def _pushrepeat( self, aLine, aCount ) :
+    '''Push aLine aCount times into the current window, as many copies per
+       write as fit in FLUSHCHUNK bytes.'''
+    per = min(aCount, TFT.FLUSHCHUNK // len(aLine))
+    if per > 1 :
+      chunk = bytes(aLine) * per
+      while aCount >= per :
+        self._pushpixels(chunk)
+        aCount -= per
+      if aCount :
+        self._pushpixels(memoryview(chunk)[:aCount * len(aLine)])
+    else:
+      for _ in range(aCount) :
+        self._pushpixels(aLine)
+
+  def _pushbands( self, aLines, aRows ) :
+    '''Push aRows rows cycling through the scanlines in aLines.'''
+    if len(aLines) == 1 :
+      self._pushrepeat(aLines[0], aRows)
+      return
+    band = b''.join(aLines)
+    n = len(aLines)
+    self._pushrepeat(band, aRows // n)
+    for i in range(aRows % n) :
+      self._pushpixels(aLines[i])
 
   def fill( self, aColor = BLACK ) :
     '''Fill screen with the given color.'''
     self.fillrect((0, 0), self._size, aColor)
 
   def image( self, x0, y0, x1, y1, data ) :
-    self._setwindowloc((x0, y0), (x1, y1))
-    self._writedata(data)
+    '''Draw big endian RGB565 data filling the inclusive rectangle x0,y0 -
+       x1,y1, trimmed to the clip rectangle.'''
+    self.stream(x0, y0, x1, y1, (data,))
+
+  def stream( self, x0, y0, x1, y1, aRows ) :
+    '''Like image() but the pixel data comes from aRows, an iterable of
+       RGB565 buffers (usually one row each, see tftimage), all sent through
+       the one window.  Only the part inside the clip rectangle is sent,
+       reading stops once the last visible row is done.'''
+    if self._outside(x0, y0, x1, y1) :
+      return
+    cx0, cy0, cx1, cy1 = self.cliprect()
+    self._begin()
+    if x0 >= cx0 and y0 >= cy0 and x1 <= cx1 and y1 <= cy1 :
+      self._setwindowloc((x0, y0), (x1, y1))
+      for row in aRows :
+        self._pushpixels(row)
+    else:
+      vx0 = max(x0, cx0)
+      vy0 = max(y0, cy0)
+      vx1 = min(x1, cx1)
+      vy1 = min(y1, cy1)
+      self._setwindowloc((vx0, vy0), (vx1, vy1))
+      ln = (x1 - x0 + 1) * 2
+      #Visible bytes of each row, and of the whole data.
+      a = (vx0 - x0) * 2
+      b = (vx1 - x0 + 1) * 2
+      first = (vy0 - y0) * ln
+      end = (vy1 - y0 + 1) * ln
+      p = 0
+      for chunk in aRows :
+        mv = memoryview(chunk)
+        n = len(mv)
+        if a == 0 and b == ln :
+          #Whole rows, one slice per chunk.
+          s = max(first - p, 0)
+          e = min(end - p, n)
+          if s < e :
+            self._pushpixels(mv[s:e])
+          p += n
+        else:
+          i = 0
+          while i < n and p < end :
+            c = p % ln
+            take = min(n - i, ln - c)
+            if p >= first :
+              s = max(c, a)
+              e = min(c + take, b)
+              if s < e :
+                self._pushpixels(mv[i + s - c:i + e - c])
+            i += take
+            p += take
+        if p >= end :
+          break
+    self._end()
+
+  def blitfile( self, aPath, aX, aY, aSrc = None, aWidth = None ) :
+    '''Draw an image file straight from the filesystem, clipped to the
+       screen, using a few KB of RAM whatever its size.  See
+       tftimage.blitfile().'''
+    import tftimage
+    tftimage.blitfile(self, aPath, aX, aY, aSrc, aWidth)
 
   def setvscroll(self, tfa, bfa) :
     ''' set vertical scroll area '''
+    self._select()
     self._writecommand(TFT.VSCRDEF)
     data2 = bytearray([0, tfa])
     self._writedata(data2)
@@ -396,6 +1542,7 @@ class TFT(object) :
     self._writedata(data2)
     data2[1] = bfa
     self._writedata(data2)
+    self._deselect()
     self.tfa = tfa
     self.bfa = bfa
 
@@ -406,104 +1553,178 @@ class TFT(object) :
     self._vscrolladdr(a)
 
   def _vscrolladdr(self, addr) :
+    self._select()
     self._writecommand(TFT.VSCSAD)
     data2 = bytearray([addr >> 8, addr & 0xff])
     self._writedata(data2)
+    self._deselect()
     
 #   @micropython.native
   def _setColor( self, aColor ) :
     self.colorData[0] = aColor >> 8
-    self.colorData[1] = aColor
+    self.colorData[1] = aColor & 0xFF
     self.buf = bytes(self.colorData) * 32
 
 #   @micropython.native
   def _draw( self, aPixels ) :
     '''Send given color to the device aPixels times.'''
+    if self._target is not None :
+      self._target.fill((self.colorData[0] << 8) | self.colorData[1], aPixels)
+      return
 
-    self.dc(1)
-    self.cs(0)
+    self._begin()
+    self._setdc(1)
     for i in range(aPixels//32):
       self.spi.write(self.buf)
     rest = (int(aPixels) % 32)
     if rest > 0:
         buf2 = bytes(self.colorData) * rest
         self.spi.write(buf2)
-    self.cs(1)
+    self._end()
 
 #   @micropython.native
   def _setwindowpoint( self, aPos ) :
     '''Set a single point for drawing a color to.'''
-    x = self._offset[0] + int(aPos[0])
-    y = self._offset[1] + int(aPos[1])
-    self._writecommand(TFT.CASET)            #Column address set.
-    self.windowLocData[0] = self._offset[0]
-    self.windowLocData[1] = x
-    self.windowLocData[2] = self._offset[0]
-    self.windowLocData[3] = x
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.RASET)            #Row address set.
-    self.windowLocData[0] = self._offset[1]
-    self.windowLocData[1] = y
-    self.windowLocData[2] = self._offset[1]
-    self.windowLocData[3] = y
-    self._writedata(self.windowLocData)
-    self._writecommand(TFT.RAMWR)            #Write to RAM.
+    x = int(aPos[0])
+    y = int(aPos[1])
+    if self._target is not None :
+      self._target.window(x, y, x, y)
+      return
+    self._sendwindow(x, y, x, y)
 
 #   @micropython.native
   def _setwindowloc( self, aPos0, aPos1 ) :
     '''Set a rectangular area for drawing a color to.'''
-    self._writecommand(TFT.CASET)            #Column address set.
-    self.windowLocData[0] = self._offset[0]
-    self.windowLocData[1] = self._offset[0] + int(aPos0[0])
-    self.windowLocData[2] = self._offset[0]
-    self.windowLocData[3] = self._offset[0] + int(aPos1[0])
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.RASET)            #Row address set.
-    self.windowLocData[0] = self._offset[1]
-    self.windowLocData[1] = self._offset[1] + int(aPos0[1])
-    self.windowLocData[2] = self._offset[1]
-    self.windowLocData[3] = self._offset[1] + int(aPos1[1])
-    self._writedata(self.windowLocData)
+    if self._target is not None :
+      self._target.window(int(aPos0[0]), int(aPos0[1]), int(aPos1[0]), int(aPos1[1]))
+      return
+    self._sendwindow(int(aPos0[0]), int(aPos0[1]), int(aPos1[0]), int(aPos1[1]))
+
+#   @micropython.native
+  def _sendwindow( self, x0, y0, x1, y1 ) :
+    '''Program the display window.  Always goes to the display, even in
+       buffered mode.  Column or row ranges matching what the display
+       already holds are not sent again, RAMWR always is since it resets the
+       write position.'''
+    x0 += self._offset[0]
+    x1 += self._offset[0]
+    y0 += self._offset[1]
+    y1 += self._offset[1]
+    self._select()
+    col = (x0 << 16) | x1
+    if col != self._wincol :
+      self._wincol = col
+      self._writecommand(TFT.CASET)          #Column address set.
+      self.windowLocData[0] = x0 >> 8
+      self.windowLocData[1] = x0 & 0xFF
+      self.windowLocData[2] = x1 >> 8
+      self.windowLocData[3] = x1 & 0xFF
+      self._writedata(self.windowLocData)
+
+    row = (y0 << 16) | y1
+    if row != self._winrow :
+      self._winrow = row
+      self._writecommand(TFT.RASET)          #Row address set.
+      self.windowLocData[0] = y0 >> 8
+      self.windowLocData[1] = y0 & 0xFF
+      self.windowLocData[2] = y1 >> 8
+      self.windowLocData[3] = y1 & 0xFF
+      self._writedata(self.windowLocData)
 
     self._writecommand(TFT.RAMWR)            #Write to RAM.
+    self._deselect()
+
+  #@micropython.native
+  def _begin( self ) :
+    '''Start the transaction of a primitive, so its window commands and
+       pixel data go out without toggling CS.  Does nothing while drawing
+       goes to a buffer or display list, like _draw() and _setwindowloc().'''
+    if self._target is None :
+      self._select()
+
+  #@micropython.native
+  def _end( self ) :
+    '''End a transaction started with _begin().'''
+    if self._target is None :
+      self._deselect()
+
+  #@micropython.native
+  def _select( self ) :
+    '''Start a transaction on the bus whatever the mode, for what always goes
+       to the display (show(), commands).  CS is pulled low by the outermost
+       _select() and held there until the matching _deselect().'''
+    if not self._txn :
+      self.cs(0)
+    self._txn += 1
+
+  #@micropython.native
+  def _deselect( self ) :
+    '''End a transaction started with _select().'''
+    self._txn -= 1
+    if not self._txn :
+      self.cs(1)
+
+  #@micropython.native
+  def _setdc( self, aValue ) :
+    '''Set the DC pin, skipping the GPIO write when it is already there.'''
+    if self._dc != aValue :
+      self._dc = aValue
+      self.dc(aValue)
 
   #@micropython.native
   def _writecommand( self, aCommand ) :
     '''Write given command to the device.'''
-    self.dc(0)
-    self.cs(0)
-    self.spi.write(bytearray([aCommand]))
-    self.cs(1)
+    self._cmdData[0] = aCommand
+    self._setdc(0)
+    if self._txn :
+      self.spi.write(self._cmdData)
+    else:
+      self.cs(0)
+      self.spi.write(self._cmdData)
+      self.cs(1)
 
   #@micropython.native
   def _writedata( self, aData ) :
     '''Write given data to the device.  This may be
        either a single int or a bytearray of values.'''
-    self.dc(1)
-    self.cs(0)
-    self.spi.write(aData)
-    self.cs(1)
+    self._setdc(1)
+    if self._txn :
+      self.spi.write(aData)
+    else:
+      self.cs(0)
+      self.spi.write(aData)
+      self.cs(1)
 
   #@micropython.native
   def _pushcolor( self, aColor ) :
     '''Push given color to the device.'''
     self.colorData[0] = aColor >> 8
-    self.colorData[1] = aColor
-    self._writedata(self.colorData)
+    self.colorData[1] = aColor & 0xFF
+    self._pushpixels(self.colorData)
+
+  #@micropython.native
+  def _pushpixels( self, aData ) :
+    '''Write RGB565 pixel data into the current window.'''
+    if self._target is not None :
+      self._target.push(aData)
+    else:
+      self._writedata(aData)
 
   #@micropython.native
   def _setMADCTL( self ) :
     '''Set screen rotation and RGB/BGR format.'''
+    self._select()
     self._writecommand(TFT.MADCTL)
     rgb = TFTRGB if self._rgb else TFTBGR
     self._writedata(bytearray([TFTRotations[self.rotate] | rgb]))
+    self._deselect()
 
   #@micropython.native
   def _reset( self ) :
     '''Reset the device.'''
-    self.dc(0)
+    self._setdc(0)
+    self._wincol = -1
+    self._winrow = -1
     self.reset(1)
     time.sleep_us(500)
     self.reset(0)
@@ -511,396 +1732,62 @@ class TFT(object) :
     self.reset(1)
     time.sleep_us(500)
 
-  def initb( self ) :
+  def _runinit( self, aTable, aMaxDelay = None ) :
+    '''Send a command table from st7735init, sleeping where it says.
+       aMaxDelay caps every delay (in microseconds) for panels that are
+       happy with shorter ones.'''
+    i = 0
+    n = len(aTable)
+    mv = memoryview(aTable)
+    self._select()
+    while i < n :
+      self._writecommand(aTable[i])
+      argc = aTable[i + 1]
+      i += 2
+      count = argc & 0x7F
+      if count :
+        self._writedata(mv[i:i + count])
+        i += count
+      if argc & 0x80 :
+        delay = aTable[i]
+        i += 1
+        if delay == 255 :
+          delay = 500
+        if aMaxDelay is not None and delay > aMaxDelay :
+          delay = aMaxDelay
+        time.sleep_us(delay)
+    self._deselect()
+
+  def initb( self, aMaxDelay = None ) :
     '''Initialize blue tab version.'''
     self._size = (ScreenSize[0] + 2, ScreenSize[1] + 1)
     self._reset()
-    self._writecommand(TFT.SWRESET)              #Software reset.
-    time.sleep_us(50)
-    self._writecommand(TFT.SLPOUT)               #out of sleep mode.
-    time.sleep_us(500)
-
-    data1 = bytearray(1)
-    self._writecommand(TFT.COLMOD)               #Set color mode.
-    data1[0] = 0x05                             #16 bit color.
-    self._writedata(data1)
-    time.sleep_us(10)
-
-    data3 = bytearray([0x00, 0x06, 0x03])       #fastest refresh, 6 lines front, 3 lines back.
-    self._writecommand(TFT.FRMCTR1)              #Frame rate control.
-    self._writedata(data3)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.MADCTL)
-    data1[0] = 0x08                             #row address/col address, bottom to top refresh
-    self._writedata(data1)
+    from st7735init import INITB
+    self._runinit(INITB, aMaxDelay)
 
-    data2 = bytearray(2)
-    self._writecommand(TFT.DISSET5)              #Display settings
-    data2[0] = 0x15                             #1 clock cycle nonoverlap, 2 cycle gate rise, 3 cycle oscil, equalize
-    data2[1] = 0x02                             #fix on VTL
-    self._writedata(data2)
-
-    self._writecommand(TFT.INVCTR)               #Display inversion control
-    data1[0] = 0x00                             #Line inversion.
-    self._writedata(data1)
-
-    self._writecommand(TFT.PWCTR1)               #Power control
-    data2[0] = 0x02   #GVDD = 4.7V
-    data2[1] = 0x70   #1.0uA
-    self._writedata(data2)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.PWCTR2)               #Power control
-    data1[0] = 0x05                             #VGH = 14.7V, VGL = -7.35V
-    self._writedata(data1)
-
-    self._writecommand(TFT.PWCTR3)           #Power control
-    data2[0] = 0x01   #Opamp current small
-    data2[1] = 0x02   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.VMCTR1)               #Power control
-    data2[0] = 0x3C   #VCOMH = 4V
-    data2[1] = 0x38   #VCOML = -1.1V
-    self._writedata(data2)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.PWCTR6)               #Power control
-    data2[0] = 0x11
-    data2[1] = 0x15
-    self._writedata(data2)
-
-    #These different values don't seem to make a difference.
-#     dataGMCTRP = bytearray([0x0f, 0x1a, 0x0f, 0x18, 0x2f, 0x28, 0x20, 0x22, 0x1f,
-#                             0x1b, 0x23, 0x37, 0x00, 0x07, 0x02, 0x10])
-    dataGMCTRP = bytearray([0x02, 0x1c, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2d, 0x29,
-                            0x25, 0x2b, 0x39, 0x00, 0x01, 0x03, 0x10])
-    self._writecommand(TFT.GMCTRP1)
-    self._writedata(dataGMCTRP)
-
-#     dataGMCTRN = bytearray([0x0f, 0x1b, 0x0f, 0x17, 0x33, 0x2c, 0x29, 0x2e, 0x30,
-#                             0x30, 0x39, 0x3f, 0x00, 0x07, 0x03, 0x10])
-    dataGMCTRN = bytearray([0x03, 0x1d, 0x07, 0x06, 0x2e, 0x2c, 0x29, 0x2d, 0x2e,
-                            0x2e, 0x37, 0x3f, 0x00, 0x00, 0x02, 0x10])
-    self._writecommand(TFT.GMCTRN1)
-    self._writedata(dataGMCTRN)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.CASET)                #Column address set.
-    self.windowLocData[0] = 0x00
-    self.windowLocData[1] = 2                   #Start at column 2
-    self.windowLocData[2] = 0x00
-    self.windowLocData[3] = self._size[0] - 1
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.RASET)                #Row address set.
-    self.windowLocData[1] = 1                   #Start at row 2.
-    self.windowLocData[3] = self._size[1] - 1
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.NORON)                #Normal display on.
-    time.sleep_us(10)
-
-    self._writecommand(TFT.RAMWR)
-    time.sleep_us(500)
-
-    self._writecommand(TFT.DISPON)
-    self.cs(1)
-    time.sleep_us(500)
-
-  def initr( self ) :
+  def initr( self, aMaxDelay = None ) :
     '''Initialize a red tab version.'''
     self._reset()
+    from st7735init import INITR
+    self._runinit(INITR, aMaxDelay)
 
-    self._writecommand(TFT.SWRESET)              #Software reset.
-    time.sleep_us(150)
-    self._writecommand(TFT.SLPOUT)               #out of sleep mode.
-    time.sleep_us(500)
-
-    data3 = bytearray([0x01, 0x2C, 0x2D])       #fastest refresh, 6 lines front, 3 lines back.
-    self._writecommand(TFT.FRMCTR1)              #Frame rate control.
-    self._writedata(data3)
-
-    self._writecommand(TFT.FRMCTR2)              #Frame rate control.
-    self._writedata(data3)
-
-    data6 = bytearray([0x01, 0x2c, 0x2d, 0x01, 0x2c, 0x2d])
-    self._writecommand(TFT.FRMCTR3)              #Frame rate control.
-    self._writedata(data6)
-    time.sleep_us(10)
-
-    data1 = bytearray(1)
-    self._writecommand(TFT.INVCTR)               #Display inversion control
-    data1[0] = 0x07                             #Line inversion.
-    self._writedata(data1)
-
-    self._writecommand(TFT.PWCTR1)               #Power control
-    data3[0] = 0xA2
-    data3[1] = 0x02
-    data3[2] = 0x84
-    self._writedata(data3)
-
-    self._writecommand(TFT.PWCTR2)               #Power control
-    data1[0] = 0xC5   #VGH = 14.7V, VGL = -7.35V
-    self._writedata(data1)
-
-    data2 = bytearray(2)
-    self._writecommand(TFT.PWCTR3)               #Power control
-    data2[0] = 0x0A   #Opamp current small
-    data2[1] = 0x00   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.PWCTR4)               #Power control
-    data2[0] = 0x8A   #Opamp current small
-    data2[1] = 0x2A   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.PWCTR5)               #Power control
-    data2[0] = 0x8A   #Opamp current small
-    data2[1] = 0xEE   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.VMCTR1)               #Power control
-    data1[0] = 0x0E
-    self._writedata(data1)
-
-    self._writecommand(TFT.INVOFF)
-
-    self._writecommand(TFT.MADCTL)               #Power control
-    data1[0] = 0xC8
-    self._writedata(data1)
-
-    self._writecommand(TFT.COLMOD)
-    data1[0] = 0x05
-    self._writedata(data1)
-
-    self._writecommand(TFT.CASET)                #Column address set.
-    self.windowLocData[0] = 0x00
-    self.windowLocData[1] = 0x00
-    self.windowLocData[2] = 0x00
-    self.windowLocData[3] = self._size[0] - 1
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.RASET)                #Row address set.
-    self.windowLocData[3] = self._size[1] - 1
-    self._writedata(self.windowLocData)
-
-    dataGMCTRP = bytearray([0x0f, 0x1a, 0x0f, 0x18, 0x2f, 0x28, 0x20, 0x22, 0x1f,
-                            0x1b, 0x23, 0x37, 0x00, 0x07, 0x02, 0x10])
-    self._writecommand(TFT.GMCTRP1)
-    self._writedata(dataGMCTRP)
-
-    dataGMCTRN = bytearray([0x0f, 0x1b, 0x0f, 0x17, 0x33, 0x2c, 0x29, 0x2e, 0x30,
-                            0x30, 0x39, 0x3f, 0x00, 0x07, 0x03, 0x10])
-    self._writecommand(TFT.GMCTRN1)
-    self._writedata(dataGMCTRN)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.DISPON)
-    time.sleep_us(100)
-
-    self._writecommand(TFT.NORON)                #Normal display on.
-    time.sleep_us(10)
-
-    self.cs(1)
-    
-  def initb2( self ) :
+  def initb2( self, aMaxDelay = None ) :
     '''Initialize another blue tab version.'''
     self._size = (ScreenSize[0] + 2, ScreenSize[1] + 1)
     self._offset[0] = 2
     self._offset[1] = 1
     self._reset()
-    self._writecommand(TFT.SWRESET)              #Software reset.
-    time.sleep_us(50)
-    self._writecommand(TFT.SLPOUT)               #out of sleep mode.
-    time.sleep_us(500)
-
-    data3 = bytearray([0x01, 0x2C, 0x2D])        #
-    self._writecommand(TFT.FRMCTR1)              #Frame rate control.
-    self._writedata(data3)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.FRMCTR2)              #Frame rate control.
-    self._writedata(data3)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.FRMCTR3)              #Frame rate control.
-    self._writedata(data3)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.INVCTR)               #Display inversion control
-    data1 = bytearray(1)                         #
-    data1[0] = 0x07
-    self._writedata(data1)
-
-    self._writecommand(TFT.PWCTR1)               #Power control
-    data3[0] = 0xA2   #
-    data3[1] = 0x02   #
-    data3[2] = 0x84   #
-    self._writedata(data3)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.PWCTR2)               #Power control
-    data1[0] = 0xC5                              #
-    self._writedata(data1)
-
-    self._writecommand(TFT.PWCTR3)           #Power control
-    data2 = bytearray(2)
-    data2[0] = 0x0A   #
-    data2[1] = 0x00   #
-    self._writedata(data2)
-
-    self._writecommand(TFT.PWCTR4)           #Power control
-    data2[0] = 0x8A   #
-    data2[1] = 0x2A   #
-    self._writedata(data2)
-
-    self._writecommand(TFT.PWCTR5)           #Power control
-    data2[0] = 0x8A   #
-    data2[1] = 0xEE   #
-    self._writedata(data2)
-
-    self._writecommand(TFT.VMCTR1)               #Power control
-    data1[0] = 0x0E   #
-    self._writedata(data1)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.MADCTL)
-    data1[0] = 0xC8                             #row address/col address, bottom to top refresh
-    self._writedata(data1)
-
-#These different values don't seem to make a difference.
-#     dataGMCTRP = bytearray([0x0f, 0x1a, 0x0f, 0x18, 0x2f, 0x28, 0x20, 0x22, 0x1f,
-#                             0x1b, 0x23, 0x37, 0x00, 0x07, 0x02, 0x10])
-    dataGMCTRP = bytearray([0x02, 0x1c, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2d, 0x29,
-                            0x25, 0x2b, 0x39, 0x00, 0x01, 0x03, 0x10])
-    self._writecommand(TFT.GMCTRP1)
-    self._writedata(dataGMCTRP)
-
-#     dataGMCTRN = bytearray([0x0f, 0x1b, 0x0f, 0x17, 0x33, 0x2c, 0x29, 0x2e, 0x30,
-#                             0x30, 0x39, 0x3f, 0x00, 0x07, 0x03, 0x10])
-    dataGMCTRN = bytearray([0x03, 0x1d, 0x07, 0x06, 0x2e, 0x2c, 0x29, 0x2d, 0x2e,
-                            0x2e, 0x37, 0x3f, 0x00, 0x00, 0x02, 0x10])
-    self._writecommand(TFT.GMCTRN1)
-    self._writedata(dataGMCTRN)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.CASET)                #Column address set.
-    self.windowLocData[0] = 0x00
-    self.windowLocData[1] = 0x02                   #Start at column 2
-    self.windowLocData[2] = 0x00
-    self.windowLocData[3] = self._size[0] - 1
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.RASET)                #Row address set.
-    self.windowLocData[1] = 0x01                   #Start at row 2.
-    self.windowLocData[3] = self._size[1] - 1
-    self._writedata(self.windowLocData)
-
-    data1 = bytearray(1)
-    self._writecommand(TFT.COLMOD)               #Set color mode.
-    data1[0] = 0x05                             #16 bit color.
-    self._writedata(data1)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.NORON)                #Normal display on.
-    time.sleep_us(10)
-
-    self._writecommand(TFT.RAMWR)
-    time.sleep_us(500)
-
-    self._writecommand(TFT.DISPON)
-    self.cs(1)
-    time.sleep_us(500)
+    from st7735init import INITB2
+    self._runinit(INITB2, aMaxDelay)
 
   #@micropython.native
-  def initg( self ) :
+  def initg( self, aMaxDelay = None ) :
     '''Initialize a green tab version.'''
     self._reset()
-
-    self._writecommand(TFT.SWRESET)              #Software reset.
-    time.sleep_us(150)
-    self._writecommand(TFT.SLPOUT)               #out of sleep mode.
-    time.sleep_us(255)
-
-    data3 = bytearray([0x01, 0x2C, 0x2D])       #fastest refresh, 6 lines front, 3 lines back.
-    self._writecommand(TFT.FRMCTR1)              #Frame rate control.
-    self._writedata(data3)
-
-    self._writecommand(TFT.FRMCTR2)              #Frame rate control.
-    self._writedata(data3)
-
-    data6 = bytearray([0x01, 0x2c, 0x2d, 0x01, 0x2c, 0x2d])
-    self._writecommand(TFT.FRMCTR3)              #Frame rate control.
-    self._writedata(data6)
-    time.sleep_us(10)
-
-    self._writecommand(TFT.INVCTR)               #Display inversion control
-    self._writedata(bytearray([0x07]))
-    self._writecommand(TFT.PWCTR1)               #Power control
-    data3[0] = 0xA2
-    data3[1] = 0x02
-    data3[2] = 0x84
-    self._writedata(data3)
-
-    self._writecommand(TFT.PWCTR2)               #Power control
-    self._writedata(bytearray([0xC5]))
-
-    data2 = bytearray(2)
-    self._writecommand(TFT.PWCTR3)               #Power control
-    data2[0] = 0x0A   #Opamp current small
-    data2[1] = 0x00   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.PWCTR4)               #Power control
-    data2[0] = 0x8A   #Opamp current small
-    data2[1] = 0x2A   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.PWCTR5)               #Power control
-    data2[0] = 0x8A   #Opamp current small
-    data2[1] = 0xEE   #Boost frequency
-    self._writedata(data2)
-
-    self._writecommand(TFT.VMCTR1)               #Power control
-    self._writedata(bytearray([0x0E]))
-
-    self._writecommand(TFT.INVOFF)
-
+    from st7735init import INITG1, INITG2
+    self._runinit(INITG1, aMaxDelay)
     self._setMADCTL()
-
-    self._writecommand(TFT.COLMOD)
-    self._writedata(bytearray([0x05]))
-
-    self._writecommand(TFT.CASET)                #Column address set.
-    self.windowLocData[0] = 0x00
-    self.windowLocData[1] = 0x01                #Start at row/column 1.
-    self.windowLocData[2] = 0x00
-    self.windowLocData[3] = self._size[0] - 1
-    self._writedata(self.windowLocData)
-
-    self._writecommand(TFT.RASET)                #Row address set.
-    self.windowLocData[3] = self._size[1] - 1
-    self._writedata(self.windowLocData)
-
-    dataGMCTRP = bytearray([0x02, 0x1c, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2d, 0x29,
-                            0x25, 0x2b, 0x39, 0x00, 0x01, 0x03, 0x10])
-    self._writecommand(TFT.GMCTRP1)
-    self._writedata(dataGMCTRP)
-
-    dataGMCTRN = bytearray([0x03, 0x1d, 0x07, 0x06, 0x2e, 0x2c, 0x29, 0x2d, 0x2e,
-                            0x2e, 0x37, 0x3f, 0x00, 0x00, 0x02, 0x10])
-    self._writecommand(TFT.GMCTRN1)
-    self._writedata(dataGMCTRN)
-
-    self._writecommand(TFT.NORON)                #Normal display on.
-    time.sleep_us(10)
-
-    self._writecommand(TFT.DISPON)
-    time.sleep_us(100)
-
-    self.cs(1)
+    self._runinit(INITG2, aMaxDelay)
 
 def maker(  ) :
   t = TFT(1, "X1", "X2")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+#Host side generator turning a BDF bitmap font into a compiled font module
+# for tftfont.py.  Runs on the PC, not on the board.
+#
+#  python3 bdf2font.py 6x10.bdf font6x10.py
+#  python3 bdf2font.py --proportional --first 48 --last 58 helvR12.bdf digits.py
+#
+#Freeze the resulting module into the firmware (or cross compile it with
+# mpy-cross) so the font data is used straight from flash.
+
+import argparse
+import sys
+
+import tftfont
+
+def _readbdf( aPath ) :
+  #Return (height, ascent, {code: (dwidth, bbw, bbh, bbx, bby, rows)}).
+  glyphs = {}
+  fbh = fby = 0
+  with open(aPath) as f :
+    lines = iter(f.read().splitlines())
+  for ln in lines :
+    parts = ln.split()
+    if not parts :
+      continue
+    if parts[0] == 'FONTBOUNDINGBOX' :
+      fbh = int(parts[2])
+      fby = int(parts[4])
+    elif parts[0] == 'STARTCHAR' :
+      code = -1
+      dwidth = 0
+      bbx = (0, 0, 0, 0)
+      for ln in lines :
+        parts = ln.split()
+        if not parts :
+          continue
+        if parts[0] == 'ENCODING' :
+          code = int(parts[1])
+        elif parts[0] == 'DWIDTH' :
+          dwidth = int(parts[1])
+        elif parts[0] == 'BBX' :
+          bbx = tuple(int(v) for v in parts[1:5])
+        elif parts[0] == 'BITMAP' :
+          rows = []
+          for ln in lines :
+            if ln.strip() == 'ENDCHAR' :
+              break
+            rows.append(int(ln, 16) if ln.strip() else 0)
+          if code >= 0 :
+            glyphs[code] = (dwidth,) + bbx + (rows,)
+          break
+  return fbh, fbh + fby, glyphs
+
+def _columns( aGlyph, aHeight, aAscent, aWidth ) :
+  #Column bitmasks, top pixel in bit 0, with the glyph placed on the
+  # baseline inside an aWidth x aHeight cell.
+  _, bbw, bbh, bbx, bby, rows = aGlyph
+  cols = [0] * aWidth
+  rowbits = (bbw + 7) // 8 * 8
+  top = aAscent - bby - bbh
+  for r, bits in enumerate(rows) :
+    y = top + r
+    if not 0 <= y < aHeight :
+      continue
+    for c in range(bbw) :
+      x = bbx + c
+      if 0 <= x < aWidth and (bits >> (rowbits - 1 - c)) & 1 :
+        cols[x] |= 1 << y
+  return cols
+
+def convert( aPath, aFirst = 32, aLast = 126, aProportional = False ) :
+  '''Return a compiled font blob for characters aFirst to aLast of a BDF
+     font.  Characters missing from the font are left blank.'''
+  height, ascent, glyphs = _readbdf(aPath)
+  if not aProportional :
+    width = max(g[0] for c, g in glyphs.items() if aFirst <= c <= aLast)
+  out = []
+  for code in range(aFirst, aLast + 1) :
+    g = glyphs.get(code)
+    w = (g[0] if g else 0) if aProportional else width
+    out.append(_columns(g, height, ascent, w) if g else [0] * w)
+  return tftfont.build(aFirst, aLast, height, out, aProportional)
+
+def main( aArgs = None ) :
+  ap = argparse.ArgumentParser(description = 'Convert a BDF font to a compiled font module for tftfont.py')
+  ap.add_argument('input')
+  ap.add_argument('output')
+  ap.add_argument('--first', type = int, default = 32, help = 'first character code (default 32)')
+  ap.add_argument('--last', type = int, default = 126, help = 'last character code (default 126)')
+  ap.add_argument('--proportional', action = 'store_true', help = 'keep each glyph\'s own width')
+  a = ap.parse_args(aArgs)
+  data = convert(a.input, a.first, a.last, a.proportional)
+  with open(a.output, 'w') as f :
+    f.write('#Generated by bdf2font.py from %s\n' % a.input)
+    f.write('import tftfont\n\n')
+    f.write('FONT = tftfont.Font(%r)\n' % data)
+  print('%s: %d bytes' % (a.output, len(data)))
+
+if __name__ == '__main__' :
+  sys.exit(main())
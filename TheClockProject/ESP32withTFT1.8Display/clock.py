@@ -1,13 +1,26 @@
 import machine
 import time
 
+# --- CONFIG ---
+TICK_SLACK_MS = 2       # Wake this long after the second changes
+
 # --- HARDWARE CONFIG ---
 SCK, MOSI, A0, RST, CS = 4, 5, 0, 1, 7
 spi = machine.SPI(1, baudrate=20000000, polarity=0, phase=0, sck=machine.Pin(SCK), mosi=machine.Pin(MOSI))
 a0, rst, cs = machine.Pin(A0, machine.Pin.OUT), machine.Pin(RST, machine.Pin.OUT), machine.Pin(CS, machine.Pin.OUT)
 
+FONT = {
+    '0': [0x3E, 0x51, 0x49, 0x45, 0x3E], '1': [0x00, 0x42, 0x7F, 0x40, 0x00],
+    '2': [0x42, 0x61, 0x51, 0x49, 0x46], '3': [0x21, 0x41, 0x45, 0x4B, 0x31],
+    '4': [0x18, 0x14, 0x12, 0x7F, 0x10], '5': [0x27, 0x45, 0x45, 0x45, 0x39],
+    '6': [0x3C, 0x4A, 0x49, 0x49, 0x30], '7': [0x01, 0x71, 0x09, 0x05, 0x03],
+    '8': [0x36, 0x49, 0x49, 0x49, 0x36], '9': [0x06, 0x49, 0x49, 0x29, 0x1E],
+    ':': [0x00, 0x36, 0x36, 0x00, 0x00], ' ': [0x00, 0x00, 0x00, 0x00, 0x00]
+}
+
 class CleanDisplay:
     def __init__(self):
+        self.atlas, self.scratch = {}, {}
         self.reset()
         self.init_tft()
         
@@ -46,45 +59,81 @@ class CleanDisplay:
         chunk = bytearray([color >> 8, color & 0xFF] * w)
         for _ in range(h): self.write_data(chunk)
 
-    def draw_char(self, x, y, char, color, size=2):
-        font = {
-            '0': [0x3E, 0x51, 0x49, 0x45, 0x3E], '1': [0x00, 0x42, 0x7F, 0x40, 0x00],
-            '2': [0x42, 0x61, 0x51, 0x49, 0x46], '3': [0x21, 0x41, 0x45, 0x4B, 0x31],
-            '4': [0x18, 0x14, 0x12, 0x7F, 0x10], '5': [0x27, 0x45, 0x45, 0x45, 0x39],
-            '6': [0x3C, 0x4A, 0x49, 0x49, 0x30], '7': [0x01, 0x71, 0x09, 0x05, 0x03],
-            '8': [0x36, 0x49, 0x49, 0x49, 0x36], '9': [0x06, 0x49, 0x49, 0x29, 0x1E],
-            ':': [0x00, 0x36, 0x36, 0x00, 0x00], ' ': [0x00, 0x00, 0x00, 0x00, 0x00]
-        }
-        bitmap = font.get(char, font[' '])
-        for col in range(5):
-            line = bitmap[col]
-            for row in range(8):
-                if (line >> row) & 1:
-                    self.fill_rect(x + col*size, y + row*size, size, size, color)
+    def build_atlas(self, chars, color, size, bg=0x0000):
+        # Pre-render chars once so drawing them is a single block write
+        for c in chars:
+            buf = bytearray(96 * size * size)
+            self.render(c, color, size, bg, buf)
+            self.atlas[(c, color, size, bg)] = buf
+    def render(self, char, color, size, bg, buf):
+        # Expand a glyph into an opaque (6*size)x(8*size) RGB565 block, the
+        # 6th column being the gap between characters
+        bitmap = FONT.get(char, FONT[' '])
+        fh, fl, bh, bl = color >> 8, color & 0xFF, bg >> 8, bg & 0xFF
+        ln = 12 * size
+        i = 0
+        for row in range(8):
+            start = i
+            for col in range(6):
+                on = col < 5 and (bitmap[col] >> row) & 1
+                hi, lo = (fh, fl) if on else (bh, bl)
+                for _ in range(size):
+                    buf[i] = hi; buf[i + 1] = lo; i += 2
+            for _ in range(size - 1):
+                buf[i:i + ln] = buf[start:start + ln]; i += ln
+    def draw_char(self, x, y, char, color, size=2, bg=0x0000):
+        # Opaque: the glyph comes with its background, so no clear is needed
+        if x < 0 or y < 0 or x + 6 * size > 160 or y + 8 * size > 128: return
+        buf = self.atlas.get((char, color, size, bg))
+        if buf is None:
+            buf = self.scratch.get(size)
+            if buf is None: buf = self.scratch[size] = bytearray(96 * size * size)
+            self.render(char, color, size, bg, buf)
+        self.set_window(x, y, x + 6 * size - 1, y + 8 * size - 1)
+        self.write_data(buf)
 
 # --- RUN LOOP ---
 tft = CleanDisplay()
 tft.fill_rect(0, 0, 160, 128, 0x0000) # Should be Deep Black now
 
+class Field:
+    # A row of character cells that remembers what it shows, so drawing a
+    # new string only redraws the cells whose character changed.
+    def __init__(self, x, y, color, size=2, pitch=14):
+        self.x, self.y, self.color, self.size, self.pitch = x, y, color, size, pitch
+        self.shown = ""
+    def draw(self, text):
+        w, h = 6 * self.size, 8 * self.size
+        for i, c in enumerate(text):
+            if i < len(self.shown) and self.shown[i] == c: continue
+            x = self.x + i * self.pitch
+            tft.draw_char(x, self.y, c, self.color, size=self.size)
+        for i in range(len(text), len(self.shown)):
+            tft.fill_rect(self.x + i * self.pitch, self.y, w, h, 0x0000)
+        self.shown = text
+
+def wait_next_second():
+    # Sleep until just past the next RTC second instead of polling, so the
+    # seconds digit changes on the edge with one wakeup per second.
+    # time.time_ns() carries the RTC's sub-second part.
+    time.sleep_ms(1000 - time.time_ns() // 1000000 % 1000 + TICK_SLACK_MS)
+
 def run():
     print("UI Flipped: White text on Black background.")
+    # White digits on black, only the ones that changed are redrawn
+    tft.build_atlas("0123456789:", 0xFFFF, 2)
+    clock = Field(30, 55, 0xFFFF)
     last_sec = -1
     
     while True:
         lt = time.localtime()
         if lt[5] != last_sec:
-            time_str = "{:02d}:{:02d}:{:02d}".format(lt[3], lt[4], lt[5])
-            
-            curr_x = 30 
-            for char in time_str:
-                # Clear with 0x0000 (Black)
-                tft.fill_rect(curr_x, 55, 12, 16, 0x0000)
-                # Draw with 0xFFFF (White)
-                tft.draw_char(curr_x, 55, char, 0xFFFF, size=2)
-                curr_x += 14 
-            
+            clock.draw("{:02d}:{:02d}:{:02d}".format(lt[3], lt[4], lt[5]))
             last_sec = lt[5]
-        time.sleep(0.1)
+            wait_next_second()
+        else:
+            # Woke just before the RTC ticked over
+            time.sleep_ms(TICK_SLACK_MS)
 
 try:
     run()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+#Host side converter from PNG/PPM/PGM to the TI image format read by
+# tftimage.py.  Runs on the PC, not on the board.
+#
+#  python3 img2tft.py splash.png splash.tfi
+#  python3 img2tft.py --kind rle photo.ppm photo.tfi
+#
+#PPM/PGM and 8 bit (or paletted) non interlaced PNG are read without any
+# extra packages, anything else needs Pillow.
+
+import argparse
+import struct
+import sys
+import zlib
+
+import tftimage
+
+def _rgb565( r, g, b ) :
+  return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+def _readppm( aData ) :
+  #Binary P5 (gray) and P6 (rgb) with maxval 255.
+  fields = []
+  pos = 2
+  while len(fields) < 3 :
+    while aData[pos:pos + 1].isspace() :
+      pos += 1
+    if aData[pos:pos + 1] == b'#' :
+      pos = aData.index(b'\n', pos)
+      continue
+    end = pos
+    while not aData[end:end + 1].isspace() :
+      end += 1
+    fields.append(int(aData[pos:end]))
+    pos = end
+  pos += 1
+  w, h, maxval = fields
+  if maxval != 255 :
+    raise ValueError('only 8 bit PPM/PGM is supported')
+  chans = 3 if aData[:2] == b'P6' else 1
+  px = aData[pos:pos + w * h * chans]
+  if chans == 1 :
+    return w, h, [(v, v, v) for v in px]
+  return w, h, [tuple(px[i:i + 3]) for i in range(0, len(px), 3)]
+
+def _unfilter( aRaw, w, h, bpp, aRowBytes ) :
+  out = bytearray()
+  prev = bytearray(aRowBytes)
+  pos = 0
+  for _ in range(h) :
+    ft = aRaw[pos]
+    row = bytearray(aRaw[pos + 1:pos + 1 + aRowBytes])
+    pos += 1 + aRowBytes
+    for i in range(aRowBytes) :
+      a = row[i - bpp] if i >= bpp else 0
+      b = prev[i]
+      c = prev[i - bpp] if i >= bpp else 0
+      if ft == 1 :
+        row[i] = (row[i] + a) & 0xFF
+      elif ft == 2 :
+        row[i] = (row[i] + b) & 0xFF
+      elif ft == 3 :
+        row[i] = (row[i] + ((a + b) >> 1)) & 0xFF
+      elif ft == 4 :
+        p = a + b - c
+        pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+        pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+        row[i] = (row[i] + pred) & 0xFF
+    out += row
+    prev = row
+  return out
+
+def _readpng( aData, aBackground ) :
+  pos = 8
+  idat = b''
+  plte = None
+  trns = None
+  while pos < len(aData) :
+    ln, kind = struct.unpack('>I4s', aData[pos:pos + 8])
+    body = aData[pos + 8:pos + 8 + ln]
+    pos += 12 + ln
+    if kind == b'IHDR' :
+      w, h, depth, ctype, _, _, interlace = struct.unpack('>IIBBBBB', body)
+    elif kind == b'PLTE' :
+      plte = [tuple(body[i:i + 3]) for i in range(0, len(body), 3)]
+    elif kind == b'tRNS' :
+      trns = body
+    elif kind == b'IDAT' :
+      idat += body
+    elif kind == b'IEND' :
+      break
+  if interlace :
+    raise ValueError('interlaced PNG needs Pillow')
+  chans = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[ctype]
+  if depth != 8 and ctype != 3 :
+    raise ValueError('only 8 bit PNG is supported without Pillow')
+  rowbytes = (w * chans * depth + 7) // 8
+  raw = _unfilter(zlib.decompress(idat), w, h, max(1, chans * depth // 8), rowbytes)
+  px = []
+  br, bg, bb = aBackground
+  for y in range(h) :
+    row = raw[y * rowbytes:(y + 1) * rowbytes]
+    for x in range(w) :
+      if ctype == 3 :
+        per = 8 // depth
+        idx = (row[x // per] >> (8 - depth * (x % per + 1))) & ((1 << depth) - 1)
+        r, g, b = plte[idx]
+        a = trns[idx] if trns and idx < len(trns) else 255
+      else:
+        v = row[x * chans:(x + 1) * chans]
+        if chans < 3 :
+          r = g = b = v[0]
+        else:
+          r, g, b = v[0], v[1], v[2]
+        a = v[-1] if chans in (2, 4) else 255
+      if a != 255 :
+        r = (r * a + br * (255 - a)) // 255
+        g = (g * a + bg * (255 - a)) // 255
+        b = (b * a + bb * (255 - a)) // 255
+      px.append((r, g, b))
+  return w, h, px
+
+def load( aPath, aBackground = (0, 0, 0) ) :
+  '''Return (width, height, [(r, g, b), ...]) for an image file.'''
+  with open(aPath, 'rb') as f :
+    data = f.read()
+  try:
+    if data[:2] in (b'P5', b'P6') :
+      return _readppm(data)
+    if data[:8] == b'\x89PNG\r\n\x1a\n' :
+      return _readpng(data, aBackground)
+  except ValueError :
+    pass
+  from PIL import Image
+  img = Image.open(aPath).convert('RGBA')
+  bgimg = Image.new('RGBA', img.size, aBackground + (255,))
+  img = Image.alpha_composite(bgimg, img).convert('RGB')
+  return img.size[0], img.size[1], list(img.getdata())
+
+def _runs( aValues ) :
+  #(count, value) runs of at most 255.
+  out = []
+  for v in aValues :
+    if out and out[-1][1] == v and out[-1][0] < 255 :
+      out[-1][0] += 1
+    else:
+      out.append([1, v])
+  return out
+
+def encode( w, h, aPixels, aKind = None, aBGR = False ) :
+  '''Encode RGB pixels.  aKind is one of the tftimage kinds or None to pick
+     the smallest that fits.'''
+  if aBGR :
+    colors = [_rgb565(b, g, r) for r, g, b in aPixels]
+  else:
+    colors = [_rgb565(r, g, b) for r, g, b in aPixels]
+  pal = sorted(set(colors))
+  candidates = {}
+  if len(pal) <= 256 :
+    lookup = {c: i for i, c in enumerate(pal)}
+    idx = [lookup[c] for c in colors]
+    bpp = next(b for b in (1, 2, 4, 8) if len(pal) <= 1 << b)
+    palbytes = b''.join(struct.pack('>H', c) for c in pal)
+    packed = bytearray()
+    for y in range(h) :
+      acc = 0
+      bits = 0
+      for v in idx[y * w:(y + 1) * w] :
+        acc = (acc << bpp) | v
+        bits += bpp
+        if bits == 8 :
+          packed.append(acc)
+          acc = bits = 0
+      if bits :
+        packed.append(acc << (8 - bits))
+    candidates[tftimage.PAL] = (bpp, pal, palbytes + bytes(packed))
+    rle = bytearray()
+    for n, v in _runs(idx) :
+      rle += bytes((n, v))
+    candidates[tftimage.PALRLE] = (8, pal, palbytes + bytes(rle))
+  raw = b''.join(struct.pack('>H', c) for c in colors)
+  candidates[tftimage.RAW] = (16, [], raw)
+  rle = bytearray()
+  for n, v in _runs(colors) :
+    rle += struct.pack('>BH', n, v)
+  candidates[tftimage.RLE] = (16, [], bytes(rle))
+  if aKind is None :
+    aKind = min(candidates, key = lambda k: len(candidates[k][2]))
+  elif aKind not in candidates :
+    raise ValueError('too many colors (%d) for a palette image' % len(pal))
+  bpp, pal, body = candidates[aKind]
+  return tftimage.MAGIC + struct.pack('<BBHHH', aKind, bpp, w, h, len(pal)) + body
+
+def main( aArgs = None ) :
+  kinds = {'raw': tftimage.RAW, 'pal': tftimage.PAL, 'palrle': tftimage.PALRLE, 'rle': tftimage.RLE}
+  ap = argparse.ArgumentParser(description = 'Convert an image to the TI format for tftimage.py')
+  ap.add_argument('input')
+  ap.add_argument('output')
+  ap.add_argument('--kind', choices = sorted(kinds), help = 'force an encoding (default: smallest)')
+  ap.add_argument('--bgr', action = 'store_true', help = 'swap red and blue for panels in BGR mode')
+  ap.add_argument('--background', default = '000000', help = 'hex RGB that transparency is blended onto')
+  a = ap.parse_args(aArgs)
+  bgc = int(a.background, 16)
+  w, h, px = load(a.input, ((bgc >> 16) & 0xFF, (bgc >> 8) & 0xFF, bgc & 0xFF))
+  data = encode(w, h, px, kinds.get(a.kind), a.bgr)
+  with open(a.output, 'wb') as f :
+    f.write(data)
+  names = {v: k for k, v in kinds.items()}
+  print('%s: %dx%d %s, %d bytes (raw %d)' % (a.output, w, h, names[data[2]], len(data), w * h * 2))
+
+if __name__ == '__main__' :
+  sys.exit(main())
@@ -0,0 +1,121 @@
+#Panel init sequences for ST7735.TFT.initb/initr/initb2/initg, kept out of
+# the driver module so they are only loaded when a panel is initialized.
+#
+#Each table is a run of commands:
+# command byte
+# argument count, ORed with DELAY when a delay follows the arguments
+# the arguments
+# delay in microseconds if DELAY is set, 255 meaning 500
+#
+#The CASET/RASET windows are for the screen size each init selects (130x161
+# for the blue tabs, 128x160 otherwise).  initg sets MADCTL from the
+# driver's rotation between INITG1 and INITG2.
+
+DELAY = 0x80
+
+INITB = bytes((
+  0x01, DELAY, 50,                                                  #SWRESET
+  0x11, DELAY, 255,                                                 #SLPOUT
+  0x3A, DELAY | 1, 0x05, 10,                                        #COLMOD
+  0xB1, DELAY | 3, 0x00, 0x06, 0x03, 10,                            #FRMCTR1
+  0x36, 1, 0x08,                                                    #MADCTL
+  0xB6, 2, 0x15, 0x02,                                              #DISSET5
+  0xB4, 1, 0x00,                                                    #INVCTR
+  0xC0, DELAY | 2, 0x02, 0x70, 10,                                  #PWCTR1
+  0xC1, 1, 0x05,                                                    #PWCTR2
+  0xC2, 2, 0x01, 0x02,                                              #PWCTR3
+  0xC5, DELAY | 2, 0x3C, 0x38, 10,                                  #VMCTR1
+  0xFC, 2, 0x11, 0x15,                                              #PWCTR6
+  0xE0, 16, 0x02, 0x1C, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2D,         #GMCTRP1
+    0x29, 0x25, 0x2B, 0x39, 0x00, 0x01, 0x03, 0x10,
+  0xE1, DELAY | 16, 0x03, 0x1D, 0x07, 0x06, 0x2E, 0x2C, 0x29, 0x2D, #GMCTRN1
+    0x2E, 0x2E, 0x37, 0x3F, 0x00, 0x00, 0x02, 0x10,
+    10,
+  0x2A, 4, 0x00, 0x02, 0x00, 0x81,                                  #CASET
+  0x2B, 4, 0x00, 0x01, 0x00, 0xA0,                                  #RASET
+  0x13, DELAY, 10,                                                  #NORON
+  0x2C, DELAY, 255,                                                 #RAMWR
+  0x29, DELAY, 255,                                                 #DISPON
+))
+
+INITR = bytes((
+  0x01, DELAY, 150,                                                 #SWRESET
+  0x11, DELAY, 255,                                                 #SLPOUT
+  0xB1, 3, 0x01, 0x2C, 0x2D,                                        #FRMCTR1
+  0xB2, 3, 0x01, 0x2C, 0x2D,                                        #FRMCTR2
+  0xB3, DELAY | 6, 0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D, 10,          #FRMCTR3
+  0xB4, 1, 0x07,                                                    #INVCTR
+  0xC0, 3, 0xA2, 0x02, 0x84,                                        #PWCTR1
+  0xC1, 1, 0xC5,                                                    #PWCTR2
+  0xC2, 2, 0x0A, 0x00,                                              #PWCTR3
+  0xC3, 2, 0x8A, 0x2A,                                              #PWCTR4
+  0xC4, 2, 0x8A, 0xEE,                                              #PWCTR5
+  0xC5, 1, 0x0E,                                                    #VMCTR1
+  0x20, 0,                                                          #INVOFF
+  0x36, 1, 0xC8,                                                    #MADCTL
+  0x3A, 1, 0x05,                                                    #COLMOD
+  0x2A, 4, 0x00, 0x00, 0x00, 0x7F,                                  #CASET
+  0x2B, 4, 0x00, 0x00, 0x00, 0x9F,                                  #RASET
+  0xE0, 16, 0x0F, 0x1A, 0x0F, 0x18, 0x2F, 0x28, 0x20, 0x22,         #GMCTRP1
+    0x1F, 0x1B, 0x23, 0x37, 0x00, 0x07, 0x02, 0x10,
+  0xE1, DELAY | 16, 0x0F, 0x1B, 0x0F, 0x17, 0x33, 0x2C, 0x29, 0x2E, #GMCTRN1
+    0x30, 0x30, 0x39, 0x3F, 0x00, 0x07, 0x03, 0x10,
+    10,
+  0x29, DELAY, 100,                                                 #DISPON
+  0x13, DELAY, 10,                                                  #NORON
+))
+
+INITB2 = bytes((
+  0x01, DELAY, 50,                                                  #SWRESET
+  0x11, DELAY, 255,                                                 #SLPOUT
+  0xB1, DELAY | 3, 0x01, 0x2C, 0x2D, 10,                            #FRMCTR1
+  0xB2, DELAY | 3, 0x01, 0x2C, 0x2D, 10,                            #FRMCTR2
+  0xB3, DELAY | 3, 0x01, 0x2C, 0x2D, 10,                            #FRMCTR3
+  0xB4, 1, 0x07,                                                    #INVCTR
+  0xC0, DELAY | 3, 0xA2, 0x02, 0x84, 10,                            #PWCTR1
+  0xC1, 1, 0xC5,                                                    #PWCTR2
+  0xC2, 2, 0x0A, 0x00,                                              #PWCTR3
+  0xC3, 2, 0x8A, 0x2A,                                              #PWCTR4
+  0xC4, 2, 0x8A, 0xEE,                                              #PWCTR5
+  0xC5, DELAY | 1, 0x0E, 10,                                        #VMCTR1
+  0x36, 1, 0xC8,                                                    #MADCTL
+  0xE0, 16, 0x02, 0x1C, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2D,         #GMCTRP1
+    0x29, 0x25, 0x2B, 0x39, 0x00, 0x01, 0x03, 0x10,
+  0xE1, DELAY | 16, 0x03, 0x1D, 0x07, 0x06, 0x2E, 0x2C, 0x29, 0x2D, #GMCTRN1
+    0x2E, 0x2E, 0x37, 0x3F, 0x00, 0x00, 0x02, 0x10,
+    10,
+  0x2A, 4, 0x00, 0x02, 0x00, 0x81,                                  #CASET
+  0x2B, 4, 0x00, 0x01, 0x00, 0xA0,                                  #RASET
+  0x3A, DELAY | 1, 0x05, 10,                                        #COLMOD
+  0x13, DELAY, 10,                                                  #NORON
+  0x2C, DELAY, 255,                                                 #RAMWR
+  0x29, DELAY, 255,                                                 #DISPON
+))
+
+INITG1 = bytes((
+  0x01, DELAY, 150,                                                 #SWRESET
+  0x11, DELAY, 255,                                                 #SLPOUT
+  0xB1, 3, 0x01, 0x2C, 0x2D,                                        #FRMCTR1
+  0xB2, 3, 0x01, 0x2C, 0x2D,                                        #FRMCTR2
+  0xB3, DELAY | 6, 0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D, 10,          #FRMCTR3
+  0xB4, 1, 0x07,                                                    #INVCTR
+  0xC0, 3, 0xA2, 0x02, 0x84,                                        #PWCTR1
+  0xC1, 1, 0xC5,                                                    #PWCTR2
+  0xC2, 2, 0x0A, 0x00,                                              #PWCTR3
+  0xC3, 2, 0x8A, 0x2A,                                              #PWCTR4
+  0xC4, 2, 0x8A, 0xEE,                                              #PWCTR5
+  0xC5, 1, 0x0E,                                                    #VMCTR1
+  0x20, 0,                                                          #INVOFF
+))
+
+INITG2 = bytes((
+  0x3A, 1, 0x05,                                                    #COLMOD
+  0x2A, 4, 0x00, 0x01, 0x00, 0x7F,                                  #CASET
+  0x2B, 4, 0x00, 0x01, 0x00, 0x9F,                                  #RASET
+  0xE0, 16, 0x02, 0x1C, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2D,         #GMCTRP1
+    0x29, 0x25, 0x2B, 0x39, 0x00, 0x01, 0x03, 0x10,
+  0xE1, 16, 0x03, 0x1D, 0x07, 0x06, 0x2E, 0x2C, 0x29, 0x2D,         #GMCTRN1
+    0x2E, 0x2E, 0x37, 0x3F, 0x00, 0x00, 0x02, 0x10,
+  0x13, DELAY, 10,                                                  #NORON
+  0x29, DELAY, 100,                                                 #DISPON
+))
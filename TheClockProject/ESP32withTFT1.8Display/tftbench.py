@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+#Bus traffic benchmark for the ST7735 driver and the clock scripts' display
+# classes, run on the host against the tftemu panel emulator.
+#
+#  python3 tftbench.py                      print the table
+#  python3 tftbench.py --save bench.json    record a baseline
+#  python3 tftbench.py --check bench.json   fail if anything got worse
+#
+#bench.json next to this script is the committed baseline, checked by
+# tests/test_tftbench.py.  Save it again after an improvement.
+#
+#Each case starts from a freshly initialized panel and reports the bytes,
+# spi.write calls, CS transactions, commands and window setups its drawing
+# took, plus a hash of the frame memory afterwards.  --check exits with 1
+# when a counter went up or a picture changed, so it can run in CI.
+
+import argparse
+import json
+import os
+import sys
+import zlib
+
+import tftemu
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+
+#Clock scripts whose CleanDisplay is benchmarked.
+SCRIPTS = (
+  ('basic', os.path.join(ROOT, 'basicclockwifi.py')),
+  ('detailed', os.path.join(ROOT, 'detailedclock.py')),
+  ('clock', os.path.join(HERE, 'clock.py')),
+)
+
+COUNTERS = ('bytes', 'writes', 'transactions', 'commands', 'windows')
+
+#5x8 test font, every character different.
+FONT = {'Width': 5, 'Height': 8, 'Start': 32, 'End': 127,
+        'Data': bytearray((i * 37 + 11) & 0x7F for i in range(96 * 5))}
+
+def _image( w, h ) :
+  return bytearray((i * 7) & 0xFF for i in range(w * h * 2))
+
+def _record( t ) :
+  #A clock row cleared and redrawn as a display list.
+  t.record()
+  x = 10
+  for c in '12:34:56' :
+    t.fillrect((x, 55), (12, 16), t.BLACK)
+    t.text((x, 55), c, t.WHITE, FONT, 2)
+    x += 14
+  t.commit()
+
+def _buffered( t ) :
+  t.buffered()
+  t.fillrect((0, 0), (128, 40), t.BLUE)
+  t.text((4, 4), '12:34:56', t.WHITE, FONT, 2)
+  t.show()
+
+#(name, draw) for ST7735.TFT, each run after rotation(0) and a black fill.
+TFTCASES = (
+  ('fill', lambda t : t.fill(t.BLUE)),
+  ('fillrect', lambda t : t.fillrect((10, 10), (60, 40), t.RED)),
+  ('fillgradient', lambda t : t.fillgradient((0, 0), (128, 160), t.NAVY, t.PURPLE, True, True)),
+  ('filldither', lambda t : t.filldither((0, 0), (128, 160), t.BLACK, t.GRAY, 6)),
+  ('hline', lambda t : [t.hline((0, y), 128, t.GREEN) for y in range(0, 160, 8)]),
+  ('vline', lambda t : [t.vline((x, 0), 160, t.GREEN) for x in range(0, 128, 8)]),
+  ('line', lambda t : [t.line((0, 0), (127, y), t.YELLOW) for y in range(0, 160, 16)]),
+  ('rect', lambda t : t.rect((5, 5), (100, 120), t.CYAN)),
+  ('circle', lambda t : t.circle((64, 80), 40, t.WHITE)),
+  ('fillcircle', lambda t : t.fillcircle((64, 80), 40, t.WHITE)),
+  ('pixel', lambda t : [t.pixel((x, x), t.WHITE) for x in range(100)]),
+  ('text1', lambda t : t.text((0, 0), 'The quick brown fox 0123456789', t.WHITE, FONT, 1)),
+  ('text2', lambda t : t.text((0, 0), '12:34:56', t.WHITE, FONT, 2)),
+  ('text2bg', lambda t : t.text((0, 0), '12:34:56', t.WHITE, FONT, 2, False, t.BLACK)),
+  ('image', lambda t : t.image(10, 10, 59, 59, _image(50, 50))),
+  ('buffered', _buffered),
+  ('record', _record),
+)
+
+def _clockface( d ) :
+  #A full redraw of the clock scripts' time, characters being opaque.
+  x = 30
+  for c in '12:34:56' :
+    d.draw_char(x, 55, c, 0xFFFF, size = 2)
+    x += 14
+
+#(name, draw) for a CleanDisplay, each run after a black fill.
+CLEANCASES = (
+  ('fill_rect', lambda d : d.fill_rect(10, 10, 60, 40, 0xF800)),
+  ('draw_char1', lambda d : d.draw_char(10, 10, '8', 0xFFFF, size = 1)),
+  ('draw_char2', lambda d : d.draw_char(10, 10, '8', 0xFFFF, size = 2)),
+  ('clockface', _clockface),
+)
+
+def _result( aPanel ) :
+  r = {k: getattr(aPanel, k) for k in COUNTERS}
+  r['pixels'] = '%08x' % (zlib.crc32(aPanel.mem) & 0xFFFFFFFF)
+  return r
+
+def run( aOnly = None ) :
+  '''Run the cases and return {name: {counter: value, 'pixels': hash}}.'''
+  tftemu.install()
+  results = {}
+  for name, draw in TFTCASES :
+    name = 'TFT.' + name
+    if aOnly and aOnly not in name :
+      continue
+    t, p = tftemu.make('initr')
+    t.rotation(0)
+    t.fill(0)
+    p.resetcounts()
+    draw(t)
+    results[name] = _result(p)
+  for sname, path in SCRIPTS :
+    if not os.path.exists(path) :
+      continue
+    ns = tftemu.loadscript(path)
+    for name, draw in CLEANCASES :
+      name = sname + '.' + name
+      if aOnly and aOnly not in name :
+        continue
+      tftemu._buses.clear()
+      p = tftemu.Panel(ns['A0'], ns['CS'], ns['RST'])
+      d = ns['CleanDisplay']()
+      d.fill_rect(0, 0, 160, 128, 0x0000)
+      p.resetcounts()
+      draw(d)
+      results[name] = _result(p)
+  return results
+
+def report( aResults, aBase = None ) :
+  '''Print a table, with the change from aBase where there is one.  Returns
+     the names of the cases that got worse.'''
+  worse = []
+  print('%-22s' % 'case' + ''.join('%14s' % k for k in COUNTERS) + '  pixels')
+  for name, r in aResults.items() :
+    b = (aBase or {}).get(name)
+    cols = []
+    bad = False
+    for k in COUNTERS :
+      if b is None or b[k] == r[k] :
+        cols.append('%14d' % r[k])
+      else:
+        cols.append('%14s' % ('%d(%+d)' % (r[k], r[k] - b[k])))
+        bad = bad or r[k] > b[k]
+    pix = r['pixels']
+    if b is not None and b['pixels'] != pix :
+      pix += ' CHANGED'
+      bad = True
+    print('%-22s' % name + ''.join(cols) + '  ' + pix)
+    if bad :
+      worse.append(name)
+  return worse
+
+def main( aArgs = None ) :
+  ap = argparse.ArgumentParser(description = 'ST7735 bus traffic benchmark on the emulator')
+  ap.add_argument('--save', metavar = 'JSON', help = 'write the results as a baseline')
+  ap.add_argument('--check', metavar = 'JSON', help = 'compare with a baseline, exit 1 if worse')
+  ap.add_argument('--only', help = 'run only cases whose name contains this')
+  a = ap.parse_args(aArgs)
+  sys.path.insert(0, HERE)
+  results = run(a.only)
+  base = None
+  if a.check :
+    with open(a.check) as f :
+      base = json.load(f)
+  worse = report(results, base)
+  if a.save :
+    with open(a.save, 'w') as f :
+      json.dump(results, f, indent = 1, sort_keys = True)
+  if worse :
+    print('worse than baseline: ' + ', '.join(worse))
+    return 1
+  return 0
+
+if __name__ == '__main__' :
+  sys.exit(main())
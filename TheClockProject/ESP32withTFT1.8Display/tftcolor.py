@@ -0,0 +1,178 @@
+#Batch pixel format conversion for the ST7735 driver.  Whole buffers of
+# RGB888 or 8 bit gray pixels are turned into the big endian RGB565 the
+# panel takes (or BGR565 for a panel left in BGR order, see TFT.rgb()).
+#
+#On MicroPython the loops are viper functions working on raw pointers.
+# Everywhere else (and on ports built without the native emitters, see
+# VIPER) the same conversions run as plain Python using the lookup tables
+# below, which is slow but handy for testing on the host.
+#
+#Every function takes an optional destination buffer so one buffer can be
+# reused for every chunk, and converting in place is fine where the output
+# is no larger than the input.
+
+import sys
+
+#Use the viper versions.  Set False before importing this on a port without
+# viper support.
+VIPER = sys.implementation.name == 'micropython'
+
+if VIPER :
+  import micropython
+
+#RGB888 channel value to its bits of the big endian RGB565 high/low bytes.
+_RHI = bytes(v & 0xF8 for v in range(256))
+_GHI = bytes(v >> 5 for v in range(256))
+_GLO = bytes((v << 3) & 0xE0 for v in range(256))
+_BLO = bytes(v >> 3 for v in range(256))
+
+#Gray level to big endian RGB565, high byte then low byte for each level.
+GRAYTABLE = bytearray(512)
+for _v in range(256) :
+  GRAYTABLE[_v * 2] = _RHI[_v] | _GHI[_v]
+  GRAYTABLE[_v * 2 + 1] = _GLO[_v] | _BLO[_v]
+del _v
+
+def _rgb888py( src, dst, n, bgr ) :
+  rhi = _RHI
+  ghi = _GHI
+  glo = _GLO
+  blo = _BLO
+  i = 0
+  o = 0
+  for _ in range(n) :
+    if bgr :
+      r = src[i + 2]
+      b = src[i]
+    else:
+      r = src[i]
+      b = src[i + 2]
+    g = src[i + 1]
+    dst[o] = rhi[r] | ghi[g]
+    dst[o + 1] = glo[g] | blo[b]
+    i += 3
+    o += 2
+
+def _gray8py( src, dst, n, table ) :
+  #Backwards so src and dst may be the same buffer.
+  i = n - 1
+  while i >= 0 :
+    v = src[i] * 2
+    dst[i * 2 + 1] = table[v + 1]
+    dst[i * 2] = table[v]
+    i -= 1
+
+def _swap16py( src, dst, n ) :
+  for i in range(0, n * 2, 2) :
+    hi = src[i]
+    dst[i] = src[i + 1]
+    dst[i + 1] = hi
+
+def _bgr565py( src, dst, n ) :
+  for i in range(0, n * 2, 2) :
+    v = (src[i] << 8) | src[i + 1]
+    v = ((v & 0x1F) << 11) | (v & 0x07E0) | (v >> 11)
+    dst[i] = v >> 8
+    dst[i + 1] = v & 0xFF
+
+if VIPER :
+  @micropython.viper
+  def _rgb888v( src: ptr8, dst: ptr8, n: int, bgr: int ) :
+    i = 0
+    o = 0
+    while n > 0 :
+      if bgr :
+        r = src[i + 2]
+        b = src[i]
+      else:
+        r = src[i]
+        b = src[i + 2]
+      g = src[i + 1]
+      dst[o] = (r & 0xF8) | (g >> 5)
+      dst[o + 1] = ((g << 3) & 0xE0) | (b >> 3)
+      i += 3
+      o += 2
+      n -= 1
+
+  @micropython.viper
+  def _gray8v( src: ptr8, dst: ptr8, n: int, table: ptr8 ) :
+    i = n - 1
+    while i >= 0 :
+      v = src[i] * 2
+      dst[i * 2 + 1] = table[v + 1]
+      dst[i * 2] = table[v]
+      i -= 1
+
+  @micropython.viper
+  def _swap16v( src: ptr8, dst: ptr8, n: int ) :
+    i = 0
+    n *= 2
+    while i < n :
+      hi = src[i]
+      dst[i] = src[i + 1]
+      dst[i + 1] = hi
+      i += 2
+
+  @micropython.viper
+  def _bgr565v( src: ptr8, dst: ptr8, n: int ) :
+    i = 0
+    n *= 2
+    while i < n :
+      v = (src[i] << 8) | src[i + 1]
+      v = ((v & 0x1F) << 11) | (v & 0x07E0) | (v >> 11)
+      dst[i] = v >> 8
+      dst[i + 1] = v & 0xFF
+      i += 2
+
+  _rgb888 = _rgb888v
+  _gray8 = _gray8v
+  _swap16 = _swap16v
+  _bgr565 = _bgr565v
+else:
+  _rgb888 = _rgb888py
+  _gray8 = _gray8py
+  _swap16 = _swap16py
+  _bgr565 = _bgr565py
+
+def _out( aDst, aBytes ) :
+  #Destination buffer, a new one when aDst is None.
+  if aDst is None :
+    return bytearray(aBytes)
+  if len(aDst) < aBytes :
+    raise ValueError('destination buffer too small')
+  return aDst
+
+def rgb888( aSrc, aDst = None, aBGR = False, aCount = None ) :
+  '''Convert aCount (default all) RGB888 pixels, 3 bytes r, g, b each, to
+     big endian RGB565.  aBGR gives BGR565 instead, which is also how to
+     read b, g, r ordered data (BMP) as RGB565.  aDst may be aSrc.  Returns
+     the converted pixels as a memoryview of aDst.'''
+  n = len(aSrc) // 3 if aCount is None else aCount
+  dst = _out(aDst, n * 2)
+  _rgb888(aSrc, dst, n, 1 if aBGR else 0)
+  return memoryview(dst)[:n * 2]
+
+def gray8( aSrc, aDst = None, aCount = None ) :
+  '''Convert aCount (default all) 8 bit gray pixels to big endian RGB565.
+     aDst may be aSrc if it has room for 2 bytes per pixel, the gray levels
+     being in its first aCount bytes.'''
+  n = len(aSrc) if aCount is None else aCount
+  dst = _out(aDst, n * 2)
+  _gray8(aSrc, dst, n, GRAYTABLE)
+  return memoryview(dst)[:n * 2]
+
+def swap16( aSrc, aDst = None, aCount = None ) :
+  '''Swap the bytes of aCount (default all) 16 bit pixels, little endian
+     RGB565 to big endian or back.  aDst may be aSrc.'''
+  n = len(aSrc) // 2 if aCount is None else aCount
+  dst = _out(aDst, n * 2)
+  _swap16(aSrc, dst, n)
+  return memoryview(dst)[:n * 2]
+
+def bgr565( aSrc, aDst = None, aCount = None ) :
+  '''Swap red and blue of aCount (default all) big endian RGB565 pixels,
+     RGB565 to BGR565 or back.  aDst may be aSrc.'''
+  n = len(aSrc) // 2 if aCount is None else aCount
+  dst = _out(aDst, n * 2)
+  _bgr565(aSrc, dst, n)
+  return memoryview(dst)[:n * 2]
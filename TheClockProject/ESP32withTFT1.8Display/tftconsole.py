@@ -0,0 +1,92 @@
+#Scrolling text console for the ST7735 driver using the controller's
+# hardware vertical scroll (TFT.setvscroll / TFT.vscroll).  Adding a line
+# draws only that line's band and moves the scroll start, the rest of the
+# screen is never redrawn.
+#
+#Hardware scrolling runs along the panel's frame memory rows so the display
+# must be upright, call rotation(0) after init.
+
+from ST7735 import TFT
+
+#Rows of ST7735 frame memory the scroll area wraps around in.
+FRAMEROWS = 162
+
+class Console(object) :
+  """Text console with optional fixed header and status bands.
+     aTop and aBottom are the heights of the fixed areas at the top and
+     bottom of the screen, everything between scrolls.  The scroll area is
+     trimmed to a whole number of lines, the rows left over join the bottom
+     fixed area."""
+
+  def __init__( self, aTFT, aFont, aColor = TFT.WHITE, aBGColor = TFT.BLACK, aTop = 0, aBottom = 0, aSize = 1 ) :
+    self.tft = aTFT
+    self.font = aFont
+    self.color = aColor
+    self.bgcolor = aBGColor
+    self.size = aSize
+    self.top = aTop
+    self.lineh = aFont["Height"] * aSize + 1
+    self.cols = aTFT.size()[0] // (aFont["Width"] * aSize + 1)
+    h = aTFT.size()[1]
+    self.lines = (h - aTop - aBottom) // self.lineh
+    if self.lines < 1 :
+      raise ValueError('no room for a console line')
+    self.bottom = h - aTop - self.lines * self.lineh
+    #Frame rows the panel does not show (above its offset and below the
+    # screen) go into the fixed areas so only drawable rows scroll.
+    off = aTFT._offset[1]
+    aTFT.setvscroll(off + aTop, FRAMEROWS - off - h + self.bottom)
+    self.clear()
+
+  def clear( self ) :
+    '''Blank the scroll area and start again from the top.'''
+    self._count = 0                    #Lines used until the area fills up.
+    self._first = 0                    #Line slot shown at the top.
+    self.tft.vscroll(0)
+    w = self.tft.size()[0]
+    self.tft.fillrect((0, self.top), (w, self.lines * self.lineh), self.bgcolor)
+
+  def write( self, aText ) :
+    '''Add text, starting a new line for every line in aText.  Long lines are
+       wrapped to the screen width.'''
+    for ln in aText.split('\n') :
+      while True :
+        self._newline(ln[:self.cols])
+        ln = ln[self.cols:]
+        if not ln :
+          break
+
+  def header( self, aText, aColor = None ) :
+    '''Draw aText in the top fixed area.'''
+    self._band(0, self.top, aText, aColor)
+
+  def status( self, aText, aColor = None ) :
+    '''Draw aText in the bottom fixed area.'''
+    h = self.tft.size()[1]
+    self._band(h - self.bottom, self.bottom, aText, aColor)
+
+  def _band( self, y, h, aText, aColor ) :
+    if h <= 0 :
+      return
+    tft = self.tft
+    tft.fillrect((0, y), (tft.size()[0], h), self.bgcolor)
+    tft.text((0, y), aText, self.color if aColor is None else aColor,
+             self.font, self.size, True, self.bgcolor)
+
+  def _newline( self, aText ) :
+    #Until the area is full lines go into the next free slot.  After that
+    # the oldest (top) slot is redrawn and the scroll start moves past it,
+    # which brings it in at the bottom.
+    tft = self.tft
+    scroll = self._count == self.lines
+    if scroll :
+      slot = self._first
+      self._first = (slot + 1) % self.lines
+    else:
+      slot = self._count
+      self._count += 1
+    y = self.top + slot * self.lineh
+    tft.fillrect((0, y), (tft.size()[0], self.lineh), self.bgcolor)
+    tft.text((0, y), aText, self.color, self.font, self.size, True, self.bgcolor)
+    if scroll :
+      tft.vscroll(self._first * self.lineh)
@@ -0,0 +1,446 @@
+#ST7735 emulator for running the display code on a PC.  Runs on the host,
+# not on the board.
+#
+#install() puts a fake machine module (Pin, SPI, RTC) in sys.modules and
+# adds the MicroPython only time/gc functions, so ST7735.py and the clock
+# scripts import unmodified.  A Panel listens on an SPI bus and decodes what
+# is written the way the controller would: the DC pin picks command or data,
+# CS must be low, CASET/RASET/RAMWR fill a 132x162 RGB565 frame memory
+# through MADCTL's row/column exchange and mirroring, COLMOD selects 12, 16
+# or 18 bit pixels and VSCRDEF/VSCSAD scroll the picture.  The frame can be
+# saved as a PPM.
+#
+#  import tftemu
+#  tftemu.install()
+#  tft, panel = tftemu.make('initr')
+#  tft.fillrect((10, 10), (20, 20), tft.RED)
+#  panel.ppm('shot.ppm')
+#
+#AsyncSPI stands in for a DMA SPI driver with a write_async() coroutine
+# taking simulated bus time, for trying TFT.flush():
+#
+#  tft.spi = tftemu.AsyncSPI(1, 2)
+#  asyncio.run(tft.flush())
+#
+#loadscript() pulls the hardware setup and CleanDisplay class out of one of
+# the clock scripts without running its main loop.  tftbench.py uses all of
+# this for the bytes/transactions benchmark.
+
+import ast
+import gc
+import os
+import sys
+import time
+import types
+
+class MachineReset(Exception) :
+  """Raised by the fake machine.reset()."""
+
+#Current level of every fake pin by pin id.
+PINS = {}
+
+#Callbacks run with the new level when a pin changes, by pin id.
+_watch = {}
+
+#Panels listening on each SPI bus id.
+_buses = {}
+
+def _level( aPin ) :
+  p = PINS.get(aPin)
+  return p._v if p is not None else 0
+
+class Pin(object) :
+  IN = 0
+  OUT = 1
+  OPEN_DRAIN = 2
+  PULL_UP = 1
+  PULL_DOWN = 2
+
+  def __init__( self, aId, aMode = -1, aPull = -1, value = None ) :
+    self.id = aId
+    self._v = 0
+    PINS[aId] = self
+    if value is not None :
+      self.value(value)
+
+  def init( self, *args, **kw ) :
+    pass
+
+  def value( self, aValue = None ) :
+    if aValue is None :
+      return self._v
+    aValue = 1 if aValue else 0
+    if aValue != self._v :
+      self._v = aValue
+      for fn in _watch.get(self.id, ()) :
+        fn(aValue)
+
+  __call__ = value
+
+  def on( self ) :
+    self.value(1)
+
+  def off( self ) :
+    self.value(0)
+
+class SPI(object) :
+  def __init__( self, aId = 1, *args, **kw ) :
+    self.id = aId
+
+  def init( self, *args, **kw ) :
+    pass
+
+  def deinit( self ) :
+    pass
+
+  def write( self, aData ) :
+    for p in _buses.get(self.id, ()) :
+      p.write(aData)
+
+class AsyncSPI(SPI) :
+  """SPI with a write_async() coroutine, standing in for a DMA driver.  A
+     transfer takes aUsPerByte microseconds a byte while other tasks run,
+     and the data is taken from the buffer when it ends, as DMA would read
+     it, so a buffer changed while on the bus shows up as bad pixels and
+     is counted in clobbered."""
+
+  def __init__( self, aId = 1, aUsPerByte = 1, *args, **kw ) :
+    SPI.__init__(self, aId)
+    self.usperbyte = aUsPerByte
+    self.busy = False                  #A transfer is on the bus.
+    self.clobbered = 0
+
+  async def write_async( self, aData ) :
+    import asyncio
+    before = bytes(aData)
+    self.busy = True
+    try:
+      await asyncio.sleep(len(aData) * self.usperbyte / 1000000)
+    finally:
+      self.busy = False
+    if bytes(aData) != before :
+      self.clobbered += 1
+    self.write(aData)
+
+class RTC(object) :
+  _dt = (2000, 1, 1, 5, 0, 0, 0, 0)
+
+  def datetime( self, aValue = None ) :
+    if aValue is None :
+      return RTC._dt
+    RTC._dt = tuple(aValue)
+
+def _reset() :
+  raise MachineReset()
+
+def install( aSleep = False ) :
+  '''Install the fake machine module and the MicroPython time and gc
+     functions.  Sleeps return at once unless aSleep.'''
+  m = types.ModuleType('machine')
+  m.Pin = Pin
+  m.SPI = SPI
+  m.RTC = RTC
+  m.reset = _reset
+  m.MachineReset = MachineReset
+  sys.modules['machine'] = m
+  if aSleep :
+    time.sleep_ms = lambda ms : time.sleep(ms / 1000)
+    time.sleep_us = lambda us : time.sleep(us / 1000000)
+  else:
+    time.sleep_ms = time.sleep_us = lambda t : None
+  if not hasattr(time, 'ticks_us') :
+    time.ticks_us = lambda : time.perf_counter_ns() // 1000
+    time.ticks_ms = lambda : time.perf_counter_ns() // 1000000
+    time.ticks_diff = lambda a, b : a - b
+    time.ticks_add = lambda a, b : a + b
+  if not hasattr(gc, 'mem_free') :
+    gc.mem_free = lambda : 100000
+    gc.mem_alloc = lambda : 0
+  return m
+
+#Commands the panel decodes.
+_SWRESET = 0x01
+_SLPIN = 0x10
+_SLPOUT = 0x11
+_INVOFF = 0x20
+_INVON = 0x21
+_DISPOFF = 0x28
+_DISPON = 0x29
+_CASET = 0x2A
+_RASET = 0x2B
+_RAMWR = 0x2C
+_VSCRDEF = 0x33
+_MADCTL = 0x36
+_VSCSAD = 0x37
+_COLMOD = 0x3A
+
+class Panel(object) :
+  """Emulated controller on SPI bus aBus with the DC, CS and reset pins
+     given by id.  With aCS None data is always taken.  Counters: bytes,
+     writes (spi.write calls), commands, windows (CASET/RASET) and
+     transactions (CS going low).  Set trace to a list to have every byte
+     taken appended to it as (dc, byte)."""
+
+  WIDTH = 132
+  HEIGHT = 162
+
+  def __init__( self, aDC, aCS = None, aRST = None, aBus = 1 ) :
+    self._dcpin = aDC
+    self._cspin = aCS
+    _buses.setdefault(aBus, []).append(self)
+    if aCS is not None :
+      _watch.setdefault(aCS, []).append(self._cs)
+    if aRST is not None :
+      _watch.setdefault(aRST, []).append(self._rst)
+    self.mem = bytearray(Panel.WIDTH * Panel.HEIGHT * 2)
+    self.trace = None
+    self.resetcounts()
+    self.reset()
+
+  def resetcounts( self ) :
+    self.bytes = 0
+    self.writes = 0
+    self.commands = 0
+    self.windows = 0
+    self.transactions = 0
+
+  def reset( self ) :
+    '''Power on state.  Frame memory is left alone as it would be.'''
+    self.madctl = 0
+    self.colmod = 0x06
+    self.on = False
+    self.sleeping = True
+    self.inverted = False
+    self.tfa = 0
+    self.vsa = Panel.HEIGHT
+    self.bfa = 0
+    self.vsp = 0
+    self.cols = (0, Panel.WIDTH - 1)
+    self.rows = (0, Panel.HEIGHT - 1)
+    self._cmd = None
+    self._args = bytearray()
+    self._pos = None
+    self._part = bytearray()
+
+  def _cs( self, aLevel ) :
+    if not aLevel :
+      self.transactions += 1
+
+  def _rst( self, aLevel ) :
+    if not aLevel :
+      self.reset()
+
+  def write( self, aData ) :
+    if self._cspin is not None and _level(self._cspin) :
+      return
+    self.writes += 1
+    self.bytes += len(aData)
+    if self.trace is not None :
+      dc = _level(self._dcpin)
+      self.trace.extend((dc, b) for b in aData)
+    if _level(self._dcpin) :
+      if self._cmd == _RAMWR :
+        self._pixels(aData)
+      else:
+        for b in aData :
+          self._arg(b)
+    else:
+      for b in aData :
+        self._command(b)
+
+  def _command( self, aCmd ) :
+    self.commands += 1
+    self._cmd = aCmd
+    self._args = bytearray()
+    self._part = bytearray()
+    if aCmd == _SWRESET :
+      self.reset()
+    elif aCmd == _SLPOUT :
+      self.sleeping = False
+    elif aCmd == _SLPIN :
+      self.sleeping = True
+    elif aCmd == _DISPON :
+      self.on = True
+    elif aCmd == _DISPOFF :
+      self.on = False
+    elif aCmd == _INVON :
+      self.inverted = True
+    elif aCmd == _INVOFF :
+      self.inverted = False
+    elif aCmd == _RAMWR :
+      self._pos = [self.cols[0], self.rows[0]]
+
+  def _arg( self, aByte ) :
+    a = self._args
+    a.append(aByte)
+    c = self._cmd
+    if c == _CASET and len(a) == 4 :
+      self.windows += 1
+      self.cols = ((a[0] << 8) | a[1], (a[2] << 8) | a[3])
+    elif c == _RASET and len(a) == 4 :
+      self.windows += 1
+      self.rows = ((a[0] << 8) | a[1], (a[2] << 8) | a[3])
+    elif c == _MADCTL and len(a) == 1 :
+      self.madctl = a[0]
+    elif c == _COLMOD and len(a) == 1 :
+      self.colmod = a[0] & 0x07
+    elif c == _VSCRDEF and len(a) == 6 :
+      self.tfa = (a[0] << 8) | a[1]
+      self.vsa = (a[2] << 8) | a[3]
+      self.bfa = (a[4] << 8) | a[5]
+    elif c == _VSCSAD and len(a) == 2 :
+      self.vsp = (a[0] << 8) | a[1]
+
+  def _pixels( self, aData ) :
+    part = self._part
+    part.extend(aData)
+    if self.colmod == 0x05 :
+      n = len(part) // 2
+      for i in range(n) :
+        self._store((part[i * 2] << 8) | part[i * 2 + 1])
+      del part[:n * 2]
+    elif self.colmod == 0x03 :
+      #12 bit, two pixels in three bytes.
+      n = len(part) // 3
+      for i in range(n) :
+        a, b, c = part[i * 3:i * 3 + 3]
+        self._store(_rgb444(a >> 4, a & 0x0F, b >> 4))
+        self._store(_rgb444(b & 0x0F, c >> 4, c & 0x0F))
+      del part[:n * 3]
+    else:
+      #18 bit, a byte per channel with the low 2 bits unused.
+      n = len(part) // 3
+      for i in range(n) :
+        r, g, b = part[i * 3:i * 3 + 3]
+        self._store(((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3))
+      del part[:n * 3]
+
+  def _store( self, aColor ) :
+    pos = self._pos
+    x, y = self._phys(pos[0], pos[1])
+    if 0 <= x < Panel.WIDTH and 0 <= y < Panel.HEIGHT :
+      i = (y * Panel.WIDTH + x) * 2
+      self.mem[i] = aColor >> 8
+      self.mem[i + 1] = aColor & 0xFF
+    #Column first, wrapping back to the top of the window after the end.
+    pos[0] += 1
+    if pos[0] > self.cols[1] :
+      pos[0] = self.cols[0]
+      pos[1] += 1
+      if pos[1] > self.rows[1] :
+        pos[1] = self.rows[0]
+
+  def _phys( self, aCol, aRow ) :
+    #Frame memory x, y of window address aCol, aRow under MADCTL: MV
+    # exchanges rows and columns, then MX and MY mirror.
+    m = self.madctl
+    if m & 0x20 :
+      aCol, aRow = aRow, aCol
+    if m & 0x40 :
+      aCol = Panel.WIDTH - 1 - aCol
+    if m & 0x80 :
+      aRow = Panel.HEIGHT - 1 - aRow
+    return aCol, aRow
+
+  def pixel( self, aX, aY ) :
+    '''RGB565 value at frame memory aX, aY.'''
+    i = (aY * Panel.WIDTH + aX) * 2
+    return (self.mem[i] << 8) | self.mem[i + 1]
+
+  def view( self ) :
+    '''Rows of RGB565 values as the panel shows them, with the vertical
+       scroll and inversion applied.'''
+    out = []
+    w = Panel.WIDTH
+    for y in range(Panel.HEIGHT) :
+      r = y
+      if self.tfa <= y < self.tfa + self.vsa :
+        r = self.tfa + (self.vsp - self.tfa + y - self.tfa) % self.vsa
+      row = [self.pixel(x, r) for x in range(w)]
+      if self.inverted :
+        row = [v ^ 0xFFFF for v in row]
+      out.append(row)
+    return out
+
+  def ppm( self, aPath ) :
+    '''Save the view() as a binary PPM.'''
+    data = bytearray()
+    for row in self.view() :
+      for v in row :
+        r = (v >> 11) & 0x1F
+        g = (v >> 5) & 0x3F
+        b = v & 0x1F
+        data += bytes(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)))
+    with open(aPath, 'wb') as f :
+      f.write(b'P6\n%d %d\n255\n' % (Panel.WIDTH, Panel.HEIGHT))
+      f.write(data)
+
+  def detach( self ) :
+    '''Stop listening to the bus and pins.'''
+    for lst in _buses.values() :
+      if self in lst :
+        lst.remove(self)
+    for lst in _watch.values() :
+      for fn in (self._cs, self._rst) :
+        if fn in lst :
+          lst.remove(fn)
+
+def _rgb444( r, g, b ) :
+  return (r << 12) | ((r >> 3) << 11) | (g << 7) | ((g >> 2) << 5) | (b << 1) | (b >> 3)
+
+def make( aInit = 'initr', aDC = 0, aRST = 1, aCS = 7, aBus = 1 ) :
+  '''Return (tft, panel), an ST7735.TFT on a fresh Panel after calling its
+     aInit method (None to skip).  install() must have been called.'''
+  import machine
+  import ST7735
+  _buses.pop(aBus, None)
+  panel = Panel(aDC, aCS, aRST, aBus)
+  tft = ST7735.TFT(machine.SPI(aBus), aDC, aRST, aCS)
+  if aInit :
+    getattr(tft, aInit)()
+  return tft, panel
+
+def loadscript( aPath ) :
+  '''Run the setup parts of a clock script (imports, constants, functions
+     and classes) and return its globals.  Its main loop and anything
+     creating one of its own classes at the top level are skipped.
+     Imports that fail on the host (network, urequests) are left out.'''
+  with open(aPath) as f :
+    tree = ast.parse(f.read(), aPath)
+  classes = {n.name for n in tree.body if isinstance(n, ast.ClassDef)}
+  ns = {'__name__': 'script', '__file__': aPath}
+  #Modules next to the script, as on the board.
+  here = os.path.dirname(os.path.abspath(aPath))
+  if here not in sys.path :
+    sys.path.insert(0, here)
+  for node in tree.body :
+    if isinstance(node, ast.Import) :
+      #One at a time so a missing module does not take the others with it.
+      for alias in node.names :
+        try:
+          _exec(ast.copy_location(ast.Import(names = [alias]), node), aPath, ns)
+        except ImportError :
+          pass
+    elif isinstance(node, ast.ImportFrom) or _tryimport(node) :
+      try:
+        _exec(node, aPath, ns)
+      except ImportError :
+        pass
+    elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) :
+      _exec(node, aPath, ns)
+    elif isinstance(node, (ast.Assign, ast.AnnAssign)) :
+      names = {n.id for n in ast.walk(node.value) if isinstance(n, ast.Name)} if node.value else set()
+      if not names & classes :
+        _exec(node, aPath, ns)
+  return ns
+
+def _tryimport( aNode ) :
+  #try: import x / except ImportError: import y, picking a module by port.
+  if not isinstance(aNode, ast.Try) :
+    return False
+  body = aNode.body + [n for h in aNode.handlers for n in h.body]
+  return all(isinstance(n, (ast.Import, ast.ImportFrom)) for n in body)
+
+def _exec( aNode, aPath, aGlobals ) :
+  mod = ast.Module(body = [aNode], type_ignores = [])
+  exec(compile(mod, aPath, 'exec'), aGlobals)
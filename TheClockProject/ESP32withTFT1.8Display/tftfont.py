@@ -0,0 +1,89 @@
+#Compiled fonts for the ST7735 driver.  A font is one bytes blob, normally a
+# literal in a module made by bdf2font.py.  When that module is frozen into
+# the firmware the blob stays in flash and glyphs are read through a
+# memoryview, so nothing is copied to the heap per character.
+#
+#Blob layout (numbers little endian):
+# 0  2  b'TF'
+# 2  1  first character code
+# 3  1  last character code
+# 4  1  height in pixels
+# 5  1  width in pixels (widest glyph for proportional fonts)
+# 6  1  flags, PROPORTIONAL when glyphs have their own widths
+# 7  1  bytes per column, (height + 7) // 8
+# 8     2 byte offset of every glyph from the start of the blob
+#       1 byte width of every glyph (proportional fonts only)
+#       glyph columns left to right, each column little endian with the top
+#        pixel in bit 0 (the same as the dict fonts, which have 1 byte
+#        columns)
+
+import struct
+
+MAGIC = b'TF'
+PROPORTIONAL = 0x01
+
+class Font(object) :
+  """Compiled font.  Supports the same "Start", "End", "Width" and "Height"
+     keys as the dict fonts so it can be passed anywhere they are used."""
+
+  def __init__( self, aData ) :
+    mv = memoryview(aData)
+    if bytes(mv[:2]) != MAGIC :
+      raise ValueError('not a compiled font')
+    self._mv = mv
+    self.start = mv[2]
+    self.end = mv[3]
+    self.height = mv[4]
+    self.width = mv[5]
+    self.proportional = bool(mv[6] & PROPORTIONAL)
+    self.bpc = mv[7]
+    self._count = self.end - self.start + 1
+    self._widths = 8 + self._count * 2
+
+  def __getitem__( self, aKey ) :
+    if aKey == 'Start' :
+      return self.start
+    if aKey == 'End' :
+      return self.end
+    if aKey == 'Width' :
+      return self.width
+    if aKey == 'Height' :
+      return self.height
+    raise KeyError(aKey)
+
+  def charwidth( self, aCode ) :
+    '''Width in pixels of character code aCode.'''
+    if self.proportional and self.start <= aCode <= self.end :
+      return self._mv[self._widths + aCode - self.start]
+    return self.width
+
+  def glyph( self, aCode ) :
+    '''Return (columns, width) for character code aCode.  columns is a
+       memoryview into the font data, self.bpc bytes per column.'''
+    i = aCode - self.start
+    mv = self._mv
+    o = 8 + i * 2
+    o = mv[o] | (mv[o + 1] << 8)
+    w = self.charwidth(aCode)
+    return mv[o:o + w * self.bpc], w
+
+def build( aStart, aEnd, aHeight, aGlyphs, aProportional = False ) :
+  '''Build a font blob.  aGlyphs holds a list of column bitmasks (top pixel
+     in bit 0) for every character from aStart to aEnd.'''
+  bpc = (aHeight + 7) // 8
+  count = aEnd - aStart + 1
+  width = max(len(g) for g in aGlyphs)
+  flags = PROPORTIONAL if aProportional else 0
+  head = MAGIC + struct.pack('<BBBBBB', aStart, aEnd, aHeight, width, flags, bpc)
+  pos = len(head) + count * 2 + (count if aProportional else 0)
+  offsets = bytearray()
+  widths = bytearray()
+  data = bytearray()
+  for g in aGlyphs :
+    if not aProportional :
+      g = list(g) + [0] * (width - len(g))
+    offsets += struct.pack('<H', pos + len(data))
+    widths.append(len(g))
+    for col in g :
+      data += col.to_bytes(bpc, 'little')
+  return bytes(head + offsets + (widths if aProportional else b'') + data)
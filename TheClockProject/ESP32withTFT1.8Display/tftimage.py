@@ -0,0 +1,337 @@
+#Compact image format for the ST7735 driver with a streaming decoder.
+#Images are expanded a row at a time into one reusable line buffer and sent
+# to the display through a single window so a full screen picture never has
+# to fit in RAM.  Use img2tft.py on the host to make them.
+#
+#Layout (all header numbers little endian):
+# 0  2  b'TI'
+# 2  1  kind, one of the constants below
+# 3  1  bits per pixel: 1, 2, 4 or 8 for palette kinds, 16 otherwise
+# 4  2  width
+# 6  2  height
+# 8  2  palette entries
+#10     palette, 2 bytes big endian RGB565 per entry
+#       pixel data:
+#        RAW    rows of width * 2 bytes of big endian RGB565
+#        PAL    rows of palette indexes packed first pixel in the high bits,
+#               each row padded to a whole byte
+#        PALRLE (count, index) byte pairs
+#        RLE    (count, high, low) byte triples
+#       Runs have a count of 1-255 and may carry on into the next row.
+#
+#blitfile() also draws raw RGB565 and BMP files, reading them a few rows at
+# a time.
+
+import struct
+
+import tftcolor
+
+RAW = 0
+PAL = 1
+PALRLE = 2
+RLE = 3
+
+MAGIC = b'TI'
+HEADER = 10
+
+#Bytes read from the source at a time for run length data.
+CHUNK = 64
+
+class _MemReader(object) :
+  '''Minimal stream over a bytes like object so memory images and files
+     decode the same way.'''
+
+  def __init__( self, aData ) :
+    self._mv = memoryview(aData)
+    self._pos = 0
+
+  def read( self, aCount ) :
+    p = self._pos
+    self._pos = min(p + aCount, len(self._mv))
+    return bytes(self._mv[p:self._pos])
+
+  def readinto( self, aBuf ) :
+    p = self._pos
+    n = min(len(aBuf), len(self._mv) - p)
+    aBuf[:n] = self._mv[p:p + n]
+    self._pos = p + n
+    return n
+
+  def close( self ) :
+    pass
+
+def _open( aSource ) :
+  if type(aSource) is str :
+    return open(aSource, 'rb')
+  if hasattr(aSource, 'readinto') :
+    return aSource
+  return _MemReader(aSource)
+
+def _readheader( aStream ) :
+  hdr = aStream.read(HEADER)
+  if len(hdr) != HEADER or hdr[:2] != MAGIC :
+    raise ValueError('not a TI image')
+  kind, bpp, w, h, count = struct.unpack('<BBHHH', hdr[2:])
+  pal = aStream.read(count * 2) if count else b''
+  return kind, bpp, w, h, pal
+
+class Image(object) :
+  """An image opened for decoding.  aSource may be a file name, an open
+     binary stream or a bytes like object.  Only the header and palette are
+     read up front."""
+
+  def __init__( self, aSource ) :
+    self._stream = _open(aSource)
+    self._own = self._stream is not aSource
+    try:
+      self.kind, self.bpp, self.width, self.height, self.palette = _readheader(self._stream)
+    except:
+      self.close()
+      raise
+
+  def close( self ) :
+    if self._own :
+      self._stream.close()
+    self._own = False
+
+  def rows( self ) :
+    '''Generator decoding the image a row at a time.  Every row is yielded
+       in the same line buffer so it must be used before asking for the
+       next.'''
+    s = self._stream
+    w = self.width
+    h = self.height
+    pal = self.palette
+    kind = self.kind
+    line = bytearray(w * 2)
+    if kind == RAW :
+      for _ in range(h) :
+        s.readinto(line)
+        yield line
+    elif kind == PAL :
+      bpp = self.bpp
+      packed = bytearray((w * bpp + 7) // 8)
+      mask = (1 << bpp) - 1
+      for _ in range(h) :
+        s.readinto(packed)
+        shift = 8 - bpp
+        i = 0
+        p = 0
+        for _ in range(w) :
+          c = ((packed[i] >> shift) & mask) * 2
+          line[p] = pal[c]
+          line[p + 1] = pal[c + 1]
+          p += 2
+          shift -= bpp
+          if shift < 0 :
+            shift = 8 - bpp
+            i += 1
+        yield line
+    elif kind == PALRLE or kind == RLE :
+      step = 2 if kind == PALRLE else 3
+      inbuf = bytearray(CHUNK - CHUNK % step)
+      ln = w * 2
+      p = 0
+      left = h
+      while left :
+        n = s.readinto(inbuf)
+        if not n :
+          break
+        for i in range(0, n - n % step, step) :
+          count = inbuf[i]
+          if step == 2 :
+            c = inbuf[i + 1] * 2
+            hi = pal[c]
+            lo = pal[c + 1]
+          else:
+            hi = inbuf[i + 1]
+            lo = inbuf[i + 2]
+          while count :
+            run = min(count, (ln - p) // 2)
+            end = p + run * 2
+            while p < end :
+              line[p] = hi
+              line[p + 1] = lo
+              p += 2
+            count -= run
+            if p == ln :
+              yield line
+              p = 0
+              left -= 1
+              if not left :
+                return
+    else:
+      raise ValueError('unknown TI kind %d' % kind)
+
+def info( aSource ) :
+  '''Return (kind, bits per pixel, width, height) of an image.'''
+  img = Image(aSource)
+  img.close()
+  return img.kind, img.bpp, img.width, img.height
+
+def draw( aTFT, aPos, aSource ) :
+  '''Draw an image with its top left corner at aPos.  The whole image goes
+     through one display window, a row at a time.'''
+  img = Image(aSource)
+  try:
+    x, y = aPos
+    aTFT.stream(x, y, x + img.width - 1, y + img.height - 1, img.rows())
+  finally:
+    img.close()
+
+#Bytes of pixel data blitfile() keeps in RAM, as many whole rows of the
+# visible area as fit (at least one) are read and sent at a time.
+BLITBUF = 2048
+
+#Pixel layouts blitfile() can read straight from a file.
+_BE565 = 0                             #Big endian RGB565, raw and TI RAW.
+_LE565 = 1                             #16 bit BMP with RGB565 bit fields.
+_LE555 = 2                             #16 bit BMP, the BI_RGB default.
+_BGR888 = 3                            #24 bit BMP.
+
+def _bmpheader( aStream ) :
+  #Return (width, height, stride, data offset, bottom up, layout).
+  hdr = aStream.read(54)
+  if len(hdr) != 54 :
+    raise ValueError('not a BMP image')
+  offset, _, w, h, _, bpp, comp = struct.unpack('<IIiiHHI', hdr[10:34])
+  layout = None
+  if bpp == 24 and comp == 0 :
+    layout = _BGR888
+  elif bpp == 16 and comp == 0 :
+    layout = _LE555
+  elif bpp == 16 and comp == 3 :
+    #Bit field masks follow a 40 byte header or sit inside a V4/V5 header.
+    red = struct.unpack('<I', aStream.read(4))[0]
+    layout = _LE565 if red == 0xF800 else (_LE555 if red == 0x7C00 else None)
+  if layout is None :
+    raise ValueError('unsupported BMP: %d bpp, compression %d' % (bpp, comp))
+  return w, abs(h), (w * bpp + 31) // 32 * 4, offset, h > 0, layout
+
+def _convert( aIn, aOut, aCount, aLayout ) :
+  #Convert aCount pixels from aIn to big endian RGB565 in aOut.  aIn may be
+  # aOut for the 16 bit layouts.
+  if aLayout == _LE565 :
+    tftcolor.swap16(aIn, aOut, aCount)
+  elif aLayout == _LE555 :
+    for i in range(0, aCount * 2, 2) :
+      v = aIn[i] | (aIn[i + 1] << 8)
+      v = ((v & 0x7FE0) << 1) | ((v >> 4) & 0x20) | (v & 0x1F)
+      aOut[i] = v >> 8
+      aOut[i + 1] = v & 0xFF
+  else:
+    #BMP keeps b, g, r which read as BGR comes out RGB565.
+    tftcolor.rgb888(aIn, aOut, True, aCount)
+
+def _filerows( aStream, aOffset, aStride, aBottomUp, aLayout, h, sx, sy, sw, sh ) :
+  #Yield chunks of whole rows of the sw x sh area at sx, sy of an
+  # uncompressed image, read with readinto() into one preallocated buffer.
+  n = max(1, min(sh, BLITBUF // (sw * 2)))
+  out = bytearray(n * sw * 2)
+  mv = memoryview(out)
+  bpp = 3 if aLayout == _BGR888 else 2
+  inbuf = bytearray(sw * 3) if aLayout == _BGR888 else None
+  ln = sw * 2
+  #Rows next to each other in the file and in the area read in one go.
+  contiguous = aLayout == _BE565 and not aBottomUp and aStride == ln
+  row = sy
+  end = sy + sh
+  while row < end :
+    count = min(n, end - row)
+    if contiguous :
+      aStream.seek(aOffset + row * aStride)
+      aStream.readinto(mv[:count * ln])
+    else:
+      for i in range(count) :
+        r = h - 1 - (row + i) if aBottomUp else row + i
+        aStream.seek(aOffset + r * aStride + sx * bpp)
+        dest = mv[i * ln:(i + 1) * ln]
+        if inbuf is None :
+          aStream.readinto(dest)
+          if aLayout != _BE565 :
+            _convert(dest, dest, sw, aLayout)
+        else:
+          aStream.readinto(inbuf)
+          _convert(inbuf, dest, sw, aLayout)
+    row += count
+    yield mv[:count * ln]
+
+def _imagerows( aImage, sx, sy, sw, sh ) :
+  #Compressed TI images can only be decoded from the start, rows above the
+  # area are decoded and dropped.
+  y = 0
+  for line in aImage.rows() :
+    if y >= sy :
+      yield memoryview(line)[sx * 2:(sx + sw) * 2]
+      if y == sy + sh - 1 :
+        return
+    y += 1
+
+def blitfile( aTFT, aPath, aX, aY, aSrc = None, aWidth = None ) :
+  '''Draw an image file with its top left corner at aX, aY without loading
+     it into memory.  The file may be a TI image, a 16 or 24 bit BMP, or raw
+     big endian RGB565 in which case aWidth gives its width.  aSrc is an
+     optional (x, y, width, height) area of the image to draw, for example
+     one tile of a tile sheet.  The part inside the clip rectangle goes
+     through one display window, BLITBUF bytes at a time.'''
+  f = open(aPath, 'rb')
+  try:
+    magic = f.read(2)
+    f.seek(0)
+    img = None
+    if magic == MAGIC :
+      img = Image(f)
+      w, h = img.width, img.height
+      if img.kind == RAW :
+        offset = HEADER + len(img.palette)
+        stride = w * 2
+        bottomup = False
+        layout = _BE565
+        img = None
+    elif magic == b'BM' :
+      w, h, stride, offset, bottomup, layout = _bmpheader(f)
+    else:
+      if not aWidth :
+        raise ValueError('raw image needs aWidth')
+      f.seek(0, 2)
+      w = aWidth
+      h = f.tell() // (w * 2)
+      stride = w * 2
+      offset = 0
+      bottomup = False
+      layout = _BE565
+
+    sx, sy, sw, sh = aSrc if aSrc else (0, 0, w, h)
+    #Clip the source area to the image, then the destination to the TFT's
+    # clip rectangle.
+    if sx < 0 :
+      aX -= sx
+      sw += sx
+      sx = 0
+    if sy < 0 :
+      aY -= sy
+      sh += sy
+      sy = 0
+    sw = min(sw, w - sx)
+    sh = min(sh, h - sy)
+    cx0, cy0, cx1, cy1 = aTFT.cliprect()
+    if aX < cx0 :
+      sx += cx0 - aX
+      sw -= cx0 - aX
+      aX = cx0
+    if aY < cy0 :
+      sy += cy0 - aY
+      sh -= cy0 - aY
+      aY = cy0
+    sw = min(sw, cx1 - aX + 1)
+    sh = min(sh, cy1 - aY + 1)
+    if sw <= 0 or sh <= 0 :
+      return
+
+    if img is not None :
+      rows = _imagerows(img, sx, sy, sw, sh)
+    else:
+      rows = _filerows(f, offset, stride, bottomup, layout, h, sx, sy, sw, sh)
+    aTFT.stream(aX, aY, aX + sw - 1, aY + sh - 1, rows)
+  finally:
+    f.close()
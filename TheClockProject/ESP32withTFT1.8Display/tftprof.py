@@ -0,0 +1,169 @@
+#Bus traffic and timing counters for the ST7735 driver, normally turned on
+# with TFT.profile().  The counters are hooked in by replacing the driver's
+# spi and cs objects and its drawing methods with counting wrappers on the
+# instance, so when profiling is off the driver runs exactly as it always
+# does with no checks on the hot paths.
+#
+#Traffic is charged to the outermost primitive running when it happens
+# (text, not the char and image calls it makes) so nothing is counted
+# twice.  Nested calls are still counted as calls.  Traffic outside any
+# primitive (init, scrolling, show) goes to IDLE.
+
+import time
+
+#Methods wrapped for per primitive counts.
+PRIMITIVES = ('pixel', 'text', 'char', 'line', 'polyline', 'lines', 'hline',
+              'vline', 'rect', 'fillrect', 'circle', 'fillcircle', 'arc',
+              'roundrect', 'fillroundrect', 'fillgradient', 'fillpattern',
+              'filldither', 'fill', 'image', 'stream', 'blitfile', 'show',
+              'commit', 'flush')
+
+#Those of PRIMITIVES that are coroutines.  Their time includes whatever
+# other tasks ran while they waited.
+ASYNC = ('flush',)
+
+#Order of the counters in each entry of Profiler.stats().
+FIELDS = ('calls', 'us', 'cmds', 'bytes', 'writes', 'cs', 'windows')
+CALLS = 0
+US = 1
+CMDS = 2
+BYTES = 3
+WRITES = 4
+CS = 5
+WINDOWS = 6
+
+IDLE = '-'
+
+class _SPI(object) :
+  """Stand in for the driver's spi object counting writes."""
+
+  def __init__( self, aProf, aSPI ) :
+    self._prof = aProf
+    self._spi = aSPI
+    if hasattr(aSPI, 'write_async') :
+      self.write_async = self._writeasync
+
+  def _count( self, aData ) :
+    s = self._prof._cur
+    s[WRITES] += 1
+    if self._prof._tft._dc :
+      s[BYTES] += len(aData)
+    else:
+      s[CMDS] += 1
+
+  def write( self, aData ) :
+    self._count(aData)
+    self._spi.write(aData)
+
+  async def _writeasync( self, aData ) :
+    self._count(aData)
+    await self._spi.write_async(aData)
+
+  def __getattr__( self, aName ) :
+    return getattr(self._spi, aName)
+
+class Profiler(object) :
+  """Counts bus traffic and time per primitive for aTFT until remove()."""
+
+  def __init__( self, aTFT ) :
+    self._tft = aTFT
+    self._stats = {}
+    self._cur = self._entry(IDLE)
+    self._depth = 0
+    self._last = time.ticks_ms()
+    self._spi = aTFT.spi
+    self._cs = aTFT.cs
+    aTFT.spi = _SPI(self, aTFT.spi)
+    aTFT.cs = self._cspin
+    aTFT._sendwindow = self._window(aTFT._sendwindow)
+    for name in PRIMITIVES :
+      wrap = self._wrapasync if name in ASYNC else self._wrap
+      setattr(aTFT, name, wrap(name, getattr(aTFT, name)))
+
+  def remove( self ) :
+    '''Put the driver back the way it was.'''
+    t = self._tft
+    t.spi = self._spi
+    t.cs = self._cs
+    for name in PRIMITIVES + ('_sendwindow',) :
+      try:
+        delattr(t, name)
+      except AttributeError :
+        pass
+
+  def _entry( self, aName ) :
+    s = self._stats.get(aName)
+    if s is None :
+      s = self._stats[aName] = [0] * len(FIELDS)
+    return s
+
+  def _cspin( self, aValue = None ) :
+    if aValue is None :
+      return self._cs()
+    self._cur[CS] += 1
+    self._cs(aValue)
+
+  def _window( self, aFunc ) :
+    def window( x0, y0, x1, y1 ) :
+      self._cur[WINDOWS] += 1
+      aFunc(x0, y0, x1, y1)
+    return window
+
+  def _wrap( self, aName, aFunc ) :
+    def call( *args, **kw ) :
+      s = self._entry(aName)
+      s[CALLS] += 1
+      if self._depth :
+        return aFunc(*args, **kw)
+      self._depth = 1
+      self._cur = s
+      t = time.ticks_us()
+      try:
+        return aFunc(*args, **kw)
+      finally:
+        s[US] += time.ticks_diff(time.ticks_us(), t)
+        self._cur = self._entry(IDLE)
+        self._depth = 0
+    return call
+
+  def _wrapasync( self, aName, aFunc ) :
+    async def call( *args, **kw ) :
+      s = self._entry(aName)
+      s[CALLS] += 1
+      if self._depth :
+        return await aFunc(*args, **kw)
+      self._depth = 1
+      self._cur = s
+      t = time.ticks_us()
+      try:
+        return await aFunc(*args, **kw)
+      finally:
+        s[US] += time.ticks_diff(time.ticks_us(), t)
+        self._cur = self._entry(IDLE)
+        self._depth = 0
+    return call
+
+  def stats( self ) :
+    '''Return {primitive: {counter: value}} for every primitive used since
+       the last reset(), counters as in FIELDS.'''
+    return {name: dict(zip(FIELDS, s)) for name, s in self._stats.items()}
+
+  def reset( self ) :
+    '''Zero all the counters.'''
+    for s in self._stats.values() :
+      for i in range(len(s)) :
+        s[i] = 0
+
+  def dump( self ) :
+    '''Print one line of counters per primitive used, busiest first.'''
+    for name, s in sorted(self._stats.items(), key = lambda i: -i[1][US]) :
+      if s[CALLS] or s[WRITES] :
+        print('%-13s n=%d %dus cmd=%d data=%d wr=%d cs=%d win=%d' % ((name,) + tuple(s)))
+
+  def tick( self, aPeriod = 1000 ) :
+    '''Call from the main loop to dump() and reset() every aPeriod ms.'''
+    now = time.ticks_ms()
+    if time.ticks_diff(now, self._last) >= aPeriod :
+      self._last = now
+      self.dump()
+      self.reset()
@@ -0,0 +1,210 @@
+#Sprites over a static background for the ST7735 driver.  Sprites are
+# RGB565 images with an optional transparent color.  SpriteLayer.update()
+# redraws only where sprites were or now are: each such area is composed
+# (background, then the sprites over it) in one scratch buffer and sent
+# with a single image() call, so the cost of a frame follows the size of
+# the sprites rather than the screen.
+#
+#  layer = SpriteLayer(tft, TFT.NAVY)
+#  ball = layer.add(Sprite(8, 8, balldata, TFT.BLACK))
+#  while True :
+#    ball.move(x, y)
+#    layer.update()
+
+def _union( a, b ) :
+  return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _overlap( a, b ) :
+  return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+class Sprite(object) :
+  """aWidth x aHeight image of big endian RGB565 pixels in aData.  Pixels of
+     color aKey are transparent, aKey None makes the whole sprite opaque.
+     The opaque runs of every row are found once so drawing a sprite is a
+     few slice copies per row."""
+
+  def __init__( self, aWidth, aHeight, aData, aKey = None, aPos = (0, 0) ) :
+    self.width = aWidth
+    self.height = aHeight
+    self.key = aKey
+    self.x, self.y = aPos
+    self.visible = True
+    self._drawn = None                 #Screen rectangle last drawn to.
+    self._dirty = True
+    self._bg = None                    #Background under _bgrect, sized once.
+    self._bgrect = None
+    self.frame(aData)
+
+  def frame( self, aData ) :
+    '''Change the image, same size and color key.'''
+    self.data = memoryview(aData)
+    w = self.width
+    key = self.key
+    runs = []
+    for r in range(self.height) :
+      row = []
+      if key is None :
+        row.append((0, w))
+      else:
+        hi = key >> 8
+        lo = key & 0xFF
+        o = r * w * 2
+        start = -1
+        for i in range(w) :
+          clear = aData[o + i * 2] == hi and aData[o + i * 2 + 1] == lo
+          if clear and start >= 0 :
+            row.append((start, i))
+            start = -1
+          elif not clear and start < 0 :
+            start = i
+        if start >= 0 :
+          row.append((start, w))
+      runs.append(row)
+    self._runs = runs
+    self._dirty = True
+
+  def move( self, aX, aY ) :
+    '''Move the top left corner to aX, aY.'''
+    if aX != self.x or aY != self.y :
+      self.x = aX
+      self.y = aY
+      self._dirty = True
+
+  def show( self, aOn = True ) :
+    if aOn != self.visible :
+      self.visible = aOn
+      self._dirty = True
+
+  def rect( self ) :
+    '''Inclusive screen rectangle x0, y0, x1, y1.'''
+    return (self.x, self.y, self.x + self.width - 1, self.y + self.height - 1)
+
+  def _blit( self, aBuf, aArea ) :
+    #Copy the opaque pixels inside aArea into aBuf, which holds aArea.
+    ax0, ay0, ax1, ay1 = aArea
+    bw2 = (ax1 - ax0 + 1) * 2
+    w2 = self.width * 2
+    src = self.data
+    y0 = max(self.y, ay0)
+    y1 = min(self.y + self.height - 1, ay1)
+    lo = ax0 - self.x                  #Sprite columns inside the area.
+    hi = ax1 - self.x + 1
+    for y in range(y0, y1 + 1) :
+      r = y - self.y
+      so = r * w2
+      do = (y - ay0) * bw2 + (self.x - ax0) * 2
+      for a, b in self._runs[r] :
+        a = max(a, lo)
+        b = min(b, hi)
+        if a < b :
+          aBuf[do + a * 2:do + b * 2] = src[so + a * 2:so + b * 2]
+
+class SpriteLayer(object) :
+  """Sprites drawn over a background on aTFT.  aBackground is either an
+     RGB565 color or a function f(buf, x, y, w, h) filling buf with the
+     w x h pixels of background at x, y (from an image, a gradient...).
+     Background pixels fetched from a function are kept per sprite for the
+     rectangle it was last redrawn in alone, so a sprite animating in place
+     does not fetch its background again.  Call redraw() after changing
+     what the function returns."""
+
+  def __init__( self, aTFT, aBackground ) :
+    self.tft = aTFT
+    self.background = aBackground
+    self.sprites = []
+    self._scratch = bytearray(0)
+
+  def add( self, aSprite ) :
+    '''Add aSprite on top of the others and return it.'''
+    self.sprites.append(aSprite)
+    aSprite._drawn = None
+    aSprite._dirty = True
+    return aSprite
+
+  def remove( self, aSprite ) :
+    '''Take aSprite off and restore the background where it was.'''
+    self.sprites.remove(aSprite)
+    if aSprite._drawn :
+      self._compose([aSprite._drawn])
+
+  def redraw( self ) :
+    '''Draw every sprite again on the next update(), fetching the
+       background again.'''
+    for s in self.sprites :
+      s._dirty = True
+      s._bgrect = None
+
+  def update( self ) :
+    '''Redraw the areas of sprites that moved, changed or were shown or
+       hidden since the last update().'''
+    sw, sh = self.tft.size()
+    areas = []
+    for s in self.sprites :
+      if not s._dirty :
+        continue
+      s._dirty = False
+      old = s._drawn
+      new = s.rect() if s.visible else None
+      if new is not None :
+        #Clip to the screen.
+        new = (max(new[0], 0), max(new[1], 0), min(new[2], sw - 1), min(new[3], sh - 1))
+        if new[0] > new[2] or new[1] > new[3] :
+          new = None
+      s._drawn = new
+      if old and new and _overlap(old, new) :
+        areas.append(_union(old, new))
+      else:
+        for a in (old, new) :
+          if a :
+            areas.append(a)
+    self._compose(areas)
+
+  def _compose( self, aAreas ) :
+    #Merge overlapping areas so nothing is sent twice, then build and send
+    # each one.
+    merged = []
+    for a in aAreas :
+      i = 0
+      while i < len(merged) :
+        if _overlap(merged[i], a) :
+          a = _union(merged.pop(i), a)
+          i = 0
+        else:
+          i += 1
+      merged.append(a)
+    for a in merged :
+      x0, y0, x1, y1 = a
+      n = (x1 - x0 + 1) * (y1 - y0 + 1) * 2
+      if len(self._scratch) < n :
+        self._scratch = bytearray(n)
+      buf = memoryview(self._scratch)[:n]
+      self._fillbackground(buf, a)
+      for s in self.sprites :
+        if s.visible and _overlap(s.rect(), a) :
+          s._blit(buf, a)
+      self.tft.image(x0, y0, x1, y1, buf)
+
+  def _fillbackground( self, aBuf, aArea ) :
+    x0, y0, x1, y1 = aArea
+    w = x1 - x0 + 1
+    h = y1 - y0 + 1
+    bg = self.background
+    if not callable(bg) :
+      row = bytes(((bg >> 8) & 0xFF, bg & 0xFF)) * w
+      for o in range(0, w * h * 2, w * 2) :
+        aBuf[o:o + w * 2] = row
+      return
+    n = len(aBuf)
+    for s in self.sprites :
+      if s._bgrect == aArea :
+        aBuf[:] = memoryview(s._bg)[:n]
+        return
+    bg(aBuf, x0, y0, w, h)
+    #Keep it when the area is just one sprite's, it may stay put.
+    for s in self.sprites :
+      if s._drawn == aArea :
+        if s._bg is None :
+          s._bg = bytearray(s.width * s.height * 2)
+        s._bg[:n] = aBuf
+        s._bgrect = aArea
+        break
@@ -1,17 +1,38 @@
-import machine, time, network, urequests, gc
+import machine, time, network, gc, sntp, httptime, timesync
+try: import asyncio
+except ImportError: import uasyncio as asyncio
 
 # --- CONFIG ---
 WIFI_SSID = "SSID"
 WIFI_PASS = "PASSWORD"
-TIME_URL = "http://worldtimeapi.org/api/timezone/Asia/Kolkata"
+NTP_SERVERS = sntp.SERVERS  # Asked all at once, the first good answer wins
+TZ_OFFSET = 19800           # Local time minus UTC in seconds (IST), or a function of the UTC seconds
+TIME_URL = "http://worldtimeapi.org/api/timezone/Asia/Kolkata"  # Fallback when no NTP server answers
+SYNC_TIMEOUT_S = 5      # Give up on one time request after this
+RTC_VALID_YEAR = 2024   # An RTC at or past this year kept its time, show it at once
+TICK_SLACK_MS = 2       # Wake this long after the second changes
+GC_MIN_FREE = 20000     # Collect garbage only when free heap drops below this
 
 # --- HARDWARE ---
 SCK, MOSI, A0, RST, CS = 4, 5, 0, 1, 7
 spi = machine.SPI(1, baudrate=20000000, polarity=0, phase=0, sck=machine.Pin(SCK), mosi=machine.Pin(MOSI))
 a0, rst, cs = machine.Pin(A0, machine.Pin.OUT), machine.Pin(RST, machine.Pin.OUT), machine.Pin(CS, machine.Pin.OUT)
 
+FONT = {
+    '0':[0x3E,0x51,0x49,0x45,0x3E],'1':[0x00,0x42,0x7F,0x40,0x00],'2':[0x42,0x61,0x51,0x49,0x46],'3':[0x21,0x41,0x45,0x4B,0x31],
+    '4':[0x18,0x14,0x12,0x7F,0x10],'5':[0x27,0x45,0x45,0x45,0x39],'6':[0x3C,0x4A,0x49,0x49,0x30],'7':[0x01,0x71,0x09,0x05,0x03],
+    '8':[0x36,0x49,0x49,0x49,0x36],'9':[0x06,0x49,0x49,0x29,0x1E],':':[0x00,0x36,0x36,0x00,0x00],' ':[0x00,0x00,0x00,0x00,0x00],
+    '.':[0x00,0x60,0x60,0x00,0x00],'-':[0x00,0x08,0x08,0x08,0x00],'L':[0x7F,0x40,0x40,0x40,0x40],'O':[0x3E,0x41,0x41,0x41,0x3E],
+    'A':[0x7C,0x12,0x11,0x12,0x7C],'D':[0x7F,0x41,0x41,0x22,0x1C],'I':[0x00,0x41,0x7F,0x41,0x00],'N':[0x7F,0x04,0x08,0x10,0x7F],
+    'G':[0x3E,0x41,0x49,0x49,0x3A],'W':[0x7F,0x20,0x18,0x20,0x7F],'F':[0x7F,0x09,0x09,0x09,0x01],'P':[0x7F,0x09,0x09,0x09,0x06],
+    'M':[0x7F,0x02,0x0C,0x02,0x7F],'S':[0x26,0x49,0x49,0x49,0x32],'U':[0x3F,0x40,0x40,0x40,0x3F],'T':[0x01,0x01,0x7F,0x01,0x01],
+    'R':[0x7F,0x09,0x19,0x29,0x46],'E':[0x7F,0x49,0x49,0x49,0x41],'H':[0x7F,0x08,0x08,0x08,0x7F],'Y':[0x03,0x04,0x78,0x04,0x03],
+    'X':[0x63,0x14,0x08,0x14,0x63]
+}
+
 class CleanDisplay:
     def __init__(self):
+        self.atlas, self.scratch = {}, {}
         self.reset()
         self.init_tft()
     def write_cmd(self, cmd):
@@ -34,27 +55,72 @@ class CleanDisplay:
         self.set_window(x, y, x + w - 1, y + h - 1)
         chunk = bytearray([color >> 8, color & 0xFF] * w)
         for _ in range(h): self.write_data(chunk)
-    def draw_char(self, x, y, char, color, size=1):
-        font = {
-            '0':[0x3E,0x51,0x49,0x45,0x3E],'1':[0x00,0x42,0x7F,0x40,0x00],'2':[0x42,0x61,0x51,0x49,0x46],'3':[0x21,0x41,0x45,0x4B,0x31],
-            '4':[0x18,0x14,0x12,0x7F,0x10],'5':[0x27,0x45,0x45,0x45,0x39],'6':[0x3C,0x4A,0x49,0x49,0x30],'7':[0x01,0x71,0x09,0x05,0x03],
-            '8':[0x36,0x49,0x49,0x49,0x36],'9':[0x06,0x49,0x49,0x29,0x1E],':':[0x00,0x36,0x36,0x00,0x00],' ':[0x00,0x00,0x00,0x00,0x00],
-            '.':[0x00,0x60,0x60,0x00,0x00],'-':[0x00,0x08,0x08,0x08,0x00],'L':[0x7F,0x40,0x40,0x40,0x40],'O':[0x3E,0x41,0x41,0x41,0x3E],
-            'A':[0x7C,0x12,0x11,0x12,0x7C],'D':[0x7F,0x41,0x41,0x22,0x1C],'I':[0x00,0x41,0x7F,0x41,0x00],'N':[0x7F,0x04,0x08,0x10,0x7F],
-            'G':[0x3E,0x41,0x49,0x49,0x3A],'W':[0x7F,0x20,0x18,0x20,0x7F],'F':[0x7F,0x09,0x09,0x09,0x01],'P':[0x7F,0x09,0x09,0x09,0x06],
-            'M':[0x7F,0x02,0x0C,0x02,0x7F],'S':[0x26,0x49,0x49,0x49,0x32],'U':[0x3F,0x40,0x40,0x40,0x3F],'T':[0x01,0x01,0x7F,0x01,0x01],
-            'R':[0x7F,0x09,0x19,0x29,0x46],'E':[0x7F,0x49,0x49,0x49,0x41],'H':[0x7F,0x08,0x08,0x08,0x7F],'Y':[0x03,0x04,0x78,0x04,0x03],
-            'X':[0x63,0x14,0x08,0x14,0x63]
-        }
-        bitmap = font.get(char, font[' '])
-        for col in range(5):
-            line = bitmap[col]
-            for row in range(8):
-                if (line >> row) & 1: self.fill_rect(x+col*size, y+row*size, size, size, color)
+    def build_atlas(self, chars, color, size, bg=0x0000):
+        # Pre-render chars once so drawing them is a single block write
+        for c in chars:
+            buf = bytearray(96 * size * size)
+            self.render(c, color, size, bg, buf)
+            self.atlas[(c, color, size, bg)] = buf
+    def render(self, char, color, size, bg, buf):
+        # Expand a glyph into an opaque (6*size)x(8*size) RGB565 block, the
+        # 6th column being the gap between characters
+        bitmap = FONT.get(char, FONT[' '])
+        fh, fl, bh, bl = color >> 8, color & 0xFF, bg >> 8, bg & 0xFF
+        ln = 12 * size
+        i = 0
+        for row in range(8):
+            start = i
+            for col in range(6):
+                on = col < 5 and (bitmap[col] >> row) & 1
+                hi, lo = (fh, fl) if on else (bh, bl)
+                for _ in range(size):
+                    buf[i] = hi; buf[i + 1] = lo; i += 2
+            for _ in range(size - 1):
+                buf[i:i + ln] = buf[start:start + ln]; i += ln
+    def draw_char(self, x, y, char, color, size=1, bg=0x0000):
+        # Opaque: the glyph comes with its background, so no clear is needed
+        if x < 0 or y < 0 or x + 6 * size > 160 or y + 8 * size > 128: return
+        buf = self.atlas.get((char, color, size, bg))
+        if buf is None:
+            buf = self.scratch.get(size)
+            if buf is None: buf = self.scratch[size] = bytearray(96 * size * size)
+            self.render(char, color, size, bg, buf)
+        self.set_window(x, y, x + 6 * size - 1, y + 8 * size - 1)
+        self.write_data(buf)
 
 tft = CleanDisplay()
 
-def animate_bar(text, duration_ms=1000):
+class Field:
+    # A row of character cells that remembers what it shows, so drawing a
+    # new string only redraws the cells whose character changed.
+    def __init__(self, x, y, color, size=2, pitch=14):
+        self.x, self.y, self.color, self.size, self.pitch = x, y, color, size, pitch
+        self.shown = ""
+    def draw(self, text):
+        w, h = 6 * self.size, 8 * self.size
+        for i, c in enumerate(text):
+            if i < len(self.shown) and self.shown[i] == c: continue
+            x = self.x + i * self.pitch
+            tft.draw_char(x, self.y, c, self.color, size=self.size)
+        for i in range(len(text), len(self.shown)):
+            tft.fill_rect(self.x + i * self.pitch, self.y, w, h, 0x0000)
+        self.shown = text
+
+class Bar:
+    # Progress bar that only paints the part that changed since last time.
+    def __init__(self, x, y, w, h, color, bg):
+        self.x, self.y, self.w, self.h, self.color, self.bg = x, y, w, h, color, bg
+        self.shown = -1
+    def draw(self, width):
+        if self.shown < 0:
+            tft.fill_rect(self.x, self.y, self.w, self.h, self.bg); self.shown = 0
+        if width > self.shown:
+            tft.fill_rect(self.x + self.shown, self.y, width - self.shown, self.h, self.color)
+        elif width < self.shown:
+            tft.fill_rect(self.x + width, self.y, self.shown - width, self.h, self.bg)
+        self.shown = width
+
+async def animate_bar(text, duration_ms=1000):
     # Centered Text
     tft.fill_rect(0, 45, 160, 10, 0x0000)
     x_text = 80 - (len(text)*7 // 2)
@@ -66,86 +132,113 @@ def animate_bar(text, duration_ms=1000):
     tft.fill_rect(30, 65, 100, 10, 0xFFFF) # White Border
     tft.fill_rect(32, 67, 96, 6, 0x0000)   # Black Inside
     
-    # Animated Fill
+    # Animated Fill, the other tasks run while it waits
     steps = 20
     for i in range(steps + 1):
         w = int((i / steps) * 96)
         tft.fill_rect(32, 67, w, 6, 0x07E0) # Green Fill
-        time.sleep_ms(duration_ms // steps)
+        await asyncio.sleep_ms(duration_ms // steps)
 
-def sync_time_persistent():
+wifi_up = asyncio.Event()   # Set while WiFi is connected
+synced = asyncio.Event()    # Set once the RTC holds the real time
+rtc_clock = timesync.Discipline(TZ_OFFSET)   # Drift correction and resync timing
+
+async def wifi_task():
+    # Keep WiFi connected, reconnecting whenever it drops
     wlan = network.WLAN(network.STA_IF)
-    while not wlan.isconnected():
-        animate_bar("ATRALIX", 800)
-        wlan.active(False); time.sleep_ms(100); wlan.active(True)
-        wlan.connect(WIFI_SSID, WIFI_PASS)
+    while True:
+        if wlan.isconnected():
+            wifi_up.set()
+            await asyncio.sleep(5)
+            continue
+        wifi_up.clear()
+        try:
+            wlan.active(False); await asyncio.sleep_ms(100); wlan.active(True)
+            wlan.connect(WIFI_SSID, WIFI_PASS)
+        except OSError:
+            # The radio refused, try again from the top
+            await asyncio.sleep(1)
+            continue
         # Quick check loop
         for _ in range(5):
             if wlan.isconnected(): break
-            time.sleep_ms(500)
-    
-    synced = False
-    while not synced:
-        animate_bar("LOADING", 800)
+            await asyncio.sleep_ms(500)
+
+async def sync_task():
+    # Set the RTC whenever WiFi is up, then again when rtc_clock says, which
+    # is sparse once it knows the RTC's drift and backs off on failures
+    while True:
+        await wifi_up.wait()
         try:
-            r = urequests.get(TIME_URL, timeout=5)
-            j = r.json()
-            dt = j['datetime']
-            y, m, d = int(dt[0:4]), int(dt[5:7]), int(dt[8:10])
-            hr, mn, sc = int(dt[11:13]), int(dt[14:16]), int(dt[17:19])
-            machine.RTC().datetime((y, m, d, j['day_of_week'], hr, mn, sc, 0))
-            r.close(); synced = True
-        except:
+            try:
+                delay = rtc_clock.measured((await sntp.query(NTP_SERVERS))[0])
+            except OSError:
+                machine.RTC().datetime(await asyncio.wait_for(httptime.fetch(TIME_URL), SYNC_TIMEOUT_S))
+                delay = rtc_clock.stepped()
+            synced.set()
+        except Exception:
             gc.collect()
+            delay = rtc_clock.failed()
+        await asyncio.sleep(delay)
 
-def run():
-    tft.fill_rect(0, 0, 160, 128, 0x0000)
-    sync_time_persistent()
+async def wait_next_second():
+    # Sleep until just past the next RTC second instead of polling, so the
+    # seconds digit changes on the edge with one wakeup per second.
+    # time.time_ns() carries the RTC's sub-second part.
+    await asyncio.sleep_ms(1000 - time.time_ns() // 1000000 % 1000 + TICK_SLACK_MS)
+
+async def display_task():
+    # Loading animation until the RTC has the time, then the clock face,
+    # which keeps running while the other tasks resync in the background
+    while not synced.is_set():
+        await animate_bar("LOADING" if wifi_up.is_set() else "ATRALIX", 800)
     tft.fill_rect(0, 0, 160, 128, 0x0000)
     
     days = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
+    # 1. Header, static so drawn once
+    x_in = 60
+    for c in "INDIA": tft.draw_char(x_in, 5, c, 0xFBE0, size=1); x_in += 8
+
+    date = Field(15, 22, 0x07FF)
+    tft.build_atlas("0123456789:", 0xFFFF, 2)
+    clock = Field(25, 52, 0xFFFF)
+    ampm = Field(65, 80, 0xF81F, size=1, pitch=8)
+    bar = Bar(10, 105, 140, 4, 0x07E0, 0x3186)
     last_sec = -1
     
     while True:
-        try:
-            lt = time.localtime()
-            if lt[5] != last_sec:
-                # 1. Header
-                x_in = 60
-                for c in "INDIA": tft.draw_char(x_in, 5, c, 0xFBE0, size=1); x_in += 8
-
-                # 2. Date & Day
-                day_name = days[lt[6]] 
-                date_str = "{:02d}-{:02d} {}".format(lt[2], lt[1], day_name)
-                dx = 15
-                for c in date_str:
-                    tft.fill_rect(dx, 22, 12, 16, 0x0000)
-                    tft.draw_char(dx, 22, c, 0x07FF, size=2); dx += 14
-
-                # 3. Time 12H
-                h24, m, s = lt[3], lt[4], lt[5]
-                ampm = "AM" if h24 < 12 else "PM"
-                h12 = h24 % 12 or 12
-                time_str = "{:02d}:{:02d}:{:02d}".format(h12, m, s)
-                tx = 25
-                for char in time_str:
-                    tft.fill_rect(tx, 52, 12, 16, 0x0000)
-                    tft.draw_char(tx, 52, char, 0xFFFF, size=2); tx += 14 
-                
-                # 4. AM/PM
-                tft.fill_rect(65, 80, 30, 10, 0x0000)
-                tft.draw_char(65, 80, ampm[0], 0xF81F, size=1)
-                tft.draw_char(73, 80, ampm[1], 0xF81F, size=1)
-
-                # 5. Continuous Seconds Bar
-                bar_width = int((s / 59) * 140)
-                tft.fill_rect(10, 105, 140, 4, 0x3186) 
-                tft.fill_rect(10, 105, bar_width, 4, 0x07E0) 
-
-                last_sec = s
-            time.sleep(0.1)
-            gc.collect()
-        except: machine.reset()
+        lt = time.localtime()
+        if lt[5] == last_sec:
+            # Woke just before the RTC ticked over
+            await asyncio.sleep_ms(TICK_SLACK_MS)
+            continue
+        # 2. Date & Day, only changes at midnight
+        date.draw("{:02d}-{:02d} {}".format(lt[2], lt[1], days[lt[6]]))
+
+        # 3. Time 12H
+        h24, m, s = lt[3], lt[4], lt[5]
+        h12 = h24 % 12 or 12
+        clock.draw("{:02d}:{:02d}:{:02d}".format(h12, m, s))
+        
+        # 4. AM/PM
+        ampm.draw("AM" if h24 < 12 else "PM")
+
+        # 5. Continuous Seconds Bar
+        bar.draw(int((s / 59) * 140))
+
+        last_sec = s
+        if gc.mem_free() < GC_MIN_FREE: gc.collect()
+        await wait_next_second()
+
+async def main():
+    if time.localtime()[0] >= RTC_VALID_YEAR: synced.set()
+    # gather() so a task dying ends run() and the reset in its caller
+    # happens, instead of the clock going on without it
+    await asyncio.gather(wifi_task(), sync_task(), rtc_clock.correct_task(), display_task())
+
+def run():
+    tft.fill_rect(0, 0, 160, 128, 0x0000)
+    asyncio.run(main())
 
 try: run()
 except: machine.reset()
@@ -0,0 +1,105 @@
+# Time over HTTP for the WiFi clocks, the fallback when no NTP server
+# answers.
+#
+# The response is scanned as it arrives instead of being read whole and
+# handed to json.loads(): only a small window of the stream is held at a
+# time, the wanted fields are picked out of it and parsed digit by digit
+# into the RTC tuple, and the connection is closed as soon as the last one
+# is found.  So the heap needed does not grow with the size of the answer
+# and no dict of fields nobody reads is built.
+#
+# Which fields are wanted and what they set is a tuple of (key, extractor)
+# pairs, an extractor being f(value, t) with value the raw bytes of the
+# JSON value (no quotes) and t the RTC tuple as a list to fill in.  Another
+# API is one more tuple, e.g. for timeapi.io:
+#
+#   TIMEAPI_IO = ((b'"dateTime"', iso_datetime),)
+#   t = await httptime.fetch("http://timeapi.io/api/time/current/zone?timeZone=Asia/Kolkata", TIMEAPI_IO)
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+CHUNK = 64      # Bytes read from the socket at a time
+KEEP = 64       # Bytes kept between reads so a key and its value can span them
+
+def _num(v, a, b):
+    # Decimal digits v[a:b] as an int, without slicing
+    n = 0
+    for i in range(a, b):
+        n = n * 10 + v[i] - 48
+    return n
+
+def iso_datetime(v, t):
+    # "2024-05-01T13:45:07.123456+05:30", taken as the local time it shows
+    t[0], t[1], t[2] = _num(v, 0, 4), _num(v, 5, 7), _num(v, 8, 10)
+    t[4], t[5], t[6] = _num(v, 11, 13), _num(v, 14, 16), _num(v, 17, 19)
+    if len(v) > 20 and v[19] == 46:     # Fraction of a second after a '.'
+        e = 20
+        while e < len(v) and e < 26 and 48 <= v[e] <= 57: e += 1
+        t[7] = _num(v, 20, e) * 10 ** (26 - e)
+
+def number(slot):
+    # Extractor putting an integer value into t[slot]
+    def f(v, t):
+        t[slot] = -_num(v, 1, len(v)) if v[0] == 45 else _num(v, 0, len(v))
+    return f
+
+def sunday_weekday(v, t):
+    # Day of the week counted from Sunday = 0 into the RTC's Monday = 0
+    t[3] = (_num(v, 0, len(v)) + 6) % 7
+
+WORLDTIMEAPI = ((b'"datetime"', iso_datetime), (b'"day_of_week"', sunday_weekday))
+
+def _value(data, i):
+    # (start, end) of the value after the key ending at data[i], end being
+    # -1 when the value has not all arrived yet
+    n = len(data)
+    while i < n and data[i] in b' \t\r\n:': i += 1
+    if i >= n: return i, -1
+    if data[i] == 34:                   # A string, up to the closing quote
+        return i + 1, data.find(b'"', i + 1)
+    e = i
+    while e < n and data[e] not in b',}] \t\r\n': e += 1
+    return i, (e if e < n else -1)
+
+async def fetch(url, fields=WORLDTIMEAPI):
+    # HTTP GET of url, returns the RTC tuple the fields filled in.  Raises
+    # OSError on a non-200 answer and ValueError when the answer ends
+    # before every field was seen.
+    host, path = url.split("/", 3)[2:]
+    host, _, port = host.partition(":")
+    reader, writer = await asyncio.open_connection(host, int(port or 80))
+    try:
+        writer.write("GET /{} HTTP/1.0\r\nHost: {}\r\nUser-Agent: ESP32-Wu\r\n\r\n".format(path, host).encode())
+        await writer.drain()
+        t = [0] * 8
+        todo = list(fields)
+        data = b""
+        status = False
+        while todo:
+            chunk = await reader.read(CHUNK)
+            if not chunk: break
+            data += chunk
+            if not status:
+                if len(data) < 12: continue
+                if data[9:12] != b"200": raise OSError(data[:12])
+                status = True
+            cut = len(data) - KEEP
+            for f in todo[:]:
+                i = data.find(f[0])
+                if i < 0: continue
+                a, e = _value(data, i + len(f[0]))
+                if e < 0:
+                    # Value not all here yet, hold on to it for the next read
+                    cut = min(cut, i)
+                    continue
+                f[1](data[a:e], t)
+                todo.remove(f)
+            if cut > 0: data = data[cut:]
+        if todo: raise ValueError(todo[0][0])
+        return tuple(t)
+    finally:
+        writer.close()
+        await writer.wait_closed()
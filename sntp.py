@@ -0,0 +1,138 @@
+# SNTP client for the WiFi clocks.
+#
+# One 48 byte request goes to each configured server from a single
+# non-blocking UDP socket and the first valid reply wins, so a slow or dead
+# server costs nothing.  The round trip is measured and the reply corrected
+# for it.  Replies are only accepted when they echo the timestamp we sent,
+# which throws away stale, duplicated and spoofed packets.
+#
+# Works the same under CPython, so it can be tried on the host against a
+# local stand-in server:
+#
+#   offset_us, rtt_us, addr = asyncio.run(sntp.query(("127.0.0.1",), 12300))
+
+import socket
+import struct
+import time
+import random
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+SERVERS = ("pool.ntp.org", "time.google.com", "time.cloudflare.com")
+PORT = 123
+TIMEOUT_MS = 3000
+
+# Seconds from the NTP era (1900) to this port's time epoch, which is 2000
+# on some MicroPython ports and 1970 everywhere else
+NTP_DELTA = 2208988800 + (946684800 if time.gmtime(0)[0] == 2000 else 0)
+
+ETIMEDOUT = 110
+
+# Server addresses by name, looked up once since getaddrinfo() blocks
+_addrs = {}
+
+_sleep_ms = getattr(asyncio, "sleep_ms", None) or (lambda ms: asyncio.sleep(ms / 1000))
+
+def now_us():
+    # Local clock in microseconds since the epoch
+    return time.time_ns() // 1000
+
+def to_ntp(us):
+    # Epoch microseconds to a 64 bit NTP timestamp
+    s, u = divmod(us, 1000000)
+    return ((s + NTP_DELTA) << 32) | ((u << 32) // 1000000)
+
+def from_ntp(ts):
+    # 64 bit NTP timestamp to epoch microseconds
+    return ((ts >> 32) - NTP_DELTA) * 1000000 + (((ts & 0xFFFFFFFF) * 1000000) >> 32)
+
+def check(data, sent, t4):
+    # (offset_us, rtt_us) from a reply received at local time t4, or None if
+    # it is not a usable answer to one of the requests in sent, which maps
+    # the transmit timestamp of each request to its local send time
+    if len(data) < 48: return None
+    mode, stratum = data[0], data[1]
+    # Server mode, clock synchronized (leap indicator not 3), stratum 1-15
+    # (0 is a kiss-o'-death telling us to go away)
+    if mode & 7 != 4 or mode >> 6 == 3 or not 0 < stratum < 16: return None
+    orig, recv, xmit = struct.unpack_from("!QQQ", data, 24)
+    if not xmit or orig not in sent: return None
+    t1 = sent.pop(orig)
+    t2, t3 = from_ntp(recv), from_ntp(xmit)
+    # Standard NTP on-wire calculation: the server's clock minus ours,
+    # assuming the path takes as long each way
+    return ((t2 - t1) + (t3 - t4)) // 2, (t4 - t1) - (t3 - t2)
+
+def _resolve(host, port):
+    addr = _addrs.get((host, port))
+    if addr is None:
+        addr = _addrs[(host, port)] = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)[0][-1]
+    return addr
+
+async def query(servers=SERVERS, port=PORT, timeout_ms=TIMEOUT_MS):
+    # Ask all servers at once, returns (offset_us, rtt_us, address) from the
+    # first valid reply, offset_us being what to add to now_us() for the
+    # real UTC time.  Raises OSError(ETIMEDOUT, reasons) when no server
+    # answers in time.  Name lookups block so each server is looked up
+    # once, and again only after it failed; the wait for replies does not
+    # block.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    sent = {}
+    hosts = {}
+    errors = []
+    try:
+        for host in servers:
+            try:
+                addr = _resolve(host, port)
+                pkt = bytearray(48)
+                pkt[0] = 0x23                   # Version 4, client mode
+                t1 = now_us()
+                # Random low bits so a reply can't be forged from the send time
+                ts = to_ntp(t1) ^ random.getrandbits(16)
+                struct.pack_into("!Q", pkt, 40, ts)
+                sock.sendto(pkt, addr)
+                sent[ts] = t1
+                hosts[ts] = host
+            except OSError as e:
+                _addrs.pop((host, port), None)
+                errors.append("{}: {}".format(host, e))
+        deadline = now_us() + timeout_ms * 1000
+        while sent and now_us() < deadline:
+            try:
+                data, addr = sock.recvfrom(64)
+            except OSError:
+                await _sleep_ms(2)
+                continue
+            r = check(data, sent, now_us())
+            if r: return r + (addr,)
+    finally:
+        sock.close()
+    # Nobody answered, so look every silent server up again next time in
+    # case its address moved
+    for ts in sent:
+        _addrs.pop((hosts[ts], port), None)
+        errors.append("{}: no valid reply".format(hosts[ts]))
+    raise OSError(ETIMEDOUT, "; ".join(errors))
+
+def local_time(offset_us=0, tz=0):
+    # (seconds, microseconds) of local time now.  tz is the UTC offset in
+    # seconds or a function taking the UTC seconds and returning it, for
+    # daylight saving rules.
+    s, u = divmod(now_us() + offset_us, 1000000)
+    return s + (tz(s) if callable(tz) else tz), u
+
+def set_rtc(offset_us, tz=0):
+    # Set machine.RTC() to local time corrected by offset_us
+    import machine
+    s, u = local_time(offset_us, tz)
+    t = time.gmtime(s)
+    machine.RTC().datetime((t[0], t[1], t[2], t[6], t[3], t[4], t[5], u))
+
+async def sync(tz=0, servers=SERVERS, port=PORT, timeout_ms=TIMEOUT_MS):
+    # Query the servers and set the RTC, returns what query() did
+    r = await query(servers, port, timeout_ms)
+    set_rtc(r[0], tz)
+    return r
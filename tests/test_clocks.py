@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, 'TheClockProject', 'ESP32withTFT1.8Display'))
+
+import tftemu
+tftemu.install()
+
+SCRIPTS = ('basicclockwifi.py', 'detailedclock.py')
+
+if not hasattr(asyncio, 'sleep_ms'):
+    asyncio.sleep_ms = lambda ms: asyncio.sleep(ms / 1000)
+
+def load(name):
+    ns = tftemu.loadscript(os.path.join(ROOT, name))
+    ns['wifi_up'] = asyncio.Event()
+    ns['synced'] = asyncio.Event()
+    return ns
+
+async def forever():
+    while True:
+        await asyncio.sleep(1)
+
+@pytest.mark.parametrize('name', SCRIPTS)
+def test_dead_task_ends_main(name):
+    # A task dying must reach run()'s caller, which resets the board
+    ns = load(name)
+    async def broken():
+        await asyncio.sleep(0)
+        raise RuntimeError('task died')
+    for t in ('wifi_task', 'display_task'):
+        ns[t] = forever
+    ns['sync_task'] = broken
+    with pytest.raises(RuntimeError):
+        asyncio.run(asyncio.wait_for(ns['main'](), 5))
+
+class FlakyWLAN:
+    # Refuses the first connect, then connects
+    calls = 0
+    def __init__(self, mode): self.up = False
+    def isconnected(self): return self.up
+    def active(self, on): pass
+    def connect(self, ssid, key):
+        FlakyWLAN.calls += 1
+        if FlakyWLAN.calls == 1:
+            raise OSError('Wifi Internal Error')
+        self.up = True
+
+@pytest.mark.parametrize('name', SCRIPTS)
+def test_wifi_task_retries_after_connect_error(name):
+    ns = load(name)
+    FlakyWLAN.calls = 0
+    ns['network'] = types.SimpleNamespace(WLAN=FlakyWLAN, STA_IF=0)
+    async def run():
+        t = asyncio.create_task(ns['wifi_task']())
+        await asyncio.wait_for(ns['wifi_up'].wait(), 5)
+        t.cancel()
+    asyncio.run(run())
+    assert FlakyWLAN.calls == 2
+
+CLOCKS = SCRIPTS + (os.path.join('TheClockProject', 'ESP32withTFT1.8Display', 'clock.py'),)
+
+def display(name):
+    # The script's CleanDisplay on an emulated panel, with the cells drawn logged
+    ns = load(name)
+    panel = tftemu.Panel(ns['A0'], ns['CS'], ns['RST'], 1)
+    tft = ns['tft'] = ns['CleanDisplay']()
+    tft.fill_rect(0, 0, 160, 128, 0x0000)
+    drawn = []
+    draw_char = tft.draw_char
+    def logged(x, y, c, color, size=1, bg=0x0000):
+        drawn.append((x, c))
+        draw_char(x, y, c, color, size, bg)
+    tft.draw_char = logged
+    return ns, panel, drawn
+
+@pytest.mark.parametrize('name', CLOCKS)
+def test_field_redraws_changed_cells(name):
+    ns, panel, drawn = display(name)
+    ns['tft'].build_atlas('0123456789:', 0xFFFF, 2)
+    clock = ns['Field'](30, 55, 0xFFFF)
+    clock.draw('12:34:56')
+    assert [c for _, c in drawn] == list('12:34:56')
+    del drawn[:]
+    clock.draw('12:34:59')
+    assert drawn == [(30 + 7 * 14, '9')]
+    del drawn[:]
+    clock.draw('12:40:00')
+    assert drawn == [(30 + i * 14, '12:40:00'[i]) for i in (3, 4, 6, 7)]
+    # Same picture as drawing the last string on a clear screen
+    panel.detach()
+    want_ns, want, _ = display(name)
+    want_ns['Field'](30, 55, 0xFFFF).draw('12:40:00')
+    want.detach()
+    assert panel.view() == want.view()
+    assert any(any(row) for row in want.view())
+
+@pytest.mark.parametrize('name', CLOCKS)
+def test_draw_char_off_screen_draws_nothing(name):
+    ns, panel, _ = display(name)
+    before = panel.view()
+    for x, y in ((-1, 0), (0, -1), (160 - 11, 0), (0, 128 - 15)):
+        ns['tft'].draw_char(x, y, '8', 0xFFFF, size=2)
+    panel.detach()
+    assert panel.view() == before
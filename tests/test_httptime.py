@@ -0,0 +1,84 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httptime
+
+BODY = json.dumps({
+    "abbreviation": "IST", "client_ip": "1.2.3.4",
+    "datetime": "2026-10-18T23:41:07.123456+05:30",
+    "day_of_week": 0, "day_of_year": 291, "dst": False, "dst_from": None,
+    "dst_offset": 0, "dst_until": None, "raw_offset": 19800,
+    "timezone": "Asia/Kolkata", "unixtime": 1792347067,
+    "utc_datetime": "2026-10-18T18:11:07.123456+00:00",
+    "utc_offset": "+05:30", "week_number": 42}, indent=1).encode()
+
+# Sunday 18 October 2026, weekday 6 counting from Monday
+WANT = (2026, 10, 18, 6, 23, 41, 7, 123456)
+
+def fetch(body, status=b"200 OK", step=None):
+    # httptime.fetch() against a stand-in server sending the response in
+    # pieces of step bytes (all at once when None)
+    async def handler(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        data = b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n\r\n" + body
+        step_ = step or len(data)
+        try:
+            for i in range(0, len(data), step_):
+                writer.write(data[i:i + step_])
+                await writer.drain()
+                await asyncio.sleep(0)
+        except ConnectionError:
+            pass
+        writer.close()
+    async def run():
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.wait_for(
+                httptime.fetch("http://127.0.0.1:%d/api/timezone/Asia/Kolkata" % port), 10)
+        finally:
+            server.close()
+    return asyncio.run(run())
+
+def test_every_chunk_size():
+    for step in range(1, 2 * (httptime.CHUNK + httptime.KEEP) + 2):
+        assert fetch(BODY, step=step) == WANT, step
+
+def test_whole_body():
+    assert fetch(BODY) == WANT
+
+def test_non_200_raises_oserror():
+    with pytest.raises(OSError):
+        fetch(b'{"error": "unknown location"}', status=b"404 Not Found")
+
+def test_missing_field_raises_valueerror():
+    body = json.dumps({"datetime": "2026-10-18T23:41:07+05:30", "dst": False}).encode()
+    with pytest.raises(ValueError):
+        fetch(body)
+
+def test_weekday_from_sunday():
+    for sunday, monday in ((0, 6), (1, 0), (6, 5)):
+        body = BODY.replace(b'"day_of_week": 0', b'"day_of_week": %d' % sunday)
+        assert fetch(body)[3] == monday
+
+def test_returns_without_waiting_for_the_rest():
+    # The server sends the fields then stalls, fetch() must not wait for it
+    async def handler(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\n\r\n" + BODY[:BODY.index(b'"day_of_year"')])
+        await writer.drain()
+        await asyncio.sleep(30)
+    async def run():
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.wait_for(httptime.fetch("http://127.0.0.1:%d/" % port), 2)
+        finally:
+            server.close()
+    assert asyncio.run(run()) == WANT
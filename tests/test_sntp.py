@@ -0,0 +1,67 @@
+import asyncio
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sntp
+
+if not hasattr(asyncio, 'sleep_ms'):
+    asyncio.sleep_ms = lambda ms: asyncio.sleep(ms / 1000)
+
+OFFSET_S = 100
+
+def server(stratum=2):
+    # Stand-in NTP server OFFSET_S ahead of the host clock, returns its port
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(('127.0.0.1', 0))
+    def run():
+        while True:
+            d, a = s.recvfrom(64)
+            ts = struct.pack('!Q', int((time.time() + OFFSET_S + 2208988800) * 2 ** 32))
+            s.sendto(bytes([0x24, stratum, 0, 0]) + b'\0' * 20 + d[40:48] + ts + ts, a)
+    threading.Thread(target=run, daemon=True).start()
+    return s.getsockname()[1]
+
+@pytest.fixture
+def lookups(monkeypatch):
+    # Names looked up, with 'localhost' the only one that resolves
+    calls = []
+    def getaddrinfo(host, port, *args):
+        calls.append(host)
+        if host != 'localhost':
+            raise OSError(-2, 'no such host')
+        return [(socket.AF_INET, socket.SOCK_DGRAM, 0, '', ('127.0.0.1', port))]
+    monkeypatch.setattr(sntp.socket, 'getaddrinfo', getaddrinfo)
+    monkeypatch.setattr(sntp, '_addrs', {})
+    return calls
+
+def test_query_offset():
+    port = server()
+    offset, rtt, addr = asyncio.run(sntp.query(('127.0.0.1',), port, 1000))
+    assert abs(offset - OFFSET_S * 1000000) < 10000
+    assert addr == ('127.0.0.1', port)
+
+def test_addresses_are_looked_up_once(lookups, capsys):
+    port = server()
+    for _ in range(3):
+        asyncio.run(sntp.query(('localhost', 'bad.invalid'), port, 1000))
+    # A failed lookup is tried again, a good one is kept
+    assert lookups.count('localhost') == 1
+    assert lookups.count('bad.invalid') == 3
+    assert capsys.readouterr().out == ''
+
+def test_silent_servers_are_looked_up_again(lookups):
+    port = server(stratum=0)            # Kiss-o'-death only
+    for _ in range(2):
+        with pytest.raises(OSError) as e:
+            asyncio.run(sntp.query(('localhost', 'bad.invalid'), port, 200))
+        assert e.value.errno == sntp.ETIMEDOUT
+        assert 'bad.invalid' in str(e.value) and 'localhost: no valid reply' in str(e.value)
+    assert lookups.count('localhost') == 2
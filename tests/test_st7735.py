@@ -0,0 +1,284 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'TheClockProject', 'ESP32withTFT1.8Display'))
+
+import tftemu
+tftemu.install()
+
+def panel() :
+  t, p = tftemu.make('initr')
+  t.rotation(0)
+  t.fill(0)
+  return t, p
+
+def screen( t, p, aX, aY, aW, aH ) :
+  #RGB565 pixels of the screen rectangle, rows of columns.
+  x0, y0 = t._offset
+  v = p.view()
+  return [v[y0 + y][x0 + aX:x0 + aX + aW] for y in range(aY, aY + aH)]
+
+def test_fillgradient_negative_size() :
+  for vertical in (True, False) :
+    for dither in (False, True) :
+      t, p = panel()
+      t.fillgradient((10, 20), (40, 30), t.NAVY, t.PURPLE, vertical, dither)
+      want = screen(t, p, 10, 20, 40, 30)
+      t, p = panel()
+      t.fillgradient((49, 49), (-40, -30), t.NAVY, t.PURPLE, vertical, dither)
+      assert screen(t, p, 10, 20, 40, 30) == want
+      t, p = panel()
+      t.fillgradient((49, 20), (-40, 30), t.NAVY, t.PURPLE, vertical, dither)
+      assert screen(t, p, 10, 20, 40, 30) == want
+
+class WatchSPI(tftemu.AsyncSPI) :
+  #Counts transfers during which the driver filled its other line buffer.
+  def __init__( self, aTFT ) :
+    tftemu.AsyncSPI.__init__(self, 1, 2)
+    self.tft = aTFT
+    self.overlapped = 0
+    self.transfers = 0
+
+  async def write_async( self, aData ) :
+    lines = self.tft._lines
+    before = [bytes(b) for b in lines]
+    await tftemu.AsyncSPI.write_async(self, aData)
+    self.transfers += 1
+    if any(bytes(b) != s for b, s in zip(lines, before)) :
+      self.overlapped += 1
+
+def _scene( t ) :
+  t.buffered()
+  t.fillgradient((0, 0), (128, 160), t.NAVY, t.PURPLE)
+  t.show()
+  #Narrower than the screen, so rows go through the line buffers.  Every
+  # row different so each chunk changes the buffer it is copied into.
+  t.image(10, 10, 99, 149, bytearray((i * 7) & 0xFF for i in range(90 * 140 * 2)))
+
+def test_flush_overlaps_copy_with_transfer() :
+  import asyncio
+  t, p = panel()
+  _scene(t)
+  t.show()
+  want = screen(t, p, 0, 0, 128, 160)
+  t, p = panel()
+  _scene(t)
+  spi = t.spi = WatchSPI(t)
+  asyncio.run(t.flush())
+  assert screen(t, p, 0, 0, 128, 160) == want
+  assert spi.clobbered == 0
+  assert spi.transfers > 2
+  #Every chunk but the last went out while the next one was copied.
+  assert spi.overlapped == spi.transfers - 1
+
+def test_profile_charges_every_primitive() :
+  import asyncio
+  import tftprof
+  t, p = panel()
+  #Every public drawing method that talks to the panel is counted.
+  skip = {'color', 'size', 'cliprect', 'stats', 'glyphcache', 'rgb', 'pushclip', 'popclip', 'profile',
+          'resetstats', 'rotation', 'buffered', 'record', 'on', 'invertcolor', 'setvscroll', 'vscroll'}
+  public = {n for n, v in vars(type(t)).items() if not n.startswith('_') and callable(v)
+            and not n.isupper() and not n.startswith('init')}
+  assert public - skip <= set(tftprof.PRIMITIVES)
+  prof = t.profile()
+  t.fillgradient((0, 0), (50, 50), t.NAVY, t.PURPLE)
+  t.filldither((0, 0), (50, 50), t.BLACK, t.GRAY, 6)
+  t.buffered()
+  t.fillrect((10, 10), (20, 20), t.RED)
+  asyncio.run(t.flush())
+  s = prof.stats()
+  assert s[tftprof.IDLE]['bytes'] == 0
+  for name in ('fillgradient', 'filldither', 'flush') :
+    assert s[name]['calls'] == 1 and s[name]['bytes'] > 0, name
+  assert s['fillpattern']['bytes'] == 0        #Called by filldither
+
+def _lit( t, p ) :
+  x0, y0 = t._offset
+  return {(x - x0, y - y0) for y, r in enumerate(p.view()) for x, v in enumerate(r) if v}
+
+def test_arc_zero_sweep_is_the_start_point() :
+  for r in (0, 1, 5, 30) :
+    for a in range(0, 360, 15) :
+      t, p = panel()
+      t.arc((64, 80), r, a, a, t.WHITE)
+      dots = _lit(t, p)
+      assert len(dots) == 1, (r, a)
+      t, p = panel()
+      #A narrow arc around it, wide enough to reach a pixel on small circles.
+      w = 90 // (r + 1) + 3
+      t.arc((64, 80), r, a - w, a + w, t.WHITE)
+      assert dots <= _lit(t, p), (r, a)
+
+def test_glyph_cache_keeps_fonts_apart() :
+  import gc
+  t, p = panel()
+  t.glyphcache(4096)
+  seen = set()
+  for i in range(20) :
+    #A new font each time, dropped after use so its id() may come back.
+    font = {'Width': 5, 'Height': 8, 'Start': 32, 'End': 127,
+            'Data': bytearray((j * 37 + i) & 0x7F for j in range(96 * 5))}
+    seen.add(id(font))
+    t.char((0, 0), 'A', t.WHITE, font, (1, 1), t.BLACK)
+    want = bytes(t._glyph(font, ord('A'), t.WHITE, t.BLACK, 1, 1))
+    cols = font['Data'][(ord('A') - 32) * 5:(ord('A') - 32) * 5 + 5]
+    assert want == bytes(_block(cols, 8))
+    del font
+    gc.collect()
+
+def _block( aCols, aHeight ) :
+  #RGB565 white on black block of the columns, row major.
+  out = bytearray()
+  for r in range(aHeight) :
+    for c in aCols :
+      out += b'\xff\xff' if (c >> r) & 1 else b'\x00\x00'
+  return out
+
+def _mixed( t, aSeed, aCount ) :
+  #A seeded frame of overlapping primitives, much of it painted over.
+  import random
+  rnd = random.Random(aSeed)
+  colors = (t.RED, t.GREEN, t.BLUE, t.WHITE, t.YELLOW, t.NAVY)
+  t.fillrect((0, 0), (128, 160), t.BLACK)
+  for _ in range(aCount) :
+    k = rnd.randrange(7)
+    x, y = rnd.randrange(-10, 120), rnd.randrange(-10, 150)
+    c = rnd.choice(colors)
+    if k == 0 :
+      t.fillrect((x, y), (rnd.randrange(1, 60), rnd.randrange(1, 60)), c)
+    elif k == 1 :
+      t.text((x, y), '%02d:%02d' % (rnd.randrange(100), rnd.randrange(100)), c, FONT,
+             rnd.choice((1, 2)), True, rnd.choice(colors))
+    elif k == 2 :
+      w, h = rnd.randrange(1, 30), rnd.randrange(1, 30)
+      t.image(x, y, x + w - 1, y + h - 1, bytearray(rnd.getrandbits(8) for _ in range(w * h * 2)))
+    elif k == 3 :
+      t.hline((x, y), rnd.randrange(1, 80), c)
+    elif k == 4 :
+      t.vline((x, y), rnd.randrange(1, 80), c)
+    elif k == 5 :
+      t.pixel((x, y), c)
+    else:
+      t.fillcircle((x, y), rnd.randrange(1, 20), c)
+
+FONT = {'Width': 5, 'Height': 8, 'Start': 32, 'End': 127,
+        'Data': bytearray((i * 37 + 11) & 0x7F for i in range(96 * 5))}
+
+def _recorded( aBuffered, aRecord, aSeed, aCount ) :
+  t, p = panel()
+  if aBuffered :
+    t.buffered()
+  p.resetcounts()
+  plays = []
+  if aRecord :
+    play = t._play
+    t._play = lambda d : (plays.append(len(d.ops)), play(d))
+    t.record()
+  _mixed(t, aSeed, aCount)
+  if aRecord :
+    t.commit()
+  t.show()
+  return screen(t, p, 0, 0, 128, 160), p.bytes, p.windows, len(plays)
+
+def test_record_matches_immediate_mode() :
+  for seed in range(4) :
+    want, wbytes, wwindows, _ = _recorded(False, False, seed, 40)
+    got, gbytes, gwindows, _ = _recorded(False, True, seed, 40)
+    assert got == want, seed
+    assert gbytes < wbytes and gwindows < wwindows, seed
+    #Buffered, the buffer already keeps overdraw off the bus.
+    want, wbytes, wwindows, _ = _recorded(True, False, seed, 40)
+    got, gbytes, gwindows, _ = _recorded(True, True, seed, 40)
+    assert (got, gbytes, gwindows) == (want, wbytes, wwindows), seed
+
+def test_record_longer_than_maxops() :
+  import ST7735
+  n = 3 * ST7735.DisplayList.MAXOPS
+  want, wbytes, wwindows, _ = _recorded(False, False, 7, n)
+  got, gbytes, gwindows, plays = _recorded(False, True, 7, n)
+  assert got == want
+  #Flushed part way through as well as at commit().
+  assert plays > 1
+  assert gbytes < wbytes and gwindows < wwindows
+  want, wbytes, wwindows, _ = _recorded(True, False, 7, n)
+  got, gbytes, gwindows, _ = _recorded(True, True, 7, n)
+  assert (got, gbytes, gwindows) == (want, wbytes, wwindows)
+
+def _each( t ) :
+  #One call of every drawing primitive, all crossing the clip edges.
+  img = bytearray((i * 13) & 0xFF for i in range(60 * 50 * 2))
+  tile = bytearray((i * 29 + 5) & 0xFF for i in range(3 * 4 * 2))
+  return (
+    ('pixel', lambda : [t.pixel((x, 40 + x % 7), t.RED) for x in range(0, 128, 3)]),
+    ('text', lambda : t.text((5, 30), '12:34:56 ABC', t.YELLOW, FONT, 2, True, t.NAVY)),
+    ('text nobg', lambda : t.text((5, 30), '12:34:56 ABC', t.YELLOW, FONT, 2, True)),
+    ('char', lambda : t.char((28, 28), 'W', t.GREEN, FONT, (4, 3), t.BLUE)),
+    ('line', lambda : t.line((0, 10), (127, 150), t.WHITE)),
+    ('polyline', lambda : t.polyline(((10, 10), (120, 60), (15, 140)), t.RED, True)),
+    ('lines', lambda : t.lines((((0, 100), (127, 20)), ((60, 0), (61, 159))), t.GREEN)),
+    ('hline', lambda : [t.hline((0, y), 128, t.WHITE) for y in range(0, 160, 9)]),
+    ('vline', lambda : [t.vline((x, 0), 160, t.WHITE) for x in range(0, 128, 9)]),
+    ('rect', lambda : t.rect((25, 25), (70, 90), t.YELLOW)),
+    ('fillrect', lambda : t.fillrect((25, 25), (70, 90), t.YELLOW)),
+    ('circle', lambda : t.circle((64, 70), 45, t.RED)),
+    ('fillcircle', lambda : t.fillcircle((64, 70), 45, t.RED)),
+    ('arc', lambda : t.arc((64, 70), 45, 20, 300, t.GREEN)),
+    ('roundrect', lambda : t.roundrect((25, 25), (70, 90), 12, t.BLUE)),
+    ('fillroundrect', lambda : t.fillroundrect((25, 25), (70, 90), 12, t.BLUE)),
+    ('fillgradient', lambda : t.fillgradient((20, 20), (90, 100), t.RED, t.BLUE, True, True)),
+    ('fillpattern', lambda : t.fillpattern((20, 20), (90, 100), tile, 3)),
+    ('filldither', lambda : t.filldither((20, 20), (90, 100), t.RED, t.WHITE, 5)),
+    ('fill', lambda : t.fill(t.PURPLE)),
+    ('image', lambda : t.image(30, 30, 89, 79, img)),
+    ('stream', lambda : t.stream(30, 30, 89, 79, (img[r * 120:r * 120 + 120] for r in range(50)))),
+  )
+
+def _drawn( aBuffered, aName, aClip ) :
+  #Screen after the named primitive on a patterned background, and before.
+  t, p = panel()
+  if aBuffered :
+    t.buffered()
+  t.fillgradient((0, 0), (128, 160), t.NAVY, t.GRAY, False)
+  t.show()
+  before = screen(t, p, 0, 0, 128, 160)
+  if aClip :
+    t.pushclip((0, 0), (128, 160))
+    t.pushclip(*aClip)
+  dict(_each(t))[aName]()
+  if aClip :
+    t.popclip()
+    t.popclip()
+    assert t.cliprect() == (0, 0, 127, 159)
+  t.show()
+  return before, screen(t, p, 0, 0, 128, 160)
+
+def test_clip_every_primitive() :
+  t, p = panel()
+  names = [n for n, _ in _each(t)]
+  for buffered in (False, True) :
+    for (cx, cy), (cw, ch) in (((33, 47), (41, 29)), ((-5, 60), (50, 200)), ((90, 0), (100, 10))) :
+      for name in names :
+        _, want = _drawn(buffered, name, None)
+        before, got = _drawn(buffered, name, ((cx, cy), (cw, ch)))
+        for y in range(160) :
+          for x in range(128) :
+            inside = cx <= x < cx + cw and cy <= y < cy + ch
+            assert got[y][x] == (want if inside else before)[y][x], (buffered, name, cx, cy, x, y)
+
+def test_no_cs_while_drawing_off_the_bus() :
+  for mode in ('buffered', 'record') :
+    t, p = panel()
+    getattr(t, mode)()
+    cs = []
+    t.cs = lambda v, pin = t.cs : (cs.append(v), pin(v))
+    #Few enough ops that the list is not played before commit().
+    _mixed(t, 3, 8)
+    assert cs == [], mode
+    t.commit()
+    t.show()
+    #One transaction for the whole frame.
+    assert cs == [0, 1], mode
+    want, _, _, _ = _recorded(False, False, 3, 8)
+    assert screen(t, p, 0, 0, 128, 160) == want, mode
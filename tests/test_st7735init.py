@@ -0,0 +1,92 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'TheClockProject', 'ESP32withTFT1.8Display'))
+
+import tftemu
+tftemu.install()
+
+#What the init methods sent before they were turned into tables, as
+# (command, arguments), written out from the old code.
+GAMMAP_R = (0x0f, 0x1a, 0x0f, 0x18, 0x2f, 0x28, 0x20, 0x22, 0x1f, 0x1b, 0x23, 0x37, 0x00, 0x07, 0x02, 0x10)
+GAMMAN_R = (0x0f, 0x1b, 0x0f, 0x17, 0x33, 0x2c, 0x29, 0x2e, 0x30, 0x30, 0x39, 0x3f, 0x00, 0x07, 0x03, 0x10)
+GAMMAP_B = (0x02, 0x1c, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2d, 0x29, 0x25, 0x2b, 0x39, 0x00, 0x01, 0x03, 0x10)
+GAMMAN_B = (0x03, 0x1d, 0x07, 0x06, 0x2e, 0x2c, 0x29, 0x2d, 0x2e, 0x2e, 0x37, 0x3f, 0x00, 0x00, 0x02, 0x10)
+
+GOLDEN = {
+  'initb' : (
+    (0x01, ()), (0x11, ()),                             #SWRESET, SLPOUT
+    (0x3A, (0x05,)),                                    #COLMOD
+    (0xB1, (0x00, 0x06, 0x03)),                         #FRMCTR1
+    (0x36, (0x08,)),                                    #MADCTL
+    (0xB6, (0x15, 0x02)),                               #DISSET5
+    (0xB4, (0x00,)),                                    #INVCTR
+    (0xC0, (0x02, 0x70)), (0xC1, (0x05,)), (0xC2, (0x01, 0x02)),
+    (0xC5, (0x3C, 0x38)), (0xFC, (0x11, 0x15)),
+    (0xE0, GAMMAP_B), (0xE1, GAMMAN_B),
+    (0x2A, (0x00, 0x02, 0x00, 129)), (0x2B, (0x00, 0x01, 0x00, 160)),
+    (0x13, ()), (0x2C, ()), (0x29, ()),                 #NORON, RAMWR, DISPON
+  ),
+  'initr' : (
+    (0x01, ()), (0x11, ()),
+    (0xB1, (0x01, 0x2C, 0x2D)), (0xB2, (0x01, 0x2C, 0x2D)),
+    (0xB3, (0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D)),
+    (0xB4, (0x07,)),
+    (0xC0, (0xA2, 0x02, 0x84)), (0xC1, (0xC5,)), (0xC2, (0x0A, 0x00)),
+    (0xC3, (0x8A, 0x2A)), (0xC4, (0x8A, 0xEE)), (0xC5, (0x0E,)),
+    (0x20, ()),                                         #INVOFF
+    (0x36, (0xC8,)), (0x3A, (0x05,)),
+    (0x2A, (0x00, 0x00, 0x00, 127)), (0x2B, (0x00, 0x00, 0x00, 159)),
+    (0xE0, GAMMAP_R), (0xE1, GAMMAN_R),
+    (0x29, ()), (0x13, ()),
+  ),
+  'initb2' : (
+    (0x01, ()), (0x11, ()),
+    (0xB1, (0x01, 0x2C, 0x2D)), (0xB2, (0x01, 0x2C, 0x2D)), (0xB3, (0x01, 0x2C, 0x2D)),
+    (0xB4, (0x07,)),
+    (0xC0, (0xA2, 0x02, 0x84)), (0xC1, (0xC5,)), (0xC2, (0x0A, 0x00)),
+    (0xC3, (0x8A, 0x2A)), (0xC4, (0x8A, 0xEE)), (0xC5, (0x0E,)),
+    (0x36, (0xC8,)),
+    (0xE0, GAMMAP_B), (0xE1, GAMMAN_B),
+    (0x2A, (0x00, 0x02, 0x00, 129)), (0x2B, (0x00, 0x01, 0x00, 160)),
+    (0x3A, (0x05,)),
+    (0x13, ()), (0x2C, ()), (0x29, ()),
+  ),
+  'initg' : (
+    (0x01, ()), (0x11, ()),
+    (0xB1, (0x01, 0x2C, 0x2D)), (0xB2, (0x01, 0x2C, 0x2D)),
+    (0xB3, (0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D)),
+    (0xB4, (0x07,)),
+    (0xC0, (0xA2, 0x02, 0x84)), (0xC1, (0xC5,)), (0xC2, (0x0A, 0x00)),
+    (0xC3, (0x8A, 0x2A)), (0xC4, (0x8A, 0xEE)), (0xC5, (0x0E,)),
+    (0x20, ()),
+    (0x36, (0x00,)),                                    #_setMADCTL(), rotation 0 RGB
+    (0x3A, (0x05,)),
+    (0x2A, (0x00, 0x01, 0x00, 127)), (0x2B, (0x00, 0x01, 0x00, 159)),
+    (0xE0, GAMMAP_B), (0xE1, GAMMAN_B),
+    (0x13, ()), (0x29, ()),
+  ),
+}
+
+def _stream( aCommands ) :
+  out = []
+  for cmd, args in aCommands :
+    out.append((0, cmd))
+    out.extend((1, a) for a in args)
+  return out
+
+def _sent( aInit, aMaxDelay = None ) :
+  t, p = tftemu.make(None)
+  p.trace = []
+  p.resetcounts()
+  getattr(t, aInit)(aMaxDelay)
+  return p.trace, p.transactions
+
+def test_init_streams_match_golden() :
+  for name, commands in GOLDEN.items() :
+    for delay in (None, 0) :
+      trace, transactions = _sent(name, delay)
+      assert trace == _stream(commands), (name, delay)
+      #initg sends its two tables and MADCTL between them, one CS low each.
+      assert transactions == (3 if name == 'initg' else 1), name
@@ -0,0 +1,18 @@
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH = os.path.join(os.path.dirname(HERE), 'TheClockProject', 'ESP32withTFT1.8Display')
+sys.path.insert(0, BENCH)
+
+import tftbench
+
+def test_no_worse_than_baseline() :
+  #Bus traffic and pictures against the committed bench.json.  After an
+  # improvement, refresh it with: python3 tftbench.py --save bench.json
+  with open(os.path.join(BENCH, 'bench.json')) as f :
+    base = json.load(f)
+  results = tftbench.run()
+  assert sorted(results) == sorted(base)
+  assert tftbench.report(results, base) == []
@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'TheClockProject', 'ESP32withTFT1.8Display'))
+
+import tftcolor
+
+def _565( r, g, b ) :
+  #Big endian RGB565 of one pixel, worked out the long way.
+  v = ((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3)
+  return bytes((v >> 8, v & 0xFF))
+
+def _rgbref( aSrc, aBGR, n ) :
+  out = b''
+  for i in range(n) :
+    r, g, b = aSrc[i * 3:i * 3 + 3]
+    out += _565(b, g, r) if aBGR else _565(r, g, b)
+  return out
+
+def _grayref( aSrc, n ) :
+  return b''.join(_565(v, v, v) for v in aSrc[:n])
+
+def _pixels( n ) :
+  rnd = random.Random(n)
+  #Every channel value turns up, plus random ones.
+  return bytes(range(256)) * 3 + bytes(rnd.getrandbits(8) for _ in range(n * 3))
+
+def test_rgb888() :
+  src = _pixels(50)
+  n = len(src) // 3
+  for bgr in (False, True) :
+    want = _rgbref(src, bgr, n)
+    assert bytes(tftcolor.rgb888(src, None, bgr)) == want
+    #Part of the buffer into a bigger destination, the rest left alone.
+    dst = bytearray(b'\xaa') * (n * 2 + 7)
+    got = tftcolor.rgb888(src, dst, bgr, 100)
+    assert bytes(got) == want[:200]
+    assert dst[200:] == bytearray(b'\xaa') * (len(dst) - 200)
+    #In place.
+    buf = bytearray(src)
+    got = tftcolor.rgb888(buf, buf, bgr)
+    assert bytes(got) == want
+    buf = bytearray(src)
+    assert bytes(tftcolor.rgb888(buf, buf, bgr, 37)) == want[:74]
+    assert buf[74:] == src[74:]
+
+def test_gray8() :
+  src = _pixels(20)
+  n = len(src)
+  want = _grayref(src, n)
+  assert bytes(tftcolor.gray8(src)) == want
+  dst = bytearray(b'\x55') * (n * 2 + 5)
+  assert bytes(tftcolor.gray8(src, dst, 300)) == want[:600]
+  assert dst[600:] == bytearray(b'\x55') * (len(dst) - 600)
+  #In place, the gray levels in the first n bytes of a buffer twice as big.
+  buf = bytearray(src) + bytearray(n)
+  assert bytes(tftcolor.gray8(buf, buf, n)) == want
+  buf = bytearray(src) + bytearray(n)
+  assert bytes(tftcolor.gray8(buf, buf, 123)) == want[:246]
+
+def test_small_destination() :
+  import pytest
+  with pytest.raises(ValueError) :
+    tftcolor.rgb888(bytes(30), bytearray(19))
+  with pytest.raises(ValueError) :
+    tftcolor.gray8(bytes(10), bytearray(10))
@@ -0,0 +1,46 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'TheClockProject', 'ESP32withTFT1.8Display'))
+
+import tftemu
+tftemu.install()
+
+from tftconsole import Console
+
+FONT = {'Width': 5, 'Height': 8, 'Start': 32, 'End': 127,
+        'Data': bytearray((i * 37 + 11) & 0x7F for i in range(96 * 5))}
+
+GARBAGE = 0xA5A5
+
+def console( aInit, **kw ) :
+  t, p = tftemu.make(aInit)
+  t.rotation(0)
+  p.mem[:] = bytes((GARBAGE >> 8, GARBAGE & 0xFF)) * (len(p.mem) // 2)
+  return t, p, Console(t, FONT, **kw)
+
+def visible( t, p ) :
+  #The view() cut to the screen, leaving out frame memory the panel hides.
+  x, y = t._offset
+  w, h = t.size()
+  return [r[x:x + w] for r in p.view()[y:y + h]]
+
+def test_scroll_area_is_all_drawable() :
+  for init in ('initr', 'initb2') :
+    t, p, c = console(init)
+    assert c.top + c.lines * c.lineh + c.bottom == t.size()[1]
+    c.status('')
+    for i in range(3 * c.lines + 2) :
+      c.write('line %d' % i)
+      rows = visible(t, p)
+      assert not any(GARBAGE in r for r in rows), (init, i)
+
+def test_leftover_rows_join_the_bottom_area() :
+  t, p, c = console('initr', aTop = 9, aBottom = 9)
+  assert c.bottom >= 9
+  c.header('head')
+  c.status('stat')
+  for i in range(2 * c.lines) :
+    c.write('x' * i)
+  assert not any(GARBAGE in r for r in visible(t, p))
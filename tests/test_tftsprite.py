@@ -0,0 +1,64 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'TheClockProject', 'ESP32withTFT1.8Display'))
+
+import tftemu
+tftemu.install()
+
+from tftsprite import Sprite, SpriteLayer
+
+def background( aCalls ) :
+  #A gradient background, counting the pixels fetched.
+  def bg( buf, x, y, w, h ) :
+    aCalls.append(w * h)
+    for r in range(h) :
+      for c in range(w) :
+        v = ((x + c) * 5 + (y + r) * 3) & 0xFFFF
+        o = (r * w + c) * 2
+        buf[o] = v >> 8
+        buf[o + 1] = v & 0xFF
+  return bg
+
+def ball( aColor ) :
+  return bytearray((aColor >> 8, aColor & 0xFF)) * 64
+
+def setup() :
+  t, p = tftemu.make('initr')
+  t.rotation(0)
+  calls = []
+  layer = SpriteLayer(t, background(calls))
+  return t, p, calls, layer
+
+def test_sprite_animating_in_place_fetches_background_once() :
+  t, p, calls, layer = setup()
+  s = layer.add(Sprite(8, 8, ball(0xF800), 0x0000, (20, 20)))
+  for i in range(7) :
+    s.frame(ball(0xF800 + i))
+    layer.update()
+  assert len(calls) == 1
+
+def _run( aFresh ) :
+  #A sprite moving, then animating in place, then moving again.
+  t, p, calls, layer = setup()
+  s = layer.add(Sprite(8, 8, ball(0x07E0), 0x0000, (20, 20)))
+  layer.add(Sprite(8, 8, ball(0x001F), 0x0000, (60, 60)))
+  layer.update()
+  bg = s._bg
+  for i in range(12) :
+    if i < 4 or i > 8 :
+      s.move(20 + i * 3, 20 + i)
+    else:
+      s.frame(ball(0x07E0 + i))
+    if aFresh :
+      layer.redraw()
+    layer.update()
+  assert s._bg is bg                   #Reused, not allocated again
+  return p.view(), len(calls)
+
+def test_cached_background_matches_fetched() :
+  cached, n = _run(False)
+  fresh, m = _run(True)
+  assert cached == fresh
+  assert n < m
@@ -0,0 +1,67 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sntp
+import timesync
+
+TZ = 19800
+
+class FakeRTC:
+    # A perfect RTC holding local time, the true UTC time kept alongside
+    def __init__(self):
+        self.utc_us = 1760000000 * 1000000
+        self.rtc_us = self.utc_us + TZ * 1000000
+
+    def advance(self, s):
+        self.utc_us += s * 1000000
+        self.rtc_us += s * 1000000
+
+    def set_rtc(self, offset_us, tz=0):
+        self.rtc_us += offset_us + tz * 1000000
+
+    def offset(self):
+        return self.utc_us - self.rtc_us
+
+def fake_rtc(monkeypatch):
+    rtc = FakeRTC()
+    monkeypatch.setattr(sntp, "now_us", lambda: rtc.rtc_us)
+    monkeypatch.setattr(sntp, "set_rtc", rtc.set_rtc)
+    return rtc
+
+def test_fallback_then_ntp_learns_no_drift(monkeypatch):
+    rtc = fake_rtc(monkeypatch)
+    d = timesync.Discipline(TZ)
+    d.measured(rtc.offset())
+    rtc.advance(timesync.MIN_INTERVAL_S)
+    d.measured(rtc.offset())
+    # The HTTP fallback sets whole seconds, late by its round trip
+    rtc.advance(timesync.MIN_INTERVAL_S)
+    rtc.rtc_us -= 150000
+    d.stepped()
+    rtc.advance(timesync.MIN_INTERVAL_S)
+    d.measured(rtc.offset())
+    assert d.ppb == 0
+    assert d.synced_us == rtc.rtc_us
+    # With no rate nothing is stepped and the clock stays right
+    rtc.advance(timesync.MAX_INTERVAL_S)
+    d.correct()
+    assert rtc.offset() == -TZ * 1000000
+
+def test_stepped_forgets_rate(monkeypatch):
+    rtc = fake_rtc(monkeypatch)
+    d = timesync.Discipline(TZ)
+    d.ppb, d.spread, d.synced_us, d.corrected_us = 30000, 100, rtc.rtc_us, 5000
+    d.stepped()
+    assert (d.ppb, d.spread, d.synced_us, d.corrected_us) == (0, None, None, 0)
+    assert d.correct() == timesync.MIN_INTERVAL_S
+
+def test_drifting_rtc_rate_is_learned(monkeypatch):
+    rtc = fake_rtc(monkeypatch)
+    d = timesync.Discipline(TZ)
+    d.measured(rtc.offset())
+    rtc.advance(3600)
+    rtc.rtc_us += 3600 * 30          # 30 ppm fast
+    d.measured(rtc.offset())
+    assert abs(d.ppb - 30000) <= 1
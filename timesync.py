@@ -0,0 +1,104 @@
+# Keeps the RTC on time between syncs for the WiFi clocks.
+#
+# Every NTP sync measures how far the RTC has wandered since the last one.
+# That gives the rate the RTC runs fast or slow at, which is then taken
+# out in small steps between syncs, so the clock stays right long after
+# the network goes away.  The next sync is planned from how much the rate
+# estimate still moves: often while it is settling, up to once a day when
+# it holds still.  Failed syncs back off exponentially with some jitter so
+# a flaky network does not turn into a stream of requests.
+#
+#   clock = timesync.Discipline(TZ_OFFSET)
+#   asyncio.create_task(clock.correct_task())
+#   ...
+#   delay_s = clock.measured((await sntp.query())[0])    # after a sync
+#   delay_s = clock.failed()                             # after a failure
+
+import random
+import sntp
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+MIN_INTERVAL_S = 15 * 60    # Never sync more often than this once synced
+MAX_INTERVAL_S = 24 * 3600  # Nor less often than this
+TARGET_ERROR_US = 100000    # Aim to be this close when the next sync comes
+MIN_SAMPLE_S = 10 * 60      # Shorter gaps between syncs are all jitter, no rate from them
+MAX_PPB = 500000            # Faster or slower than this is the RTC being set, not drift
+STEP_US = 20000             # Take drift out in steps of this
+RETRY_MIN_S = 2             # First retry after a failed sync
+RETRY_MAX_S = 30 * 60       # Retries back off up to this
+
+class Discipline:
+    # Rate estimate and correction for the RTC.  tz as in sntp.local_time().
+    def __init__(self, tz=0):
+        self.tz = tz
+        self.ppb = 0              # RTC rate error in parts per billion, > 0 is fast
+        self.spread = None        # How much the estimate moved at the last sync
+        self.synced_us = None     # RTC reading just after it was last set
+        self.corrected_us = 0     # Taken off the RTC by correct() since then
+        self.interval_s = MIN_INTERVAL_S
+        self.retry_s = RETRY_MIN_S
+
+    def measured(self, offset_us):
+        # Feed in an sntp.query() offset, sets the RTC and returns the
+        # seconds to the next sync
+        now = sntp.now_us()
+        s = (now + offset_us) // 1000000
+        # The RTC holds local time, so the offset includes the UTC offset
+        err = -(offset_us + (self.tz(s) if callable(self.tz) else self.tz) * 1000000)
+        if self.synced_us is not None and now - self.synced_us >= MIN_SAMPLE_S * 1000000:
+            # Drift since the last set is what is left plus what correct() took off
+            ppb = (err + self.corrected_us) * 1000000000 // (now - self.synced_us)
+            if abs(ppb) > MAX_PPB:
+                self.ppb, self.spread = 0, None
+            elif self.spread is None:
+                self.ppb, self.spread = ppb, abs(ppb)
+            else:
+                self.ppb, self.spread = (self.ppb + ppb) // 2, abs(ppb - self.ppb)
+        sntp.set_rtc(offset_us, self.tz)
+        self.synced_us = sntp.now_us()
+        self.corrected_us = 0
+        self.retry_s = RETRY_MIN_S
+        if self.spread is None:
+            self.interval_s = MIN_INTERVAL_S
+        else:
+            # Sparse while the estimate holds still, at most doubling each time
+            i = TARGET_ERROR_US * 1000 // max(self.spread, 1)
+            self.interval_s = max(MIN_INTERVAL_S, min(i, 2 * self.interval_s, MAX_INTERVAL_S))
+        return self.interval_s
+
+    def stepped(self):
+        # The RTC was set from a source with no sub-second part (the HTTP
+        # fallback).  Its error would read as drift at the next sync, so
+        # measuring starts over from that sync.  Returns the seconds to the
+        # next sync.
+        self.synced_us = None
+        self.corrected_us = 0
+        self.ppb, self.spread = 0, None
+        self.retry_s = RETRY_MIN_S
+        self.interval_s = min(2 * self.interval_s, MAX_INTERVAL_S)
+        return self.interval_s
+
+    def failed(self):
+        # Returns the seconds to wait before trying again, doubling each time
+        delay = self.retry_s
+        self.retry_s = min(2 * self.retry_s, RETRY_MAX_S)
+        return delay + random.getrandbits(8) * delay // 1024
+
+    def correct(self):
+        # Step the RTC by the drift predicted since the last correction if it
+        # has reached STEP_US, returns the seconds until it next will
+        if self.synced_us is None or not self.ppb:
+            return MIN_INTERVAL_S
+        due = self.ppb * (sntp.now_us() - self.synced_us) // 1000000000 - self.corrected_us
+        if abs(due) >= STEP_US:
+            sntp.set_rtc(-due)
+            self.corrected_us += due
+            due = 0
+        return max(1, min((STEP_US - abs(due)) * 1000 // abs(self.ppb), MIN_INTERVAL_S))
+
+    async def correct_task(self):
+        while True:
+            await asyncio.sleep(self.correct())